@@ -0,0 +1,92 @@
+r"""
+Load benchmark for cluster-api.
+
+Sends concurrent GET requests to one or more running instances and reports
+requests per second and latency percentiles for each, for example to
+compare a build with blocking handlers against the async Motor build:
+
+    uvicorn main:app --port 8000                # build A, terminal 1
+    uvicorn main:app --port 8001                # build B, terminal 2
+    python benchmarks/bench_load.py --token <jwt> --path /v1/clusters \
+        --base-url http://localhost:8000 --base-url http://localhost:8001 \
+        --concurrency 64 --requests 5000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+def percentile(sorted_values, pct):
+    """Return the pct-th percentile of an already sorted list."""
+    index = min(
+        len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1)))
+    )
+    return sorted_values[index]
+
+
+async def run_load(base_url, args):
+    """Run the load against one base URL and return (latencies, statuses, wall)."""
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+    limits = httpx.Limits(
+        max_connections=args.concurrency, max_keepalive_connections=args.concurrency
+    )
+    latencies = []
+    statuses = {}
+    remaining = iter(range(args.requests))
+
+    async with httpx.AsyncClient(
+        base_url=base_url, headers=headers, limits=limits, timeout=args.timeout
+    ) as client:
+
+        async def worker():
+            for _ in remaining:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(args.path)
+                    code = response.status_code
+                except httpx.HTTPError:
+                    code = 0
+                latencies.append(time.perf_counter() - started)
+                statuses[code] = statuses.get(code, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        wall = time.perf_counter() - started
+    return sorted(latencies), statuses, wall
+
+
+def report(base_url, latencies, statuses, wall):
+    """Print a summary line for one base URL."""
+    print(
+        f"{base_url}: {len(latencies) / wall:.1f} req/s "
+        f"p50={percentile(latencies, 50) * 1000:.1f}ms "
+        f"p90={percentile(latencies, 90) * 1000:.1f}ms "
+        f"p99={percentile(latencies, 99) * 1000:.1f}ms "
+        f"mean={statistics.mean(latencies) * 1000:.1f}ms "
+        f"statuses={statuses}"
+    )
+
+
+async def main():
+    """Run the benchmark against every base URL in turn."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--base-url", action="append", required=True, help="May be repeated"
+    )
+    parser.add_argument("--path", default="/v1/clusters")
+    parser.add_argument("--token", default=None)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    for base_url in args.base_url:
+        report(base_url, *await run_load(base_url, args))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
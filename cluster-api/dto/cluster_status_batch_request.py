@@ -0,0 +1,25 @@
+"""DTOs for cluster API: batch cluster status request models."""
+from typing import List
+
+from pydantic import BaseModel, Field
+
+
+class ClusterStatusBatchRequest(BaseModel):
+    """Request model for fetching the live status of several clusters at once."""
+
+    ids: List[str] = Field(..., min_items=1, max_items=100)
+
+    class Config:
+        """
+        Pydantic configuration for ClusterStatusBatchRequest,
+        including schema example.
+        """
+
+        schema_extra = {
+            "example": {
+                "ids": [
+                    "066de609-b04a-4b30-b46c-32537c7f1f6e",
+                    "7c1f5a0e-9b7e-4d55-8a1c-2f2d1b6f3e21",
+                ]
+            }
+        }
@@ -7,3 +7,28 @@ export REALM_NAME=clusterManager
 export ADMIN_CLIENT_ID=admin-cli
 export REQUEST_GROUP_NAME=request-user
 export CLIENT_ID=clustermanagerclient
+export JWKS_TTL_SECONDS=3600
+export JWKS_MIN_REFRESH_SECONDS=30
+export TOKEN_CACHE_SIZE=10000
+export USER_CACHE_SIZE=10000
+export USER_CACHE_TTL_SECONDS=300
+export DAPR_HEALTH_INTERVAL=10
+export DAPR_CALL_TIMEOUT=10
+export SERVICE_CONNECT_TIMEOUT=2
+export SERVICE_READ_TIMEOUT=30
+export SERVICE_MAX_CONNECTIONS=100
+export SERVICE_MAX_KEEPALIVE=20
+export SERVICE_RETRIES=2
+export OUTBOX_BATCH_SIZE=100
+export OUTBOX_POLL_INTERVAL=1
+export OUTBOX_LEASE_SECONDS=30
+export OUTBOX_MAX_BACKOFF=60
+export OUTBOX_MAX_ATTEMPTS=10
+export STATUS_BATCH_CONCURRENCY=10
+export NOTIFICATION_BUS=local
+export NOTIFICATION_PUBSUB=notificationbus
+export NOTIFICATION_TOPIC=cluster-notifications
+export WS_SEND_TIMEOUT=5
+export WS_SEND_QUEUE_SIZE=100
+export WS_OVERFLOW_POLICY=drop_oldest
+export WS_COALESCE_WINDOW_MS=200
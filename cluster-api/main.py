@@ -8,19 +8,27 @@ import logging
 import os
 
 from fastapi import Depends, FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware import Middleware
 from fastapi.middleware.cors import CORSMiddleware
 from middleware.dependency import has_access
 from middleware.middleware import validate_keycloak_token
-from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
 from routes.cluster import router as cluster
 from routes.host_cluster import router as host_cluster_router
 from routes.kube_list import router as kube_route
+from routes.metrics import router as metrics_route
 from routes.public import router as public_route
 from routes.subscription import router as subscription_route
 from routes.user import router as user_route
+from routes.websocket import close_all_sessions, deliver_notification
 from routes.websocket import router as websocket_router
+from utills.dapr_publisher import DaprPublisher
+from utills.db_indexes import start_index_reconciler
+from utills.notification_bus import create_notification_bus
+from utills.outbox import Outbox
 from utills.seeder import seed_db
+from utills.service_client import ServiceClient
 
 app = FastAPI()
 
@@ -39,23 +47,37 @@ PROTECTED = [Depends(has_access)]
 
 
 @app.on_event("startup")
-def startup_db_client():
+async def startup_db_client():
     """Initialize MongoDB client and seed database if necessary."""
-    app.mongodb_client = MongoClient(os.getenv("ATLAS_URI"))
+    app.mongodb_client = AsyncIOMotorClient(os.getenv("ATLAS_URI"))
     app.database = app.mongodb_client[os.getenv("DB_NAME")]
     logging.basicConfig(level=logging.INFO)
 
     # Check if collections exist and seed data if they do not
     collections = ["hostCluster", "user", "subscription", "cluster", "kubeversion"]
-    for collection in collections:
-        if collection not in app.database.list_collection_names():
-            logging.info(f"Collection {collection} not found. Seeding data...")
-            seed_db(app.database)
+    existing_collections = await app.database.list_collection_names()
+    missing_collections = [c for c in collections if c not in existing_collections]
+    if missing_collections:
+        logging.info(f"Collections {missing_collections} not found. Seeding data...")
+        await seed_db(app.database)
+    app.index_reconciler = start_index_reconciler(app.database)
+    app.event_publisher = DaprPublisher()
+    app.service_client = ServiceClient()
+    app.event_publisher.start()
+    app.outbox = Outbox(app.mongodb_client, app.database, app.event_publisher)
+    await app.outbox.start()
+    app.notification_bus = create_notification_bus(app.event_publisher)
+    await app.notification_bus.start(deliver_notification)
 
 
 @app.on_event("shutdown")
-def shutdown_db_client():
-    """Close MongoDB client on application shutdown."""
+async def shutdown_db_client():
+    """Stop background tasks and close clients on application shutdown."""
+    await app.notification_bus.stop()
+    await close_all_sessions()
+    await app.outbox.stop()
+    await run_in_threadpool(app.event_publisher.stop)
+    await app.service_client.aclose()
     app.mongodb_client.close()
 
 
@@ -81,4 +103,7 @@ app.include_router(
 app.include_router(
     cluster, tags=["cluster"], prefix="/v1/clusters", dependencies=PROTECTED
 )
+app.include_router(
+    metrics_route, tags=["metrics"], prefix="/v1/metrics", dependencies=PROTECTED
+)
 app.include_router(websocket_router, tags=["websocket"], prefix="/v1/websocket")
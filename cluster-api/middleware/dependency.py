@@ -1,33 +1,33 @@
 """Dependency utilities for FastAPI authentication and access control."""
 import logging
 
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from jose import jwt
 from jose.exceptions import JOSEError
+from middleware.middleware import verify_token
 
 security = HTTPBearer()
 
 
-async def has_access(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def has_access(
+    request: Request, credentials: HTTPAuthorizationCredentials = Depends(security)
+):
     """
-    Validate JWT token from Authorization header.
+    Ensure the request carries verified token claims.
+
+    The authentication middleware stores the claims on
+    `request.state.token_claims`; they are only decoded here if a route is
+    reached without passing through it.
 
     Raises:
         HTTPException: If token is invalid or cannot be decoded.
     """
-
-    token = credentials.credentials
+    if getattr(request.state, "token_claims", None) is not None:
+        return
     try:
-        payload = jwt.decode(
-            token,
-            key="secret",
-            options={
-                "verify_signature": False,
-                "verify_aud": False,
-                "verify_iss": False,
-            },
-        )
-        logging.info("Token payload :: %s", str(payload))
+        payload = await run_in_threadpool(verify_token, credentials.credentials)
+        request.state.token_claims = payload
+        logging.debug("Token payload :: %s", str(payload))
     except JOSEError as e:  # catches any exception
         raise HTTPException(status_code=401, detail="Unauthorized")
@@ -1,15 +1,23 @@
 """Middleware for Keycloak authentication and user verification."""
+import hashlib
 import logging
 import os
+import time
 
 import jose
 from fastapi import HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
+from jose import jwt
 from keycloak import KeycloakOpenID
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from pyparsing import Any
 from schemas.user_schema import user_from_keycloak_dict, user_from_user_dict
 from utills.common_response import debug_response, generate_response
+from utills.jwks_cache import JWKSCache
+from utills.ttl_cache import TTLCache
 
 # Check if REQUESTS_CA_BUNDLE environment variable exists
 ca_bundle = os.getenv("REQUESTS_CA_BUNDLE")
@@ -30,6 +38,26 @@ try:
 except Exception as e:
     print(f"Error initializing KeycloakOpenID: {e}")
 
+# Realm signing keys, refreshed every JWKS_TTL_SECONDS or on an unknown kid
+signing_keys = JWKSCache(
+    fetch=keycloak_openid.certs,
+    ttl=int(os.getenv("JWKS_TTL_SECONDS", "3600")),
+    min_refresh_interval=int(os.getenv("JWKS_MIN_REFRESH_SECONDS", "30")),
+)
+
+# Verified token claims keyed by the SHA-256 of the token. Each entry is
+# stored with the token's remaining lifetime, so it expires at "exp".
+verified_tokens = TTLCache(maxsize=int(os.getenv("TOKEN_CACHE_SIZE", "10000")), ttl=300)
+
+# Resolved User objects keyed by email, so check_user skips Mongo on a hit.
+# The API never modifies a user after it is first inserted, so entries are
+# not invalidated and only expire after USER_CACHE_TTL_SECONDS; a change
+# made directly in Mongo is seen once the entry expires.
+user_cache = TTLCache(
+    maxsize=int(os.getenv("USER_CACHE_SIZE", "10000")),
+    ttl=int(os.getenv("USER_CACHE_TTL_SECONDS", "300")),
+)
+
 # List of public routes that do not require authentication
 public_routes = [
     "/",
@@ -69,8 +97,11 @@ async def validate_keycloak_token(request: Request, call_next):
     token = authorization_header.split("Bearer ")[1]
 
     try:
-        user_info = is_authenticated(token)
-        check_user(user_info, request)
+        user_info = get_cached_claims(token)
+        if user_info is None:
+            user_info = await run_in_threadpool(verify_token, token)
+        request.state.token_claims = user_info
+        await check_user(user_info, request)
         return await call_next(request)
     except HTTPException as http_exception:
         raise http_exception
@@ -90,7 +121,7 @@ async def validate_keycloak_token(request: Request, call_next):
 
 
 def is_authenticated(credential: str):
-    """Verify the JWT token using Keycloak public key.
+    """Verify the JWT token locally against the cached Keycloak signing keys.
 
     Args:
         credential (str): Bearer token from the request.
@@ -99,26 +130,25 @@ def is_authenticated(credential: str):
         dict: Decoded token payload if valid.
 
     Raises:
-        ValueError: If the public key is invalid or token cannot be decoded.
+        jose.exceptions.JWTError: If the token is malformed, expired, or not
+            signed by a current realm key.
     """
     token = credential
     try:
         # Verify the token and return the token claims if valid
         options = {"verify_signature": True, "verify_aud": False, "verify_exp": True}
 
-        # Ensure keycloak_public_key is valid
-        keycloak_public_key = (
-            "-----BEGIN PUBLIC KEY-----\n"
-            + keycloak_openid.public_key()
-            + "\n-----END PUBLIC KEY-----"
-        )
-
-        if not keycloak_public_key:
-            raise ValueError("Keycloak public key is empty or invalid.")
-
-        # Decode the token
-        token_info = keycloak_openid.decode_token(
-            token, key=keycloak_public_key, options=options
+        kid = jwt.get_unverified_header(token).get("kid")
+        signing_key = signing_keys.get(kid)
+        if signing_key is None:
+            raise jose.exceptions.JWTError(f"Unknown signing key {kid}")
+
+        # Only accept the algorithm the key was issued for
+        token_info = jwt.decode(
+            token,
+            signing_key,
+            algorithms=[signing_key.get("alg", "RS256")],
+            options=options,
         )
         return token_info
 
@@ -130,7 +160,36 @@ def is_authenticated(credential: str):
         raise
 
 
-def check_user(userInfo: Any, request: Request):
+def token_cache_key(token: str):
+    """Return the cache key of a token, so raw tokens are never kept in memory."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def get_cached_claims(token: str):
+    """Return the claims of an already verified, unexpired token, or None."""
+    return verified_tokens.get(token_cache_key(token))
+
+
+def verify_token(token: str):
+    """Verify `token` once and cache its claims until the token expires.
+
+    Args:
+        token (str): Bearer token from the request.
+
+    Returns:
+        dict: Decoded token payload.
+    """
+    claims = get_cached_claims(token)
+    if claims is not None:
+        return claims
+    claims = is_authenticated(token)
+    remaining = claims.get("exp", 0) - time.time()
+    if remaining > 0:
+        verified_tokens.set(token_cache_key(token), claims, ttl=remaining)
+    return claims
+
+
+async def check_user(userInfo: Any, request: Request):
     """Ensure the user exists in the database and attach it to request.state.user.
 
     Args:
@@ -141,14 +200,24 @@ def check_user(userInfo: Any, request: Request):
         Exception: If user processing or DB operations fail.
     """
     try:
-        user = request.app.database["user"].find_one({"email": userInfo["email"]})
-        user_obj = user_from_keycloak_dict(userInfo)
-        if user is None:
-            # User does not exist, insert the user into the database
-            raw_user = jsonable_encoder(user_obj)
-            request.app.database["user"].insert_one(raw_user)
-        else:
+        email = userInfo["email"]
+        user_obj = user_cache.get(email)
+        if user_obj is None:
+            # Insert the user the first time it is seen, atomically
+            raw_user = jsonable_encoder(user_from_keycloak_dict(userInfo))
+            raw_user.pop("email", None)
+            try:
+                user = await request.app.database["user"].find_one_and_update(
+                    {"email": email},
+                    {"$setOnInsert": raw_user},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER,
+                )
+            except DuplicateKeyError:
+                # A concurrent first request inserted the user
+                user = await request.app.database["user"].find_one({"email": email})
             user_obj = user_from_user_dict(user)
+            user_cache.set(email, user_obj)
         request.state.user = user_obj
     except Exception as e:
         debug_response(e, "Error occurs on checking user", "error")
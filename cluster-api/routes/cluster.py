@@ -8,29 +8,39 @@ Includes endpoints for:
 - Retrieving cluster info and status
 """
 
+import asyncio
 import json
 import logging
 import os
-from typing import List
+from datetime import datetime
+from typing import Optional
 
-import requests
-from dapr.clients import DaprClient
 from dto.cluster_request import ClusterRequest
 from dto.cluster_response import ClusterResponse
+from dto.cluster_status_batch_request import ClusterStatusBatchRequest
 from dto.cluster_upgrade import ClusterUpgradeRequest
-from fastapi import APIRouter, Body, HTTPException, Request, Response, status
+from fastapi import APIRouter, Body, HTTPException, Query, Request, Response, status
 from fastapi.encoders import jsonable_encoder
-from middleware.middleware import is_authenticated
 from models.cluster import Cluster
 from models.common_response import ResponseModel
 from models.generate_kubeconfig import GenerateKubeconfig
 from models.user import User
-from schemas.cluster_schema import clusters_serializer, is_valid_url_name
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+from schemas.cluster_schema import (
+    cluster_list_pipeline,
+    clusters_serializer,
+    encode_cluster_cursor,
+    is_valid_url_name,
+)
 from schemas.host_cluster_schema import host_clusters_serializer_test
 from schemas.subscription_schema import subscription_from_dict
 from utills.common_response import debug_response, generate_response
 from utills.common_utills import extract_time_components, get_best_cluster
 
+# Maximum number of status calls in flight for one batch request
+STATUS_BATCH_CONCURRENCY = int(os.getenv("STATUS_BATCH_CONCURRENCY", "10"))
+
 router = APIRouter()
 
 
@@ -40,7 +50,7 @@ router = APIRouter()
     status_code=status.HTTP_201_CREATED,
     response_model={},
 )
-def create_Cluster(request: Request, clusterRequest: ClusterRequest = Body(...)):
+async def create_Cluster(request: Request, clusterRequest: ClusterRequest = Body(...)):
     """
     Create a new cluster in the system.
 
@@ -49,9 +59,7 @@ def create_Cluster(request: Request, clusterRequest: ClusterRequest = Body(...))
     cluster creation event via Dapr.
     """
     name_status, error_message = is_valid_url_name(clusterRequest.name)
-    authorization_header = request.headers.get("Authorization", "")
-    token = authorization_header.split("Bearer ")[1]
-    user_info = is_authenticated(token)
+    user_info = request.state.token_claims
     # checking create 'create-cluster' role is assign to the user.
     if user_info and "realm_access" in user_info:
         realm_roles = user_info["realm_access"]["roles"]
@@ -65,7 +73,7 @@ def create_Cluster(request: Request, clusterRequest: ClusterRequest = Body(...))
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail=error_message
         )
-    createdCluster = request.app.database["cluster"].find_one(
+    createdCluster = await request.app.database["cluster"].find_one(
         {"name": clusterRequest.name}
     )
     if createdCluster is not None:
@@ -73,7 +81,7 @@ def create_Cluster(request: Request, clusterRequest: ClusterRequest = Body(...))
             status_code=status.HTTP_409_CONFLICT,
             detail=f"Cluster with name {clusterRequest.name} already exist",
         )
-    subscription = request.app.database["subscription"].find_one(
+    subscription = await request.app.database["subscription"].find_one(
         {"_id": clusterRequest.subscriptionId}
     )
     if subscription is None:
@@ -81,10 +89,12 @@ def create_Cluster(request: Request, clusterRequest: ClusterRequest = Body(...))
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Subscription with ID {clusterRequest.subscriptionId} not found",
         )
-    host_cluster_reponse = request.app.database["hostCluster"].find(
-        {"region": clusterRequest.region}
+    host_cluster_reponse = (
+        await request.app.database["hostCluster"]
+        .find({"region": clusterRequest.region})
+        .to_list(length=None)
     )
-    hostClusters = host_clusters_serializer_test(json.dumps(list(host_cluster_reponse)))
+    hostClusters = host_clusters_serializer_test(json.dumps(host_cluster_reponse))
     if len(list(hostClusters)) == 0:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -93,7 +103,9 @@ def create_Cluster(request: Request, clusterRequest: ClusterRequest = Body(...))
 
     host_cluster_ids = list(map(lambda x: x["id"], hostClusters))
 
-    best_cluster_id = get_best_cluster(host_cluster_ids)
+    best_cluster_id = await get_best_cluster(
+        request.app.service_client, host_cluster_ids
+    )
     best_cluster_name = ""
     for obj in hostClusters:
         if obj["id"] == best_cluster_id:
@@ -115,33 +127,36 @@ def create_Cluster(request: Request, clusterRequest: ClusterRequest = Body(...))
         kube_version=clusterRequest.kube_version,
     )
     clusterPayload = jsonable_encoder(cluster)
-    new_cluster = request.app.database["cluster"].insert_one(clusterPayload)
-    create_cluster = request.app.database["cluster"].find_one(
-        {"_id": new_cluster.inserted_id}
-    )
-    created_cluster = clusters_serializer(create_cluster)
     try:
-        with DaprClient() as client:
-            del subscription["_id"]
+        del subscription["_id"]
+        async with request.app.outbox.transaction() as tx:
+            new_cluster = await request.app.database["cluster"].insert_one(
+                clusterPayload, session=tx.session
+            )
+            create_cluster = await request.app.database["cluster"].find_one(
+                {"_id": new_cluster.inserted_id}, session=tx.session
+            )
+            created_cluster = clusters_serializer(create_cluster)
             payload = {
                 "subscription": subscription,
                 "host_cluster_id": best_cluster_id,
                 "host_cluster_name": best_cluster_name,
                 "cluster": created_cluster,
             }
-            client.publish_event(
-                pubsub_name="messagebus",
-                topic_name="cluster-create",
-                data=json.dumps(payload),
-                data_content_type="application/json",
-            )
-            logging.info("Published data from create cluster :: %s", str(payload))
+            tx.publish("cluster-create", payload, key=created_cluster["id"])
+        logging.info("Queued data from create cluster :: %s", str(payload))
         return {
             "success": True,
             "code": status.HTTP_200_OK,
             "message": "Clusters listed successfully",
             "data": created_cluster,
         }
+    except DuplicateKeyError:
+        # A concurrent request created the same name after the check above
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Cluster with name {clusterRequest.name} already exist",
+        )
     except Exception as e:
         debug_response(e, "Error occurs on creating cluster", "error")
         return generate_response(
@@ -158,7 +173,7 @@ def create_Cluster(request: Request, clusterRequest: ClusterRequest = Body(...))
     status_code=status.HTTP_200_OK,
     response_model=ResponseModel,
 )
-def update_cluster(
+async def update_cluster(
     id: str, request: Request, clusterUpgradeRequest: ClusterUpgradeRequest = Body(...)
 ):
     """
@@ -168,7 +183,7 @@ def update_cluster(
     updates the cluster, and publishes the upgrade event.
     """
     kube_version = clusterUpgradeRequest.kube_version
-    cluster = request.app.database["cluster"].find_one({"_id": id})
+    cluster = await request.app.database["cluster"].find_one({"_id": id})
     if cluster is None:
         return generate_response(
             False, status.HTTP_404_NOT_FOUND, f"Cluster with ID {id} not found", None
@@ -187,7 +202,7 @@ def update_cluster(
             None,
         )
 
-    host_data = request.app.database["hostCluster"].find_one(
+    host_data = await request.app.database["hostCluster"].find_one(
         {"_id": cluster["host_cluster_id"]}
     )
     if host_data is None:
@@ -195,7 +210,7 @@ def update_cluster(
             False, status.HTTP_404_NOT_FOUND, "Host cluster data not found", None
         )
 
-    subscription = request.app.database["subscription"].find_one(
+    subscription = await request.app.database["subscription"].find_one(
         {"_id": cluster["subscription_id"]}
     )
     if subscription is None:
@@ -206,29 +221,27 @@ def update_cluster(
             None,
         )
 
-    request.app.database["cluster"].update_one(
-        {"_id": id}, {"$set": {"kube_version": kube_version, "status": "Updating"}}
-    )
-
-    find_cluster = request.app.database["cluster"].find_one({"_id": id})
-    update_cluster = clusters_serializer(find_cluster)
     try:
-        # Prepare and publish the event to Dapr
-        with DaprClient() as client:
-            del subscription["_id"]
+        # Update the cluster and queue the event for Dapr together
+        del subscription["_id"]
+        async with request.app.outbox.transaction() as tx:
+            await request.app.database["cluster"].update_one(
+                {"_id": id},
+                {"$set": {"kube_version": kube_version, "status": "Updating"}},
+                session=tx.session,
+            )
+            find_cluster = await request.app.database["cluster"].find_one(
+                {"_id": id}, session=tx.session
+            )
+            update_cluster = clusters_serializer(find_cluster)
             payload = {
                 "subscription": subscription,
                 "host_cluster_id": cluster["host_cluster_id"],
                 "host_cluster_name": host_data["name"],
                 "cluster": update_cluster,
             }
-            client.publish_event(
-                pubsub_name="messagebus",
-                topic_name="cluster-create",
-                data=json.dumps(payload),
-                data_content_type="application/json",
-            )
-            logging.info("Published data for cluster update: %s", payload)
+            tx.publish("cluster-create", payload, key=id)
+        logging.info("Queued data for cluster update: %s", payload)
         return generate_response(
             True, status.HTTP_200_OK, "Cluster updated successfully", update_cluster
         )
@@ -247,7 +260,7 @@ def update_cluster(
     response_description="Generate KubeConfig",
     status_code=status.HTTP_200_OK,
 )
-def generate_kube_config(
+async def generate_kube_config(
     request: Request, generateKubeconfig: GenerateKubeconfig = Body(...)
 ):
     """
@@ -273,7 +286,7 @@ def generate_kube_config(
         )
 
     clusterId = generateKubeconfig.clusterId
-    cluster = request.app.database["cluster"].find_one({"_id": clusterId})
+    cluster = await request.app.database["cluster"].find_one({"_id": clusterId})
     if cluster is None:
         return generate_response(
             False,
@@ -290,9 +303,7 @@ def generate_kube_config(
         "hostClusterId": hostClusterId,
         "expirationTime": expirationTime,
     }
-    baseUrl = os.getenv("SERVICE_URL")
-
-    response = requests.post(baseUrl + "/generate-config", json=payload)
+    response = await request.app.service_client.apost("/generate-config", json=payload)
     if response.status_code == 200:  # Check if the request was successful
         debug_response(response.json(), "Response from generate-config", "info")
         responseBody = response.json()
@@ -319,7 +330,7 @@ def generate_kube_config(
 
 
 @router.get("/{id}", response_description="Get a cluster by id", response_model={})
-def find_cluster(id: str, request: Request):
+async def find_cluster(id: str, request: Request):
     """
     Retrieve detailed information about a cluster by its ID.
 
@@ -327,7 +338,7 @@ def find_cluster(id: str, request: Request):
     and host cluster data.
     """
     try:
-        cluster = request.app.database["cluster"].find_one({"_id": id})
+        cluster = await request.app.database["cluster"].find_one({"_id": id})
         if cluster is None:
             return generate_response(
                 False,
@@ -336,13 +347,13 @@ def find_cluster(id: str, request: Request):
                 None,
             )
 
-        user = request.app.database["user"].find_one({"_id": cluster["user_id"]})
+        user = await request.app.database["user"].find_one({"_id": cluster["user_id"]})
         if user is None:
             return generate_response(
                 False, status.HTTP_404_NOT_FOUND, f"User with ID {id} not found", None
             )
 
-        subscription = request.app.database["subscription"].find_one(
+        subscription = await request.app.database["subscription"].find_one(
             {"_id": cluster["subscription_id"]}
         )
         if subscription is None:
@@ -353,7 +364,7 @@ def find_cluster(id: str, request: Request):
                 None,
             )
 
-        host_cluster = request.app.database["hostCluster"].find_one(
+        host_cluster = await request.app.database["hostCluster"].find_one(
             {"_id": cluster["host_cluster_id"]}
         )
         if host_cluster is None:
@@ -390,78 +401,55 @@ def find_cluster(id: str, request: Request):
         )
 
 
-def get_and_update_status_async(
-    clusters: List[ClusterResponse], request: Request, response_model: ResponseModel
-):
-    """
-    Fetch and update cluster status asynchronously.
-
-    Iterates over provided clusters, retrieves current status, and updates database.
-    Returns success or failure for the first cluster processed.
-    """
-    for cluster in clusters:
-        try:
-            status = get_status(cluster.name, cluster.hostCluster.id)
-            if status.status_code == 200:
-                print("STATUS :: ", status.json()["status"])
-                # Define the filter to identify the document you want to update
-                filter = {"_id": cluster.id}
-
-                # Define the update operation using $set to update a single field
-                update = {"$set": {"status": status.json()["status"]}}
-                request.app.database["cluster"].update_one(filter, update)
-                return generate_response(
-                    True, status.HTTP_200_OK, "Cluster status updated", []
-                )
-        except Exception as e:
-            debug_response(e, "Error occurs on fetching status of cluster", "error")
-            return generate_response(
-                False,
-                status.HTTP_500_INTERNAL_SERVER_ERROR,
-                "Failed to fetch status of cluster",
-                [],
-            )
-
-
 @router.get("", response_description="List all cluster", response_model={})
-def list_Clusters(request: Request):
+async def list_Clusters(
+    request: Request,
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+):
     """
-    List all clusters for the authenticated user.
+    List clusters for the authenticated user, newest first.
 
-    Returns basic cluster info along with subscription and host cluster data.
+    Returns basic cluster info along with subscription and host cluster data
+    from a single aggregation. Pass the returned `next_cursor` as `cursor`
+    to fetch the following page; it is null on the last page.
     """
     try:
         user_obj: User = request.state.user
-        print("USER_OBJ :: ", user_obj.id)
-        clusters = list(
-            request.app.database["cluster"].find({"user_id": user_obj.id}).limit(10)
-        )
-        print("Clusters :: ", clusters)
+        try:
+            pipeline = cluster_list_pipeline(user_obj.id, limit, cursor)
+        except ValueError as e:
+            return generate_response(False, status.HTTP_400_BAD_REQUEST, str(e), [])
+        clusters = (
+            await request.app.database["cluster"]
+            .aggregate(pipeline)
+            .to_list(length=None)
+        )
+        next_cursor = None
+        if len(clusters) > limit:
+            clusters = clusters[:limit]
+            next_cursor = encode_cluster_cursor(clusters[-1])
         responses = []
         for cluster in clusters:
-            host_cluster = request.app.database["hostCluster"].find_one(
-                {"_id": cluster["host_cluster_id"]}
-            )
-            subscription = request.app.database["subscription"].find_one(
-                {"_id": cluster["subscription_id"]}
+            if not cluster["hostCluster"] or not cluster["subscription"]:
+                continue
+            response = ClusterResponse(
+                id=cluster["_id"],
+                subscription=cluster["subscription"][0],
+                user=user_obj,
+                created=cluster["created"],
+                status=cluster["status"],
+                name=cluster["name"],
+                kube_version=cluster["kube_version"],
+                hostCluster=cluster["hostCluster"][0],
             )
-            if host_cluster is not None and subscription is not None:
-                response = ClusterResponse(
-                    id=cluster["_id"],
-                    subscription=subscription,
-                    user=user_obj,
-                    created=cluster["created"],
-                    status=cluster["status"],
-                    name=cluster["name"],
-                    kube_version=cluster["kube_version"],
-                    hostCluster=host_cluster,
-                )
-                responses.append(response)
+            responses.append(response)
         return {
             "success": True,
             "code": status.HTTP_200_OK,
             "message": "Clusters listed successfully",
             "data": responses,
+            "next_cursor": next_cursor,
         }
     except Exception as e:
         debug_response(e, "Error occurs on listing clusters", "error")
@@ -470,15 +458,107 @@ def list_Clusters(request: Request):
         )
 
 
+@router.post(
+    "/status:batch",
+    response_description="Get the status of several clusters",
+    status_code=status.HTTP_200_OK,
+    response_model=ResponseModel,
+)
+async def get_cluster_status_batch(
+    request: Request, body: ClusterStatusBatchRequest = Body(...)
+):
+    """
+    Retrieve the live status of several clusters of the authenticated user.
+
+    The clusters are resolved with one query, their status is fetched from
+    cluster-service concurrently, and changed statuses are written back with
+    one bulk write. Clusters whose live status could not be fetched keep
+    their stored status with `live` set to false.
+    """
+    try:
+        user_obj: User = request.state.user
+        ids = list(dict.fromkeys(body.ids))
+        clusters = (
+            await request.app.database["cluster"]
+            .find(
+                {"_id": {"$in": ids}, "user_id": user_obj.id},
+                {"name": 1, "host_cluster_id": 1, "status": 1},
+            )
+            .to_list(length=len(ids))
+        )
+
+        semaphore = asyncio.Semaphore(STATUS_BATCH_CONCURRENCY)
+
+        async def fetch_status(cluster):
+            async with semaphore:
+                try:
+                    response = await get_status(
+                        request.app.service_client,
+                        cluster["name"],
+                        cluster["host_cluster_id"],
+                    )
+                    if response.status_code == 200:
+                        return response.json().get("status")
+                except Exception as e:
+                    debug_response(
+                        e,
+                        f"Error occurs on fetching status of {cluster['_id']}",
+                        "error",
+                    )
+                return None
+
+        live_statuses = await asyncio.gather(*map(fetch_status, clusters))
+
+        statuses = {}
+        updates = []
+        for cluster, live_status in zip(clusters, live_statuses):
+            if live_status is None:
+                statuses[cluster["_id"]] = {"status": cluster["status"], "live": False}
+                continue
+            statuses[cluster["_id"]] = {"status": live_status, "live": True}
+            if live_status != cluster["status"]:
+                updates.append(
+                    UpdateOne(
+                        {"_id": cluster["_id"]},
+                        {
+                            "$set": {
+                                "status": live_status,
+                                "updated_at": datetime.utcnow(),
+                            }
+                        },
+                    )
+                )
+        if updates:
+            await request.app.database["cluster"].bulk_write(updates, ordered=False)
+
+        return generate_response(
+            True,
+            status.HTTP_200_OK,
+            "Cluster statuses retrieved",
+            {
+                "statuses": statuses,
+                "not_found": [id for id in ids if id not in statuses],
+            },
+        )
+    except Exception as e:
+        debug_response(e, "Error occurs on retrieving cluster statuses", "error")
+        return generate_response(
+            False,
+            status.HTTP_500_INTERNAL_SERVER_ERROR,
+            "Failed to retrieve cluster statuses",
+            None,
+        )
+
+
 @router.get(
     "/{id}/status",
     response_description="Get a cluster by id",
     response_model=ResponseModel,
 )
-def get_cluster_status(id: str, request: Request):
+async def get_cluster_status(id: str, request: Request):
     """Retrieve the status of a specific cluster by its ID."""
     try:
-        cluster = request.app.database["cluster"].find_one({"_id": id})
+        cluster = await request.app.database["cluster"].find_one({"_id": id})
         if cluster is None:
             return generate_response(
                 False,
@@ -487,13 +567,13 @@ def get_cluster_status(id: str, request: Request):
                 None,
             )
 
-        user = request.app.database["user"].find_one({"_id": cluster["user_id"]})
+        user = await request.app.database["user"].find_one({"_id": cluster["user_id"]})
         if user is None:
             return generate_response(
                 False, status.HTTP_404_NOT_FOUND, f"User with ID {id} not found", None
             )
 
-        host_cluster = request.app.database["hostCluster"].find_one(
+        host_cluster = await request.app.database["hostCluster"].find_one(
             {"_id": cluster["host_cluster_id"]}
         )
         if host_cluster is None:
@@ -504,7 +584,9 @@ def get_cluster_status(id: str, request: Request):
                 None,
             )
 
-        response = get_status(cluster["name"], host_cluster["_id"])
+        response = await get_status(
+            request.app.service_client, cluster["name"], host_cluster["_id"]
+        )
         if response.status_code == 200:
             return generate_response(
                 True, status.HTTP_200_OK, "Cluster status retrieved", response.json()
@@ -526,14 +608,15 @@ def get_cluster_status(id: str, request: Request):
         )
 
 
-def get_status(name: str, hostClusterId):
+async def get_status(service_client, name: str, hostClusterId):
     """Request cluster status from host cluster service."""
     payload = {
         "name": name,
         "hostClusterId": hostClusterId,
     }
-    baseUrl = os.getenv("SERVICE_URL")
-    return requests.post(baseUrl + "/host-cluster/cluster/status", json=payload)
+    return await service_client.apost(
+        "/host-cluster/cluster/status", json=payload, idempotent=True
+    )
 
 
 @router.patch(
@@ -542,14 +625,14 @@ def get_status(name: str, hostClusterId):
     status_code=status.HTTP_200_OK,
     response_model=ResponseModel,
 )
-def start_cluster(id: str, request: Request):
+async def start_cluster(id: str, request: Request):
     """
     Start a cluster by its ID.
 
-    Publishes a 'cluster-start' event via Dapr.
+    Queues a 'cluster-start' event for publishing via Dapr.
     """
     try:
-        cluster = request.app.database["cluster"].find_one({"_id": id})
+        cluster = await request.app.database["cluster"].find_one({"_id": id})
         if cluster is None:
             return generate_response(
                 False,
@@ -558,7 +641,7 @@ def start_cluster(id: str, request: Request):
                 None,
             )
 
-        host_cluster = request.app.database["hostCluster"].find_one(
+        host_cluster = await request.app.database["hostCluster"].find_one(
             {"_id": cluster["host_cluster_id"]}
         )
         if host_cluster is None:
@@ -569,19 +652,14 @@ def start_cluster(id: str, request: Request):
                 None,
             )
 
-        with DaprClient() as client:
-            payload = {
-                "host_cluster_id": host_cluster["_id"],
-                "cluster_name": cluster["name"],
-            }
-            client.publish_event(
-                pubsub_name="messagebus",
-                topic_name="cluster-start",
-                data=json.dumps(payload),
-                data_content_type="application/json",
-            )
-            logging.info("Published data: " + json.dumps(payload))
-            debug_response(payload, "Published data", "info")
+        payload = {
+            "host_cluster_id": host_cluster["_id"],
+            "cluster_name": cluster["name"],
+        }
+        async with request.app.outbox.transaction() as tx:
+            tx.publish("cluster-start", payload, key=id)
+        logging.info("Queued data: " + json.dumps(payload))
+        debug_response(payload, "Queued data", "info")
         return generate_response(
             True, status.HTTP_200_OK, "Sent command for starting cluster", None
         )
@@ -601,14 +679,14 @@ def start_cluster(id: str, request: Request):
     status_code=status.HTTP_200_OK,
     response_model=ResponseModel,
 )
-def stop_cluster(id: str, request: Request):
+async def stop_cluster(id: str, request: Request):
     """
     Stop a cluster by its ID.
 
-    Publishes a 'cluster-stop' event via Dapr.
+    Queues a 'cluster-stop' event for publishing via Dapr.
     """
     try:
-        cluster = request.app.database["cluster"].find_one({"_id": id})
+        cluster = await request.app.database["cluster"].find_one({"_id": id})
         if cluster is None:
             return generate_response(
                 False,
@@ -617,7 +695,7 @@ def stop_cluster(id: str, request: Request):
                 None,
             )
 
-        host_cluster = request.app.database["hostCluster"].find_one(
+        host_cluster = await request.app.database["hostCluster"].find_one(
             {"_id": cluster["host_cluster_id"]}
         )
         if host_cluster is None:
@@ -628,19 +706,14 @@ def stop_cluster(id: str, request: Request):
                 None,
             )
 
-        with DaprClient() as client:
-            payload = {
-                "host_cluster_id": host_cluster["_id"],
-                "cluster_name": cluster["name"],
-            }
-            client.publish_event(
-                pubsub_name="messagebus",
-                topic_name="cluster-stop",
-                data=json.dumps(payload),
-                data_content_type="application/json",
-            )
-            logging.info("Published data: " + json.dumps(payload))
-            debug_response(payload, "Published data", "info")
+        payload = {
+            "host_cluster_id": host_cluster["_id"],
+            "cluster_name": cluster["name"],
+        }
+        async with request.app.outbox.transaction() as tx:
+            tx.publish("cluster-stop", payload, key=id)
+        logging.info("Queued data: " + json.dumps(payload))
+        debug_response(payload, "Queued data", "info")
         return generate_response(
             True, status.HTTP_200_OK, "Sent command for stopping cluster", None
         )
@@ -657,14 +730,14 @@ def stop_cluster(id: str, request: Request):
     status_code=status.HTTP_202_ACCEPTED,
     response_model=ResponseModel,
 )
-def delete_cluster(id: str, request: Request, response: Response):
+async def delete_cluster(id: str, request: Request, response: Response):
     """
     Delete a cluster by its ID.
 
-    Publishes a 'cluster-delete' event via Dapr if deletion succeeds.
+    Queues a 'cluster-delete' event in the same transaction as the delete.
     """
     try:
-        cluster = request.app.database["cluster"].find_one({"_id": id})
+        cluster = await request.app.database["cluster"].find_one({"_id": id})
         if cluster is None:
             return generate_response(
                 False,
@@ -673,7 +746,7 @@ def delete_cluster(id: str, request: Request, response: Response):
                 None,
             )
 
-        host_cluster = request.app.database["hostCluster"].find_one(
+        host_cluster = await request.app.database["hostCluster"].find_one(
             {"_id": cluster["host_cluster_id"]}
         )
         if host_cluster is None:
@@ -684,34 +757,25 @@ def delete_cluster(id: str, request: Request, response: Response):
                 None,
             )
 
-        delete_result = request.app.database["cluster"].delete_one({"_id": id})
+        payload = {
+            "host_cluster_id": host_cluster["_id"],
+            "cluster_name": cluster["name"],
+        }
+        # The delete event is committed with the delete, so the vcluster is
+        # never orphaned by a failed publish
+        async with request.app.outbox.transaction() as tx:
+            delete_result = await request.app.database["cluster"].delete_one(
+                {"_id": id}, session=tx.session
+            )
+            if delete_result.deleted_count == 1:
+                tx.publish("cluster-delete", payload, key=id)
         if delete_result.deleted_count == 1:
-            try:
-                with DaprClient() as client:
-                    payload = {
-                        "host_cluster_id": host_cluster["_id"],
-                        "cluster_name": cluster["name"],
-                    }
-                    client.publish_event(
-                        pubsub_name="messagebus",
-                        topic_name="cluster-delete",
-                        data=json.dumps(payload),
-                        data_content_type="application/json",
-                    )
-                return generate_response(
-                    True,
-                    status.HTTP_202_ACCEPTED,
-                    f"Cluster with ID {id} deleted",
-                    None,
-                )
-            except Exception as e:
-                debug_response(e, "Error occurs on publishing delete event", "error")
-                return generate_response(
-                    False,
-                    status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    "Failed to publish delete event",
-                    None,
-                )
+            return generate_response(
+                True,
+                status.HTTP_202_ACCEPTED,
+                f"Cluster with ID {id} deleted",
+                None,
+            )
         return generate_response(
             False, status.HTTP_404_NOT_FOUND, f"Cluster with ID {id} not found", None
         )
@@ -29,7 +29,9 @@ router = APIRouter()
     status_code=status.HTTP_201_CREATED,
     response_model=ResponseModel,
 )
-def create_Cluster(request: Request, clusterRequest: HostClusterRequest = Body(...)):
+async def create_Cluster(
+    request: Request, clusterRequest: HostClusterRequest = Body(...)
+):
     """
     Create a new host cluster.
 
@@ -47,10 +49,10 @@ def create_Cluster(request: Request, clusterRequest: HostClusterRequest = Body(.
     try:
         user_obj: User = request.state.user
         host_cluster_obj = host_Cluster_from_dict(clusterRequest, user_obj.id)
-        new_cluster = request.app.database["hostCluster"].insert_one(
+        new_cluster = await request.app.database["hostCluster"].insert_one(
             jsonable_encoder(host_cluster_obj)
         )
-        created_cluster = request.app.database["hostCluster"].find_one(
+        created_cluster = await request.app.database["hostCluster"].find_one(
             {"_id": new_cluster.inserted_id}
         )
         return generate_response(
@@ -72,14 +74,18 @@ def create_Cluster(request: Request, clusterRequest: HostClusterRequest = Body(.
 @router.get(
     "/", response_description="List all host cluster", response_model=ResponseModel
 )
-def list_host_cluster(request: Request):
+async def list_host_cluster(request: Request):
     """
     Retrieve a list of all host clusters.
 
     Returns a list of up to 100 host clusters from the database.
     """
     try:
-        hostCluster = list(request.app.database["hostCluster"].find(limit=100))
+        hostCluster = (
+            await request.app.database["hostCluster"]
+            .find(limit=100)
+            .to_list(length=100)
+        )
         return generate_response(
             True, status.HTTP_200_OK, "List all host clusters", hostCluster
         )
@@ -98,14 +104,14 @@ def list_host_cluster(request: Request):
     response_description="Get a single host cluster by id",
     response_model=ResponseModel,
 )
-def find_host_cluster(id: str, request: Request):
+async def find_host_cluster(id: str, request: Request):
     """
     Retrieve a host cluster by its ID.
 
     Returns the host cluster data if found, otherwise a 404 error.
     """
     try:
-        host_cluster = request.app.database["hostCluster"].find_one({"_id": id})
+        host_cluster = await request.app.database["hostCluster"].find_one({"_id": id})
         if host_cluster is not None:
             return generate_response(
                 True, status.HTTP_200_OK, "Host cluster found", host_cluster
@@ -127,14 +133,16 @@ def find_host_cluster(id: str, request: Request):
 
 
 @router.delete("/{id}", response_description="Delete a host cluster")
-def delete_subscription(id: str, request: Request, response: ResponseModel):
+async def delete_subscription(id: str, request: Request, response: ResponseModel):
     """
     Delete a host cluster by its ID.
 
     Removes the cluster from the database and returns success or not found response.
     """
     try:
-        delete_result = request.app.database["hostCluster"].delete_one({"_id": id})
+        delete_result = await request.app.database["hostCluster"].delete_one(
+            {"_id": id}
+        )
         if delete_result.deleted_count == 1:
             return generate_response(
                 True,
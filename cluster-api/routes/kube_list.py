@@ -31,7 +31,7 @@ router = APIRouter()
     status_code=status.HTTP_201_CREATED,
     response_model=ResponseModel,
 )
-def create_kubeversion(
+async def create_kubeversion(
     request: Request, clusterRequest: KubeVersionRequest = Body(...)
 ):
     """
@@ -51,10 +51,10 @@ def create_kubeversion(
             uuid.uuid4()
         )  # Generate a UUID and use it as the _id
         debug_response(kubeversion_data)
-        new_kubeversion = request.app.database["kubeversion"].insert_one(
+        new_kubeversion = await request.app.database["kubeversion"].insert_one(
             kubeversion_data
         )
-        inserted_kubeversion = request.app.database["kubeversion"].find_one(
+        inserted_kubeversion = await request.app.database["kubeversion"].find_one(
             {"_id": new_kubeversion.inserted_id}
         )
         if inserted_kubeversion:
@@ -79,7 +79,7 @@ def create_kubeversion(
 @router.get(
     "/", response_description="List all kubeversion", response_model=ResponseModel
 )
-def list_kubeversions(request: Request):
+async def list_kubeversions(request: Request):
     """
     List all kubeversions stored in the database.
 
@@ -90,7 +90,11 @@ def list_kubeversions(request: Request):
         ResponseModel: List of kubeversions.
     """
     try:
-        kubeversions = list(request.app.database["kubeversion"].find(limit=100))
+        kubeversions = (
+            await request.app.database["kubeversion"]
+            .find(limit=100)
+            .to_list(length=100)
+        )
         for kubeversion in kubeversions:
             kubeversion["_id"] = str(kubeversion["_id"])
         return generate_response(
@@ -107,7 +111,7 @@ def list_kubeversions(request: Request):
 @router.put(
     "/{id}", response_description="Update kubeversion", response_model=ResponseModel
 )
-def update_kubeversion(
+async def update_kubeversion(
     id: str, request: Request, clusterRequest: KubeVersionRequest = Body(...)
 ):
     """
@@ -123,7 +127,7 @@ def update_kubeversion(
     """
     try:
         kubeversion_data = jsonable_encoder(clusterRequest)
-        update_result = request.app.database["kubeversion"].update_one(
+        update_result = await request.app.database["kubeversion"].update_one(
             {"_id": ObjectId(id)}, {"$set": kubeversion_data}
         )
         if update_result.matched_count == 0:
@@ -135,7 +139,7 @@ def update_kubeversion(
                 None,
             )
 
-        updated_kubeversion = request.app.database["kubeversion"].find_one(
+        updated_kubeversion = await request.app.database["kubeversion"].find_one(
             {"_id": ObjectId(id)}
         )
         if updated_kubeversion:
@@ -157,7 +161,7 @@ def update_kubeversion(
 @router.delete(
     "/{id}", response_description="Delete kubeversion", response_model=ResponseModel
 )
-def delete_kubeversion(id: str, request: Request, response: Response):
+async def delete_kubeversion(id: str, request: Request, response: Response):
     """
     Delete a kubeversion by ID.
 
@@ -170,7 +174,7 @@ def delete_kubeversion(id: str, request: Request, response: Response):
         ResponseModel: Success or failure response.
     """
     try:
-        delete_result = request.app.database["kubeversion"].delete_one(
+        delete_result = await request.app.database["kubeversion"].delete_one(
             {"_id": ObjectId(id)}
         )
         if delete_result.deleted_count == 1:
@@ -0,0 +1,33 @@
+"""
+Runtime Metrics API Routes.
+
+Exposes in-process counters of the shared clients, such as call counts and
+latency percentiles of requests to cluster-service and of websocket
+sends.
+"""
+
+from fastapi import APIRouter, Request, status
+from models.common_response import ResponseModel
+from routes.websocket import registry, send_metrics, status_coalescer
+from utills.common_response import generate_response
+
+router = APIRouter()
+
+
+@router.get("", response_description="Runtime metrics", response_model=ResponseModel)
+async def get_metrics(request: Request):
+    """Return call counts and latency percentiles of outbound calls and sends."""
+    return generate_response(
+        True,
+        status.HTTP_200_OK,
+        "Runtime metrics",
+        {
+            "service_client": request.app.service_client.metrics.snapshot(),
+            "websocket": send_metrics.snapshot(),
+            "websocket_connections": registry.counts(),
+            "status_coalescer": {
+                "received": status_coalescer.received,
+                "flushed": status_coalescer.flushed,
+            },
+        },
+    )
@@ -12,15 +12,12 @@ from typing import List
 
 from dto.cluster_status_request import ClusterStatusRequest
 from fastapi import APIRouter, Body, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.encoders import jsonable_encoder
 from keycloak import KeycloakOpenID
 from models.common_response import ResponseModel
 from models.subscription import Subscription
 from models.user import UserLogin
-from routes.websocket import (  # Import both functions
-    broadcast_message,
-    send_message_to_user,
-)
 from utills.common_response import debug_response, generate_response
 
 router = APIRouter()
@@ -31,10 +28,14 @@ router = APIRouter()
     response_description="List all subscriptions",
     response_model=ResponseModel,
 )
-def list_subscription(request: Request):
+async def list_subscription(request: Request):
     """Retrieve a list of subscriptions."""
     try:
-        subscriptions = list(request.app.database["subscription"].find(limit=100))
+        subscriptions = (
+            await request.app.database["subscription"]
+            .find(limit=100)
+            .to_list(length=100)
+        )
         res = generate_response(
             success=True,
             code=status.HTTP_200_OK,
@@ -81,7 +82,7 @@ async def update_cluster_status(
             )
 
         # Find cluster by ID
-        cluster = request.app.database["cluster"].find_one({"_id": data.id})
+        cluster = await request.app.database["cluster"].find_one({"_id": data.id})
         if cluster is None:
             return generate_response(
                 success=False,
@@ -93,7 +94,7 @@ async def update_cluster_status(
         # Update cluster status in database
         filter = {"_id": data.id}
         update = {"$set": {"status": data.status, "updated_at": datetime.utcnow()}}
-        update_result = request.app.database["cluster"].update_one(filter, update)
+        update_result = await request.app.database["cluster"].update_one(filter, update)
 
         if update_result.modified_count == 0:
             # No changes were made
@@ -122,8 +123,10 @@ async def update_cluster_status(
                 "timestamp": datetime.utcnow().isoformat(),
             }
 
-            # Send message to user
-            notification_sent = await send_message_to_user(user_id, message)
+            # Hand the message to the worker holding the user's connection
+            notification_sent = await request.app.notification_bus.publish(
+                {"user_id": user_id, "message": message}
+            )
             print(
                 f"WebSocket notification {'sent' if notification_sent else 'not sent'} to user {user_id}"
             )
@@ -156,7 +159,7 @@ async def update_cluster_status(
     status_code=status.HTTP_200_OK,
     response_model=ResponseModel,
 )
-def login(data: UserLogin = Body(...)):
+async def login(data: UserLogin = Body(...)):
     """Authenticate user via Keycloak and return token."""
     try:
         debug_response(data.dict(), "Received request body", "debug")
@@ -165,7 +168,9 @@ def login(data: UserLogin = Body(...)):
             realm_name=os.getenv("REALM_NAME"),
             client_id=os.getenv("CLIENT_ID"),
         )
-        token = keycloak_openid.token(data.userName, data.password)
+        token = await run_in_threadpool(
+            keycloak_openid.token, data.userName, data.password
+        )
         debug_response(token, "Received token", "debug")
         return generate_response(
             success=True,
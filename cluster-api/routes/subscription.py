@@ -22,12 +22,14 @@ router = APIRouter()
     status_code=status.HTTP_201_CREATED,
     response_model=ResponseModel,
 )
-def create_subscription(request: Request, subscription: Subscription = Body(...)):
+async def create_subscription(request: Request, subscription: Subscription = Body(...)):
     """Create a new subscription in the database."""
     try:
         subscription = jsonable_encoder(subscription)
-        new_subscription = request.app.database["subscription"].insert_one(subscription)
-        created_subscription = request.app.database["subscription"].find_one(
+        new_subscription = await request.app.database["subscription"].insert_one(
+            subscription
+        )
+        created_subscription = await request.app.database["subscription"].find_one(
             {"_id": new_subscription.inserted_id}
         )
         res = generate_response(
@@ -50,10 +52,14 @@ def create_subscription(request: Request, subscription: Subscription = Body(...)
 @router.get(
     "", response_description="List all subscriptions", response_model=ResponseModel
 )
-def list_subscription(request: Request):
+async def list_subscription(request: Request):
     """Retrieve a list of all subscriptions."""
     try:
-        subscriptions = list(request.app.database["subscription"].find(limit=100))
+        subscriptions = (
+            await request.app.database["subscription"]
+            .find(limit=100)
+            .to_list(length=100)
+        )
 
         res = generate_response(
             success=True,
@@ -78,10 +84,10 @@ def list_subscription(request: Request):
     response_description="Get a single subscription by id",
     response_model=ResponseModel,
 )
-def find_subscription(id: str, request: Request):
+async def find_subscription(id: str, request: Request):
     """Retrieve a subscription by its ID."""
     try:
-        subscription = request.app.database["subscription"].find_one({"_id": id})
+        subscription = await request.app.database["subscription"].find_one({"_id": id})
         if subscription is not None:
             return generate_response(
                 True, status.HTTP_200_OK, "Subscription found", subscription
@@ -105,10 +111,12 @@ def find_subscription(id: str, request: Request):
     status_code=status.HTTP_202_ACCEPTED,
     response_model=ResponseModel,
 )
-def delete_subscription(id: str, request: Request):
+async def delete_subscription(id: str, request: Request):
     """Delete a subscription by its ID."""
     try:
-        delete_result = request.app.database["subscription"].delete_one({"_id": id})
+        delete_result = await request.app.database["subscription"].delete_one(
+            {"_id": id}
+        )
         if delete_result.deleted_count == 1:
             return generate_response(
                 True,
@@ -10,9 +10,9 @@ from typing import List
 
 import requests
 from fastapi import APIRouter, Body, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.encoders import jsonable_encoder
 from keycloak import KeycloakAdmin, KeycloakOpenID
-from middleware.middleware import is_authenticated
 from models.common_response import ResponseModel
 from models.user import User, UserLogin
 from utills.common_response import debug_response, generate_response
@@ -36,10 +36,10 @@ keycloak_admin = KeycloakAdmin(
 
 
 @router.get("/", response_description="List all users", response_model=ResponseModel)
-def list_user(request: Request):
+async def list_user(request: Request):
     """Retrieve a list of all users from the database."""
     try:
-        users = list(request.app.database["user"].find(limit=100))
+        users = await request.app.database["user"].find(limit=100).to_list(length=100)
         return generate_response(True, status.HTTP_200_OK, "List of users", users)
     except Exception as e:
         debug_response(e, "Error occurs on listing users", "error")
@@ -54,17 +54,19 @@ def list_user(request: Request):
     status_code=status.HTTP_202_ACCEPTED,
     response_model=ResponseModel,
 )
-def subscription_check(request: Request):
+async def subscription_check(request: Request):
     """
     Check subscription status and Keycloak groups/roles
     for the authenticated user.
     """
     try:
-        authorization_header = request.headers.get("Authorization", "")
-        token = authorization_header.split("Bearer ")[1]
-        user_info = is_authenticated(token)
-        user_groups = keycloak_admin.get_user_groups(user_id=user_info["sub"])
-        user = request.app.database["user"].find_one({"email": user_info["email"]})
+        user_info = request.state.token_claims
+        user_groups = await run_in_threadpool(
+            keycloak_admin.get_user_groups, user_id=user_info["sub"]
+        )
+        user = await request.app.database["user"].find_one(
+            {"email": user_info["email"]}
+        )
         response = {
             "user_id": user["_id"],
             "username": user_info["name"],
@@ -87,10 +89,10 @@ def subscription_check(request: Request):
     response_description="Get a single user by id",
     response_model=ResponseModel,
 )
-def find_user(id: str, request: Request):
+async def find_user(id: str, request: Request):
     """Retrieve a single user by ID."""
     try:
-        user = request.app.database["user"].find_one({"_id": id})
+        user = await request.app.database["user"].find_one({"_id": id})
         if user is not None:
             return generate_response(True, status.HTTP_200_OK, "User found", [user])
         return generate_response(
@@ -106,7 +108,7 @@ def find_user(id: str, request: Request):
 @router.post(
     "/ping", response_description="verified_user", status_code=status.HTTP_202_ACCEPTED
 )
-def ping_user():
+async def ping_user():
     """Simple endpoint to verify service availability."""
     return generate_response(True, status.HTTP_202_ACCEPTED, "Ping successful", [])
 
@@ -117,12 +119,10 @@ def ping_user():
     status_code=status.HTTP_202_ACCEPTED,
     response_model=ResponseModel,
 )
-def token_verify(request: Request):
+async def token_verify(request: Request):
     """Verify JWT token and check if the user has 'create-cluster' role."""
     try:
-        authorization_header = request.headers.get("Authorization", "")
-        token = authorization_header.split("Bearer ")[1]
-        user_info = is_authenticated(token)
+        user_info = request.state.token_claims
         # checking create 'create-cluster' role is assign to the user.
         if user_info and "realm_access" in user_info:
             realm_roles = user_info["realm_access"]["roles"]
@@ -154,24 +154,27 @@ def token_verify(request: Request):
     status_code=status.HTTP_202_ACCEPTED,
     response_model=ResponseModel,
 )
-def subscription_request(request: Request):
+async def subscription_request(request: Request):
     """Request a subscription for the authenticated user."""
     try:
-        authorization_header = request.headers.get("Authorization", "")
-        token = authorization_header.split("Bearer ")[1]
-        user_info = is_authenticated(token)
+        user_info = request.state.token_claims
         user_id = user_info.get("sub")
         print("subscription_request :: ", user_id)
         status_code = None
         message = None
 
-        user_groups = keycloak_admin.get_user_groups(user_id=user_info["sub"])
+        user_groups = await run_in_threadpool(
+            keycloak_admin.get_user_groups, user_id=user_info["sub"]
+        )
 
         if not user_groups:  # If user_groups is empty
-            group_id = keycloak_admin.get_group_by_path(
-                path="/" + REQUEST_GROUP_NAME
-            ).get("id")
-            keycloak_admin.group_user_add(user_id=user_id, group_id=group_id)
+            group = await run_in_threadpool(
+                keycloak_admin.get_group_by_path, path="/" + REQUEST_GROUP_NAME
+            )
+            group_id = group.get("id")
+            await run_in_threadpool(
+                keycloak_admin.group_user_add, user_id=user_id, group_id=group_id
+            )
             status_code = status.HTTP_202_ACCEPTED
             message = "Subscription request sent successfully"
         elif any(group["name"] == REQUEST_GROUP_NAME for group in user_groups):
@@ -1,17 +1,23 @@
 """
 WebSocket Router for Cluster Status Updates.
 
-Manages active WebSocket connections, sending messages to single or multiple users,
-and broadcasting messages to all connected users with retry and logging support.
+Manages active WebSocket sessions, sending messages to single or multiple users,
+and broadcasting messages to all connected users. A user may hold several sessions
+at once; each session owns a bounded outbound queue drained by its own writer task,
+so senders never wait on a client.
 """
 
 import asyncio
 import json
 import logging
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, List
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
+from utills.connection_registry import ConnectionRegistry, Session
+from utills.connection_writer import ConnectionWriter
+from utills.service_client import LatencyMetrics
+from utills.status_coalescer import StatusCoalescer
 
 # Configure logging
 logging.basicConfig(
@@ -21,148 +27,261 @@ logger = logging.getLogger("websocket")
 
 router = APIRouter()
 
-# Dictionary to manage active WebSocket connections with last activity timestamp
-active_connections: Dict[str, Dict[str, any]] = {}
+# Open sessions indexed by user, session ID and subscribed cluster
+registry = ConnectionRegistry()
 
+# Delivery latency of websocket sends, reported by /v1/metrics
+send_metrics = LatencyMetrics()
 
-# Function to send a message to a specific user with retry
-async def send_message_to_user(user_id: str, message: dict, retries: int = 2) -> bool:
-    """Send a message to a specific user with automatic retries.
+
+def _enqueue(sessions: List[Session], message: dict) -> int:
+    """Serialize `message` once and queue it on `sessions`."""
+    text = json.dumps(message)
+    cluster_id = message.get("cluster_id")
+    for session in sessions:
+        session.writer.enqueue(text, cluster_id)
+    return len(sessions)
+
+
+def _sessions_for(user_id: str, cluster_id=None) -> List[Session]:
+    """Return the sessions of `user_id` that want a message about `cluster_id`."""
+    if cluster_id:
+        return registry.for_cluster(user_id, cluster_id)
+    return registry.for_user(user_id)
+
+
+async def _evict(session: Session):
+    """Drop a dead session and close its socket."""
+    registry.remove(session.session_id)
+    await session.writer.stop()
+    try:
+        await session.websocket.close()
+    except Exception:
+        pass
+
+
+# Function to send a message to a specific user
+async def send_message_to_user(user_id: str, message: dict) -> bool:
+    """Queue a message on the sessions of a specific user.
+
+    Messages about a cluster reach only the sessions that want that
+    cluster. The message is written by each session's writer task; this
+    call returns without waiting for it.
 
     Args:
         user_id: The user ID to send the message to
         message: The message payload as a dictionary
-        retries: Number of retry attempts if sending fails
 
     Returns:
-        bool: True if message was sent successfully, False otherwise
+        bool: True if the message was queued on at least one session
     """
     if not user_id:
         logger.warning(f"Cannot send message - user_id is empty")
         return False
 
-    if user_id not in active_connections:
+    if not _enqueue(_sessions_for(user_id, message.get("cluster_id")), message):
         logger.info(f"User {user_id} not connected, message not sent: {message}")
         return False
+    return True
 
-    for attempt in range(retries + 1):
-        try:
-            websocket = active_connections[user_id]["connection"]
-            await websocket.send_json(message)
-
-            # Update last activity timestamp
-            active_connections[user_id]["last_active"] = datetime.now()
-
-            logger.info(f"Successfully sent message to user {user_id}")
-            return True
-        except Exception as e:
-            if attempt < retries:
-                logger.warning(
-                    f"Attempt {attempt + 1} failed to send message to {user_id}: {str(e)}. Retrying..."
-                )
-                await asyncio.sleep(0.5)  # Wait before retry
-            else:
-                logger.error(
-                    f"Failed to send message to {user_id} after {retries + 1} attempts: {str(e)}"
-                )
-                # Remove dead connection
-                active_connections.pop(user_id, None)
-                return False
-
-    return False
+
+def _flush_statuses(user_id: str, messages: list):
+    """Send the statuses coalesced in one window, batched if more than one.
+
+    A session gets a single `cluster_status_updated` frame when only one of
+    its clusters changed, and otherwise one `cluster_status_batch` frame
+    whose `updates` are `cluster_status_updated` messages.
+    """
+    sessions = {}
+    updates = {}
+    for message in messages:
+        for session in registry.for_cluster(user_id, message["cluster_id"]):
+            sessions[session.session_id] = session
+            updates.setdefault(session.session_id, []).append(message)
+    for session_id, session_updates in updates.items():
+        if len(session_updates) == 1:
+            _enqueue([sessions[session_id]], session_updates[0])
+        else:
+            frame = {
+                "event": "cluster_status_batch",
+                "updates": session_updates,
+                "timestamp": datetime.utcnow().isoformat(),
+            }
+            _enqueue([sessions[session_id]], frame)
+
+
+# Latest cluster status per (user, cluster), flushed once per window
+status_coalescer = StatusCoalescer(flush=_flush_statuses)
+
+
+async def deliver_notification(notification: dict) -> bool:
+    """Deliver a notification received from the notification bus.
+
+    The notification carries the target `user_id` and the `message`; users
+    connected to another worker are skipped, since that worker delivers to
+    them.
+
+    Cluster status updates go through the coalescing window, so a burst
+    for one cluster reaches the client as its latest status only.
+
+    Args:
+        notification: Dictionary with `user_id` and `message` keys
+
+    Returns:
+        bool: True if the user is connected here and the message was queued
+    """
+    user_id = notification.get("user_id")
+    if user_id not in registry:
+        return False
+    message = notification["message"]
+    if message.get("event") == "cluster_status_updated" and message.get("cluster_id"):
+        status_coalescer.add(user_id, message["cluster_id"], message)
+        return True
+    return await send_message_to_user(user_id, message)
 
 
 # Send message to multiple users efficiently
 async def broadcast_to_users(user_ids: list, message: dict) -> Dict[str, bool]:
-    """Send a message to multiple users efficiently.
+    """Queue a message for multiple users, serializing it once.
 
     Args:
         user_ids: List of user IDs to send the message to
         message: The message payload as a dictionary
 
     Returns:
-        dict: Dictionary of user_id to success/failure status
+        dict: Dictionary of user_id to whether the message was queued
     """
-    if not user_ids:
-        return {}
-
-    # Create tasks for all users
-    tasks = {
-        user_id: asyncio.create_task(send_message_to_user(user_id, message))
-        for user_id in user_ids
-        if user_id
-    }
-
-    # Wait for all tasks to complete
+    text = json.dumps(message)
+    cluster_id = message.get("cluster_id")
     results = {}
-    for user_id, task in tasks.items():
-        try:
-            results[user_id] = await task
-        except Exception as e:
-            logger.error(f"Error in broadcast to {user_id}: {str(e)}")
-            results[user_id] = False
-
+    for user_id in user_ids:
+        if not user_id:
+            continue
+        sessions = _sessions_for(user_id, cluster_id)
+        for session in sessions:
+            session.writer.enqueue(text, cluster_id)
+        results[user_id] = bool(sessions)
     return results
 
 
 # Function to broadcast a message to all connected users
 async def broadcast_message(message: dict) -> int:
-    """Broadcast a message to all connected users.
+    """Broadcast a message to every open session.
+
+    The message is serialized once and queued on every session. Each
+    writer sends it within WS_SEND_TIMEOUT or evicts its session, so one
+    slow client cannot hold up the others.
 
     Args:
         message: The message payload as a dictionary
 
     Returns:
-        int: Number of successful deliveries
+        int: Number of sessions the message was queued on
     """
-    success_count = 0
-    failed_connections = []
+    # Snapshot the sessions, writers may evict while we iterate
+    return _enqueue(registry.all(), message)
+
 
-    for user_id, conn_info in active_connections.items():
+async def close_all_sessions(timeout: float = 2.0):
+    """Deliver the open status windows, then close every session.
+
+    Called on shutdown so the statuses buffered in the last coalescing
+    window still reach the clients.
+    """
+    status_coalescer.flush_all()
+    sessions = registry.all()
+    await asyncio.gather(*(s.writer.drain(timeout) for s in sessions))
+    for session in sessions:
+        await _close_session(session)
         try:
-            await conn_info["connection"].send_json(message)
-            active_connections[user_id]["last_active"] = datetime.now()
-            success_count += 1
-        except Exception as e:
-            logger.error(f"Failed to broadcast to {user_id}: {str(e)}")
-            failed_connections.append(user_id)
+            await session.websocket.close(code=status.WS_1001_GOING_AWAY)
+        except Exception:
+            pass
+
+
+def _open_session(user_id: str, websocket: WebSocket) -> Session:
+    """Register a new session of `user_id` and start its writer task."""
+    session = Session(user_id, websocket)
+
+    def on_sent():
+        session.last_active = datetime.now()
+
+    async def on_failed(error):
+        logger.error(
+            f"Failed to send to {user_id} session {session.session_id}, "
+            f"closing it: {error!r}"
+        )
+        await _evict(session)
 
-    # Clean up failed connections
-    for user_id in failed_connections:
-        active_connections.pop(user_id, None)
+    session.writer = ConnectionWriter(
+        websocket, metrics=send_metrics, on_sent=on_sent, on_failed=on_failed
+    )
+    registry.add(session)
+    session.writer.start()
+    return session
 
-    return success_count
+
+async def _close_session(session: Session):
+    """Unregister a session and stop its writer."""
+    registry.remove(session.session_id)
+    await session.writer.stop()
+
+
+def _handle_subscription(session: Session, data) -> bool:
+    """Apply a subscribe/unsubscribe request; return True if it was one."""
+    if not isinstance(data, dict) or data.get("action") not in (
+        "subscribe",
+        "unsubscribe",
+    ):
+        return False
+    cluster_ids = [str(c) for c in data.get("cluster_ids") or []]
+    if data["action"] == "subscribe":
+        registry.subscribe(session.session_id, cluster_ids)
+    else:
+        registry.unsubscribe(session.session_id, cluster_ids)
+    response = {
+        "event": f"{data['action']}d",
+        "session_id": session.session_id,
+        "cluster_ids": sorted(session.clusters),
+        "timestamp": datetime.now().isoformat(),
+    }
+    session.writer.enqueue(json.dumps(response))
+    return True
 
 
 @router.websocket("/{user_id}")
 async def websocket_endpoint(websocket: WebSocket, user_id: str):
-    """WebSocket endpoint handler for user connections."""
+    """WebSocket endpoint handler for user connections.
+
+    Each connection is its own session, so several tabs of one user all
+    receive updates. Send `{"action": "subscribe", "cluster_ids": [...]}`
+    to receive updates of those clusters only, and `"unsubscribe"` to drop
+    them; a session without subscriptions receives every update of its user.
+    """
     if not user_id:
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
         return
 
     # Accept the connection
     await websocket.accept()
-    logger.info(f"WebSocket connection established for user: {user_id}")
 
-    # Store connection with timestamp
-    active_connections[user_id] = {
-        "connection": websocket,
-        "last_active": datetime.now(),
-    }
+    # Register the session with its writer
+    session = _open_session(user_id, websocket)
+    logger.info(
+        f"WebSocket connection established for user: {user_id} "
+        f"session: {session.session_id}"
+    )
 
     # Send initial connection confirmation
-    try:
-        welcome_message = {
-            "event": "connection_established",
-            "user_id": user_id,
-            "message": "Connected to cluster status updates",
-            "timestamp": datetime.now().isoformat(),
-            "connection_count": len(active_connections),
-        }
-        await websocket.send_json(welcome_message)
-    except Exception as e:
-        logger.error(f"Error sending initial message: {str(e)}")
+    welcome_message = {
+        "event": "connection_established",
+        "user_id": user_id,
+        "session_id": session.session_id,
+        "message": "Connected to cluster status updates",
+        "timestamp": datetime.now().isoformat(),
+        "connection_count": len(registry),
+    }
+    session.writer.enqueue(json.dumps(welcome_message))
 
     # Handle incoming messages
     try:
@@ -172,7 +291,10 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str):
             logger.info(f"Received data from {user_id}: {data}")
 
             # Update activity timestamp
-            active_connections[user_id]["last_active"] = datetime.now()
+            session.last_active = datetime.now()
+
+            if _handle_subscription(session, data):
+                continue
 
             # Send acknowledgment
             response = {
@@ -182,15 +304,15 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str):
                 "timestamp": datetime.now().isoformat(),
                 "data_received": data,
             }
-            await websocket.send_json(response)
+            session.writer.enqueue(json.dumps(response))
 
     except WebSocketDisconnect:
         logger.info(f"WebSocket disconnected for user: {user_id}")
-        active_connections.pop(user_id, None)
+        await _close_session(session)
     except json.JSONDecodeError:
         logger.error(f"Invalid JSON received from {user_id}")
-        active_connections.pop(user_id, None)
+        await _close_session(session)
         await websocket.close(code=status.WS_1003_UNSUPPORTED_DATA)
     except Exception as e:
         logger.error(f"WebSocket error for user {user_id}: {str(e)}")
-        active_connections.pop(user_id, None)
+        await _close_session(session)
@@ -4,6 +4,8 @@ Utility functions for cluster operations.
 
 Includes serializers and validators for cluster data.
 """
+import base64
+import binascii
 import json
 import re
 from email.quoprimime import unquote
@@ -50,3 +52,102 @@ def is_valid_url_name(name):
         )
 
     return True, None
+
+
+HOST_CLUSTER_FIELDS = (
+    "_id",
+    "name",
+    "region",
+    "provider",
+    "nodes",
+    "active",
+    "version",
+    "user_id",
+    "created",
+    "updated",
+)
+SUBSCRIPTION_FIELDS = (
+    "_id",
+    "name",
+    "pods",
+    "service",
+    "config_map",
+    "persistance_vol_claims",
+    "replication_ctl",
+    "secrets",
+    "loadbalancer",
+    "node_port",
+    "created",
+    "updated",
+)
+
+
+def encode_cluster_cursor(cluster):
+    """Encode the (created, _id) sort key of a cluster as an opaque cursor."""
+    key = json.dumps([cluster["created"], cluster["_id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+
+def decode_cluster_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cluster_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        created, cluster_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(created, str) or not isinstance(cluster_id, str):
+        raise ValueError("Invalid cursor")
+    return created, cluster_id
+
+
+def cluster_list_pipeline(user_id, limit, cursor=None):
+    """
+    Build the aggregation that lists a page of a user's clusters.
+
+    Clusters are ordered newest first on (created, _id), which the
+    (user_id, created, _id) index serves without an in-memory sort. Host
+    cluster and subscription are joined with $lookup so a page costs a single
+    round-trip. One extra cluster is fetched to tell whether a next page
+    exists.
+    """
+    match = {"user_id": user_id}
+    if cursor is not None:
+        created, cluster_id = decode_cluster_cursor(cursor)
+        match["$or"] = [
+            {"created": {"$lt": created}},
+            {"created": created, "_id": {"$lt": cluster_id}},
+        ]
+    projection = {
+        "name": 1,
+        "status": 1,
+        "created": 1,
+        "kube_version": 1,
+    }
+    projection.update({f"hostCluster.{field}": 1 for field in HOST_CLUSTER_FIELDS})
+    projection.update({f"subscription.{field}": 1 for field in SUBSCRIPTION_FIELDS})
+    return [
+        {"$match": match},
+        {"$sort": {"created": -1, "_id": -1}},
+        {"$limit": limit + 1},
+        {
+            "$lookup": {
+                "from": "hostCluster",
+                "localField": "host_cluster_id",
+                "foreignField": "_id",
+                "as": "hostCluster",
+            }
+        },
+        {
+            "$lookup": {
+                "from": "subscription",
+                "localField": "subscription_id",
+                "foreignField": "_id",
+                "as": "subscription",
+            }
+        },
+        {"$project": projection},
+    ]
@@ -0,0 +1,208 @@
+"""Unit tests for the cluster routes."""
+import asyncio
+import json
+import unittest
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from unittest import mock
+
+from dto.cluster_request import ClusterRequest
+from dto.cluster_status_batch_request import ClusterStatusBatchRequest
+from fastapi import HTTPException, status
+from models.user import User
+from pymongo.errors import DuplicateKeyError
+from routes import cluster
+
+HOST_CLUSTER = {
+    "_id": "host-1",
+    "name": "host-one",
+    "region": "us-east-1",
+    "provider": "aws",
+    "nodes": 3,
+    "active": True,
+    "version": "v1.30.0",
+    "created": "2024-01-01T00:00:00",
+    "updated": "2024-01-01T00:00:00",
+    "user_id": "admin",
+}
+
+
+class FakeCursor:
+    """Cursor returning a fixed list."""
+
+    def __init__(self, documents):
+        """Return `documents` from to_list."""
+        self.documents = documents
+
+    async def to_list(self, length=None):
+        """Return the documents."""
+        return self.documents
+
+
+class FakeOutbox:
+    """Outbox whose transaction only yields a recorder."""
+
+    @asynccontextmanager
+    async def transaction(self):
+        """Yield a transaction without a session."""
+        yield SimpleNamespace(session=None, publish=mock.Mock())
+
+
+class TestCreateCluster(unittest.TestCase):
+    """Tests for POST /v1/clusters."""
+
+    def make_request(self, insert_one):
+        """Return a request whose cluster insert runs `insert_one`."""
+        collections = {
+            "cluster": mock.Mock(
+                find_one=mock.AsyncMock(return_value=None), insert_one=insert_one
+            ),
+            "subscription": mock.Mock(
+                find_one=mock.AsyncMock(return_value={"_id": "sub-1"})
+            ),
+            "hostCluster": mock.Mock(
+                find=mock.Mock(return_value=FakeCursor([HOST_CLUSTER]))
+            ),
+        }
+        app = SimpleNamespace(
+            database=collections, outbox=FakeOutbox(), service_client=None
+        )
+        user = User(_id="user-1", name="One", email="one@example.com", userName="one")
+        state = SimpleNamespace(
+            token_claims={"realm_access": {"roles": ["create-cluster"]}}, user=user
+        )
+        return SimpleNamespace(app=app, state=state)
+
+    def create(self, request):
+        """Call the route with a valid payload."""
+        body = ClusterRequest(name="demo", subscription_id="sub-1", region="us-east-1")
+        with mock.patch.object(
+            cluster, "get_best_cluster", mock.AsyncMock(return_value="host-1")
+        ):
+            return asyncio.run(cluster.create_Cluster(request, body))
+
+    def test_concurrent_duplicate_name_is_a_conflict(self):
+        """Losing the unique index race answers 409, like the name check."""
+        insert_one = mock.AsyncMock(side_effect=DuplicateKeyError("E11000"))
+
+        with self.assertRaises(HTTPException) as raised:
+            self.create(self.make_request(insert_one))
+
+        self.assertEqual(raised.exception.status_code, status.HTTP_409_CONFLICT)
+        self.assertIn("already exist", raised.exception.detail)
+
+    def test_other_database_errors_are_server_errors(self):
+        """Unexpected failures still answer 500."""
+        insert_one = mock.AsyncMock(side_effect=RuntimeError("down"))
+
+        response = self.create(self.make_request(insert_one))
+
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class TestClusterStatusBatch(unittest.TestCase):
+    """Tests for POST /v1/clusters/status:batch."""
+
+    STORED = [
+        {"_id": "c1", "name": "one", "host_cluster_id": "host-1", "status": "Pending"},
+        {"_id": "c2", "name": "two", "host_cluster_id": "host-1", "status": "Running"},
+        {
+            "_id": "c3",
+            "name": "three",
+            "host_cluster_id": "host-2",
+            "status": "Pending",
+        },
+    ]
+    LIVE = {"one": "Running", "two": "Running", "three": "Pending"}
+
+    def setUp(self):
+        """Serve the stored clusters and answer status calls from LIVE."""
+        self.collection = mock.Mock(
+            find=mock.Mock(return_value=FakeCursor(self.STORED)),
+            bulk_write=mock.AsyncMock(),
+        )
+        self.failing = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+        async def get_status(service_client, name, host_cluster_id):
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            await asyncio.sleep(0.01)
+            self.in_flight -= 1
+            if name in self.failing:
+                raise ConnectionError("cluster-service unreachable")
+            return mock.Mock(
+                status_code=200,
+                json=mock.Mock(return_value={"status": self.LIVE[name]}),
+            )
+
+        patchers = [
+            mock.patch.object(cluster, "get_status", get_status),
+            mock.patch.object(cluster, "STATUS_BATCH_CONCURRENCY", 2),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def request_statuses(self, ids):
+        """Call the route for `ids` and return the response data."""
+        user = User(_id="user-1", name="One", email="one@example.com", userName="one")
+        request = SimpleNamespace(
+            app=SimpleNamespace(
+                database={"cluster": self.collection}, service_client=None
+            ),
+            state=SimpleNamespace(user=user),
+        )
+        body = ClusterStatusBatchRequest(ids=ids)
+        response = asyncio.run(cluster.get_cluster_status_batch(request, body))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return json.loads(response.body)["data"]
+
+    def test_resolves_clusters_with_one_query_scoped_to_user(self):
+        """Duplicate ids are collapsed into a single $in query for the user."""
+        data = self.request_statuses(["c1", "c2", "c1", "c3", "missing"])
+
+        self.collection.find.assert_called_once()
+        query = self.collection.find.call_args.args[0]
+        self.assertEqual(
+            query, {"_id": {"$in": ["c1", "c2", "c3", "missing"]}, "user_id": "user-1"}
+        )
+        self.assertEqual(data["not_found"], ["missing"])
+
+    def test_status_calls_are_bounded_by_the_semaphore(self):
+        """No more than STATUS_BATCH_CONCURRENCY calls run at once."""
+        self.request_statuses(["c1", "c2", "c3"])
+
+        self.assertEqual(self.max_in_flight, 2)
+
+    def test_writes_only_changed_statuses_in_one_bulk_write(self):
+        """Unchanged statuses are not written back."""
+        data = self.request_statuses(["c1", "c2", "c3"])
+
+        self.collection.bulk_write.assert_awaited_once()
+        updates = self.collection.bulk_write.call_args.args[0]
+        self.assertEqual([update._filter for update in updates], [{"_id": "c1"}])
+        self.assertEqual(updates[0]._doc["$set"]["status"], "Running")
+        self.assertEqual(
+            data["statuses"],
+            {
+                "c1": {"status": "Running", "live": True},
+                "c2": {"status": "Running", "live": True},
+                "c3": {"status": "Pending", "live": True},
+            },
+        )
+
+    def test_partial_upstream_failure_keeps_stored_status(self):
+        """Clusters whose status call fails report their stored status."""
+        self.failing = {"one"}
+
+        data = self.request_statuses(["c1", "c2", "c3"])
+
+        self.assertEqual(data["statuses"]["c1"], {"status": "Pending", "live": False})
+        self.assertEqual(data["statuses"]["c3"], {"status": "Pending", "live": True})
+        self.collection.bulk_write.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+"""Unit tests for cluster list cursors and the list pipeline."""
+import asyncio
+import base64
+import unittest
+from types import SimpleNamespace
+
+from fastapi import status
+from models.user import User
+from routes import cluster
+from schemas.cluster_schema import (
+    cluster_list_pipeline,
+    decode_cluster_cursor,
+    encode_cluster_cursor,
+)
+
+CREATED = "2024-01-01T00:00:00"
+
+
+def matches(document, condition):
+    """Evaluate the subset of a $match filter used by the list pipeline."""
+    for field, expected in condition.items():
+        if field == "$or":
+            if not any(matches(document, branch) for branch in expected):
+                return False
+        elif isinstance(expected, dict):
+            if not document[field] < expected["$lt"]:
+                return False
+        elif document[field] != expected:
+            return False
+    return True
+
+
+def run_page(documents, user_id, limit, cursor=None):
+    """Apply the $match, $sort and $limit stages of the pipeline in memory."""
+    match, sort, page_limit = cluster_list_pipeline(user_id, limit, cursor)[:3]
+    selected = [doc for doc in documents if matches(doc, match["$match"])]
+    for field, direction in reversed(list(sort["$sort"].items())):
+        selected.sort(key=lambda doc: doc[field], reverse=direction < 0)
+    return selected[: page_limit["$limit"]]
+
+
+def list_all(documents, user_id, limit):
+    """Page through every cluster of `user_id` the way the route does."""
+    seen = []
+    cursor = None
+    while True:
+        page = run_page(documents, user_id, limit, cursor)
+        seen.extend(doc["_id"] for doc in page[:limit])
+        if len(page) <= limit:
+            return seen
+        cursor = encode_cluster_cursor(page[limit - 1])
+
+
+class TestClusterCursor(unittest.TestCase):
+    """Tests for encoding and decoding list cursors."""
+
+    def test_round_trip(self):
+        """A cursor decodes to the sort key it was made from."""
+        cursor = encode_cluster_cursor({"created": CREATED, "_id": "c-1"})
+        self.assertEqual(decode_cluster_cursor(cursor), (CREATED, "c-1"))
+
+    def test_malformed_cursors_are_rejected(self):
+        """Garbage, non-JSON and wrongly shaped cursors raise ValueError."""
+        for cursor in (
+            "not base64!",
+            base64.urlsafe_b64encode(b"not json").decode(),
+            base64.urlsafe_b64encode(b'{"created": 1}').decode(),
+            base64.urlsafe_b64encode(b"[1, 2]").decode(),
+            base64.urlsafe_b64encode(b'["a", "b", "c"]').decode(),
+        ):
+            with self.subTest(cursor=cursor), self.assertRaises(ValueError):
+                decode_cluster_cursor(cursor)
+
+    def test_malformed_cursor_is_a_bad_request(self):
+        """The list route answers 400, not 500, for a bad cursor."""
+        user = User(_id="user-1", name="One", email="one@example.com", userName="one")
+        request = SimpleNamespace(state=SimpleNamespace(user=user), app=None)
+
+        response = asyncio.run(cluster.list_Clusters(request, 10, "garbage"))
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TestClusterListPipeline(unittest.TestCase):
+    """Tests for paging through the list pipeline."""
+
+    def setUp(self):
+        """Create clusters of two users, several sharing a created time."""
+        self.documents = [
+            {"_id": f"c-{i}", "user_id": "user-1", "created": CREATED} for i in range(5)
+        ]
+        self.documents += [
+            {"_id": "c-5", "user_id": "user-1", "created": "2024-01-02T00:00:00"},
+            {"_id": "c-6", "user_id": "user-1", "created": "2023-12-31T00:00:00"},
+            {"_id": "c-7", "user_id": "user-2", "created": CREATED},
+        ]
+
+    def test_first_page_fetches_one_extra(self):
+        """One extra cluster is read to detect the next page."""
+        page = run_page(self.documents, "user-1", 2)
+        self.assertEqual([doc["_id"] for doc in page], ["c-5", "c-4", "c-3"])
+
+    def test_ties_on_created_page_in_stable_order(self):
+        """Every cluster appears exactly once, ties ordered by _id."""
+        for limit in (1, 2, 3, 10):
+            with self.subTest(limit=limit):
+                self.assertEqual(
+                    list_all(self.documents, "user-1", limit),
+                    ["c-5", "c-4", "c-3", "c-2", "c-1", "c-0", "c-6"],
+                )
+
+    def test_pipeline_is_scoped_to_the_user(self):
+        """Other users' clusters never appear."""
+        self.assertNotIn("c-7", list_all(self.documents, "user-1", 3))
+        self.assertEqual(list_all(self.documents, "user-2", 3), ["c-7"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,279 @@
+"""Unit tests for the websocket session registry and its writers."""
+import asyncio
+import json
+import unittest
+from unittest import mock
+
+from routes import websocket
+from utills.connection_registry import ConnectionRegistry, Session
+from utills.connection_writer import ConnectionWriter
+from utills.status_coalescer import StatusCoalescer
+
+
+class FakeWebSocket:
+    """Websocket that records the frames sent to it."""
+
+    def __init__(self):
+        """Start with no frames."""
+        self.sent = []
+        self.closed = False
+
+    async def send_text(self, text):
+        """Record one frame."""
+        self.sent.append(json.loads(text))
+
+    async def close(self, code=1000):
+        """Mark the socket closed."""
+        self.closed = True
+
+
+class TestConnectionRegistry(unittest.TestCase):
+    """Tests for registering several sessions per user."""
+
+    def setUp(self):
+        """Create a registry holding two sessions of one user."""
+        self.registry = ConnectionRegistry()
+        self.tab1 = Session("u1", FakeWebSocket(), session_id="tab1")
+        self.tab2 = Session("u1", FakeWebSocket(), session_id="tab2")
+        self.registry.add(self.tab1)
+        self.registry.add(self.tab2)
+
+    def test_user_keeps_every_session(self):
+        """A second session does not replace the first."""
+        self.assertEqual(len(self.registry), 2)
+        self.assertIn("u1", self.registry)
+        self.assertEqual(
+            {s.session_id for s in self.registry.for_user("u1")}, {"tab1", "tab2"}
+        )
+
+    def test_removing_one_session_keeps_the_other(self):
+        """The user stays connected until the last session goes."""
+        self.assertIs(self.registry.remove("tab1"), self.tab1)
+        self.assertIn("u1", self.registry)
+        self.assertEqual(self.registry.for_user("u1"), [self.tab2])
+
+        self.registry.remove("tab2")
+        self.assertNotIn("u1", self.registry)
+        self.assertEqual(
+            self.registry.counts(),
+            {"users": 0, "sessions": 0, "subscribed_clusters": 0},
+        )
+
+    def test_removing_unknown_session_is_a_no_op(self):
+        """Removing twice returns None the second time."""
+        self.registry.remove("tab1")
+        self.assertIsNone(self.registry.remove("tab1"))
+        self.assertEqual(len(self.registry), 1)
+
+    def test_subscriptions_filter_cluster_updates(self):
+        """Subscribed sessions get their clusters only; others get everything."""
+        self.registry.subscribe("tab1", ["c1"])
+        self.assertEqual(self.registry.for_cluster("u1", "c1"), [self.tab2, self.tab1])
+        self.assertEqual(self.registry.for_cluster("u1", "c2"), [self.tab2])
+
+        self.registry.unsubscribe("tab1", ["c1"])
+        self.assertEqual(
+            {s.session_id for s in self.registry.for_cluster("u1", "c2")},
+            {"tab1", "tab2"},
+        )
+        self.assertEqual(self.registry.counts()["subscribed_clusters"], 0)
+
+    def test_cluster_index_is_per_user(self):
+        """Another user's subscription to the same cluster is not returned."""
+        other = Session("u2", FakeWebSocket(), session_id="other")
+        self.registry.add(other)
+        self.registry.subscribe("other", ["c1"])
+        self.assertNotIn(other, self.registry.for_cluster("u1", "c1"))
+        self.assertEqual(self.registry.for_cluster("u2", "c1"), [other])
+
+
+class TestFanOut(unittest.TestCase):
+    """Tests for delivering to every session of a user."""
+
+    def setUp(self):
+        """Start each test with an empty module registry."""
+        self.addCleanup(setattr, websocket, "registry", websocket.registry)
+        websocket.registry = ConnectionRegistry()
+
+    def test_message_reaches_every_session(self):
+        """All tabs of a user receive the message, other users do not."""
+
+        async def run():
+            sockets = [FakeWebSocket() for _ in range(3)]
+            sessions = [
+                websocket._open_session(user_id, ws)
+                for user_id, ws in zip(("u1", "u1", "u2"), sockets)
+            ]
+            queued = await websocket.send_message_to_user("u1", {"event": "ping"})
+            await asyncio.sleep(0.01)
+            for session in sessions:
+                await websocket._close_session(session)
+            return queued, sockets
+
+        queued, sockets = asyncio.run(run())
+        self.assertTrue(queued)
+        self.assertEqual(sockets[0].sent, [{"event": "ping"}])
+        self.assertEqual(sockets[1].sent, [{"event": "ping"}])
+        self.assertEqual(sockets[2].sent, [])
+        self.assertEqual(len(websocket.registry), 0)
+
+    def test_message_to_disconnected_user_is_not_queued(self):
+        """A user without sessions gets False."""
+        queued = asyncio.run(websocket.send_message_to_user("nobody", {"event": "x"}))
+        self.assertFalse(queued)
+
+
+def status_update(cluster_id, value):
+    """Build the status push the cluster-status controller sends."""
+    return {
+        "event": "cluster_status_updated",
+        "cluster_id": cluster_id,
+        "status": value,
+    }
+
+
+class TestStatusFrames(unittest.TestCase):
+    """Tests for the status frames cluster-ui consumes."""
+
+    def setUp(self):
+        """Start each test with an empty registry and coalescer."""
+        self.addCleanup(setattr, websocket, "registry", websocket.registry)
+        websocket.registry = ConnectionRegistry()
+
+    def assert_ui_frame(self, frame):
+        """Check `frame` has the shape WebsocketConnection.tsx reads."""
+        if frame["event"] == "cluster_status_updated":
+            updates = [frame]
+        else:
+            self.assertEqual(frame["event"], "cluster_status_batch")
+            updates = frame["updates"]
+        for update in updates:
+            self.assertEqual(update["event"], "cluster_status_updated")
+            self.assertIsInstance(update["cluster_id"], str)
+            self.assertIsInstance(update["status"], str)
+
+    def test_window_is_batched_per_session(self):
+        """Each session gets its wanted clusters, batched only if several."""
+
+        async def run():
+            all_clusters, only_c1 = FakeWebSocket(), FakeWebSocket()
+            sessions = [
+                websocket._open_session("u1", all_clusters),
+                websocket._open_session("u1", only_c1),
+            ]
+            websocket.registry.subscribe(sessions[1].session_id, ["c1"])
+            websocket._flush_statuses(
+                "u1", [status_update("c1", "Running"), status_update("c2", "Stopped")]
+            )
+            await asyncio.sleep(0.01)
+            for session in sessions:
+                await websocket._close_session(session)
+            return all_clusters.sent, only_c1.sent
+
+        all_clusters, only_c1 = asyncio.run(run())
+        self.assertEqual(len(all_clusters), 1)
+        self.assertEqual(all_clusters[0]["event"], "cluster_status_batch")
+        self.assertEqual(
+            [(u["cluster_id"], u["status"]) for u in all_clusters[0]["updates"]],
+            [("c1", "Running"), ("c2", "Stopped")],
+        )
+        self.assertEqual(only_c1, [status_update("c1", "Running")])
+        for frame in all_clusters + only_c1:
+            self.assert_ui_frame(frame)
+
+    def test_shutdown_delivers_the_open_window(self):
+        """Statuses still buffered at shutdown reach the client."""
+
+        async def run():
+            socket = FakeWebSocket()
+            websocket._open_session("u1", socket)
+            coalescer = StatusCoalescer(websocket._flush_statuses, window=60)
+            with mock.patch.object(websocket, "status_coalescer", coalescer):
+                await websocket.deliver_notification(
+                    {"user_id": "u1", "message": status_update("c1", "Running")}
+                )
+                await websocket.close_all_sessions(timeout=1)
+            return socket
+
+        socket = asyncio.run(run())
+        self.assertEqual(socket.sent, [status_update("c1", "Running")])
+        self.assertTrue(socket.closed)
+        self.assertEqual(len(websocket.registry), 0)
+
+
+class TestWriterOverflow(unittest.TestCase):
+    """Tests for the bounded per-session writer queue."""
+
+    def test_drop_oldest_discards_the_oldest_frame(self):
+        """A full queue gives way at its head and counts the drop."""
+        writer = ConnectionWriter(FakeWebSocket(), maxsize=2, policy="drop_oldest")
+        for n in range(4):
+            writer.enqueue(json.dumps({"n": n}))
+
+        self.assertEqual(len(writer), 2)
+        self.assertEqual(writer.dropped, 2)
+        self.assertEqual(
+            [json.loads(text)["n"] for text in writer._pending.values()], [2, 3]
+        )
+
+    def test_coalesce_keeps_latest_frame_per_cluster(self):
+        """Repeated updates of one cluster replace the queued frame in place."""
+        writer = ConnectionWriter(FakeWebSocket(), maxsize=2, policy="coalesce")
+        writer.enqueue(json.dumps({"status": "Creating"}), "c1")
+        writer.enqueue(json.dumps({"status": "Stopped"}), "c2")
+        writer.enqueue(json.dumps({"status": "Running"}), "c1")
+
+        self.assertEqual(writer.coalesced, 1)
+        self.assertEqual(writer.dropped, 0)
+        self.assertEqual(
+            [json.loads(text)["status"] for text in writer._pending.values()],
+            ["Running", "Stopped"],
+        )
+
+    def test_queued_frames_are_sent_in_order(self):
+        """The writer task drains the queue to the socket in order."""
+
+        async def run():
+            socket = FakeWebSocket()
+            writer = ConnectionWriter(socket, maxsize=10)
+            writer.start()
+            for n in range(3):
+                writer.enqueue(json.dumps({"n": n}))
+            await asyncio.sleep(0.01)
+            await writer.stop()
+            return socket
+
+        self.assertEqual(asyncio.run(run()).sent, [{"n": 0}, {"n": 1}, {"n": 2}])
+
+    def test_failed_send_evicts_the_session(self):
+        """A send that fails stops the writer and reports the error."""
+        failures = []
+
+        class BrokenWebSocket(FakeWebSocket):
+            async def send_text(self, text):
+                """Fail every send."""
+                raise ConnectionError("gone")
+
+        async def on_failed(error):
+            failures.append(error)
+
+        async def run():
+            writer = ConnectionWriter(BrokenWebSocket(), on_failed=on_failed)
+            writer.start()
+            writer.enqueue("{}")
+            writer.enqueue("{}")
+            await asyncio.sleep(0.01)
+            return writer
+
+        writer = asyncio.run(run())
+        self.assertEqual(len(failures), 1)
+        self.assertEqual(len(writer), 0)
+
+    def test_unknown_policy_is_rejected(self):
+        """Only the documented overflow policies are accepted."""
+        with self.assertRaises(ValueError):
+            ConnectionWriter(FakeWebSocket(), policy="block")
+
+
+if __name__ == "__main__":
+    unittest.main()
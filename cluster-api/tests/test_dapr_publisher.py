@@ -0,0 +1,134 @@
+"""Unit tests for the shared Dapr publisher."""
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import grpc
+from utills.dapr_publisher import DaprPublisher
+
+
+class FakeClient:
+    """Dapr client whose metadata call fails while `down` is set."""
+
+    def __init__(self, sidecar):
+        """Connect to the fake `sidecar`."""
+        self.sidecar = sidecar
+        self.closed = False
+
+    def get_metadata(self):
+        """Raise while the sidecar is down."""
+        if self.sidecar["down"]:
+            raise ConnectionError("sidecar unavailable")
+
+    def close(self):
+        """Mark the client closed."""
+        self.closed = True
+
+
+class TestHealthCheck(unittest.TestCase):
+    """Tests for the sidecar health check and reconnect."""
+
+    def setUp(self):
+        """Create a publisher over a fake sidecar."""
+        self.sidecar = {"down": False}
+        self.clients = []
+
+        def factory():
+            client = FakeClient(self.sidecar)
+            self.clients.append(client)
+            return client
+
+        self.publisher = DaprPublisher(client_factory=factory)
+
+    def test_failed_check_reconnects(self):
+        """A failed check closes the channel and the next check opens a new one."""
+        self.sidecar["down"] = True
+        self.assertFalse(self.publisher.healthy())
+        self.assertFalse(self.publisher.is_healthy)
+        self.assertTrue(self.clients[0].closed)
+
+        self.sidecar["down"] = False
+        self.assertTrue(self.publisher.healthy())
+        self.assertTrue(self.publisher.is_healthy)
+        self.assertEqual(len(self.clients), 2)
+
+    def test_healthy_channel_is_reused(self):
+        """Passing checks keep the same channel."""
+        self.publisher.healthy()
+        self.publisher.healthy()
+        self.assertEqual(len(self.clients), 1)
+
+    def test_monitor_runs_until_stopped(self):
+        """start runs the check in the background and stop closes the channel."""
+        self.publisher.health_interval = 0.01
+        self.publisher.start()
+        self.publisher.stop()
+        self.assertGreaterEqual(len(self.clients), 1)
+        self.assertTrue(self.clients[-1].closed)
+
+
+class FakeRpcError(grpc.RpcError):
+    """RpcError carrying a status code."""
+
+    def __init__(self, code):
+        """Fail with `code`."""
+        super().__init__(code)
+        self._code = code
+
+    def code(self):
+        """Return the status code."""
+        return self._code
+
+
+class TestPublishBulk(unittest.TestCase):
+    """Tests for bulk publishing through the sidecar stub."""
+
+    def setUp(self):
+        """Create a publisher whose client has a mocked stub."""
+        self.stub = mock.Mock()
+        self.clients = []
+
+        def factory():
+            client = mock.Mock(_stub=self.stub)
+            self.clients.append(client)
+            return client
+
+        self.publisher = DaprPublisher(call_timeout=3, client_factory=factory)
+
+    def test_bulk_call_has_a_timeout(self):
+        """The sidecar call is bounded and failed entries are reported."""
+        self.stub.BulkPublishEventAlpha1.return_value = SimpleNamespace(
+            failedEntries=[SimpleNamespace(entry_id="1")]
+        )
+
+        failed = self.publisher.publish_bulk("topic", [{"n": 0}, {"n": 1}])
+
+        self.assertEqual(failed, [1])
+        self.assertEqual(
+            self.stub.BulkPublishEventAlpha1.call_args.kwargs, {"timeout": 3}
+        )
+
+    def test_hung_sidecar_raises_and_reconnects(self):
+        """A deadline is raised to the caller instead of retrying per event."""
+        self.stub.BulkPublishEventAlpha1.side_effect = FakeRpcError(
+            grpc.StatusCode.DEADLINE_EXCEEDED
+        )
+
+        with self.assertRaises(grpc.RpcError):
+            self.publisher.publish_bulk("topic", [{"n": 0}])
+
+        self.clients[0].close.assert_called_once()
+        self.clients[0].publish_event.assert_not_called()
+
+    def test_unsupported_bulk_falls_back_to_single_publishes(self):
+        """A sidecar without bulk publish gets one publish per event."""
+        self.stub.BulkPublishEventAlpha1.side_effect = FakeRpcError(
+            grpc.StatusCode.UNIMPLEMENTED
+        )
+
+        self.assertEqual(self.publisher.publish_bulk("topic", [{"n": 0}, {"n": 1}]), [])
+        self.assertEqual(self.clients[0].publish_event.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
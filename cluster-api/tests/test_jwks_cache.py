@@ -0,0 +1,98 @@
+"""Unit tests for the Keycloak signing key cache."""
+import unittest
+
+from utills.jwks_cache import JWKSCache
+
+
+class FakeKeycloak:
+    """JWKS endpoint returning the configured key IDs."""
+
+    def __init__(self, kids):
+        """Serve keys with `kids`."""
+        self.kids = list(kids)
+        self.calls = 0
+        self.error = None
+
+    def certs(self):
+        """Return the JWKS document, or raise the configured error."""
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return {
+            "keys": [{"kid": kid, "use": "sig", "alg": "RS256"} for kid in self.kids]
+        }
+
+
+class TestJWKSCache(unittest.TestCase):
+    """Tests for key lookup, rotation and refresh rate limiting."""
+
+    def setUp(self):
+        """Create a cache over a fake Keycloak with a manual clock."""
+        self.now = 0.0
+        self.keycloak = FakeKeycloak(["k1"])
+        self.cache = JWKSCache(
+            fetch=self.keycloak.certs,
+            ttl=3600,
+            min_refresh_interval=30,
+            timer=lambda: self.now,
+        )
+
+    def test_known_kid_is_served_from_cache(self):
+        """Repeated lookups fetch the key set once."""
+        self.assertEqual(self.cache.get("k1")["kid"], "k1")
+        self.assertEqual(self.cache.get("k1")["kid"], "k1")
+        self.assertEqual(self.keycloak.calls, 1)
+
+    def test_unknown_kid_triggers_one_refresh(self):
+        """A rotated key is picked up by a single early refresh."""
+        self.cache.get("k1")
+        self.keycloak.kids.append("k2")
+        self.now = 31
+
+        self.assertEqual(self.cache.get("k2")["kid"], "k2")
+        self.assertEqual(self.keycloak.calls, 2)
+
+    def test_unknown_kid_refreshes_are_rate_limited(self):
+        """Forged kids cannot trigger more than one fetch per interval."""
+        self.cache.get("k1")
+        self.now = 31
+        for _ in range(5):
+            self.assertIsNone(self.cache.get("forged"))
+        self.assertEqual(self.keycloak.calls, 2)
+
+        self.now = 45
+        self.assertIsNone(self.cache.get("forged"))
+        self.assertEqual(self.keycloak.calls, 2)
+
+        self.now = 62
+        self.cache.get("forged")
+        self.assertEqual(self.keycloak.calls, 3)
+
+    def test_failed_refresh_keeps_cached_keys(self):
+        """Keys survive a Keycloak outage when the TTL expires."""
+        self.cache.get("k1")
+        self.keycloak.error = ConnectionError("keycloak down")
+        self.now = 3601
+
+        self.assertEqual(self.cache.get("k1")["kid"], "k1")
+        self.assertEqual(self.keycloak.calls, 2)
+        # The next attempt waits min_refresh_interval instead of every lookup
+        self.cache.get("k1")
+        self.assertEqual(self.keycloak.calls, 2)
+
+    def test_first_fetch_failure_is_raised(self):
+        """Without any cached keys a fetch failure propagates."""
+        self.keycloak.error = ConnectionError("keycloak down")
+        with self.assertRaises(ConnectionError):
+            self.cache.get("k1")
+
+    def test_expired_key_set_is_refetched(self):
+        """The key set is fetched again after its TTL."""
+        self.cache.get("k1")
+        self.now = 3601
+        self.cache.get("k1")
+        self.assertEqual(self.keycloak.calls, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,252 @@
+"""Unit tests for the authentication middleware."""
+import asyncio
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+from jose.exceptions import ExpiredSignatureError, JWTError
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from middleware import dependency, middleware
+from pymongo.errors import DuplicateKeyError
+from utills.jwks_cache import JWKSCache
+from utills.ttl_cache import TTLCache
+
+CLAIMS = {
+    "sid": "user-1",
+    "email": "one@example.com",
+    "name": "User One",
+    "preferred_username": "one",
+}
+
+STORED_USER = {
+    "_id": "user-1",
+    "email": "one@example.com",
+    "name": "User One",
+    "userName": "one",
+}
+
+
+class TestCheckUser(unittest.TestCase):
+    """Tests for resolving the token's user through the cache and Mongo."""
+
+    def setUp(self):
+        """Use a fresh user cache and a mocked user collection."""
+        self.now = 0.0
+        cache = TTLCache(maxsize=10, ttl=300, timer=lambda: self.now)
+        patcher = mock.patch.object(middleware, "user_cache", cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.users = mock.Mock(
+            find_one_and_update=mock.AsyncMock(return_value=STORED_USER),
+            find_one=mock.AsyncMock(return_value=STORED_USER),
+        )
+
+    def check(self):
+        """Run check_user on a new request and return it."""
+        request = SimpleNamespace(
+            app=SimpleNamespace(database={"user": self.users}),
+            state=SimpleNamespace(),
+        )
+        asyncio.run(middleware.check_user(CLAIMS, request))
+        return request
+
+    def test_first_login_upserts_with_set_on_insert(self):
+        """The user is inserted atomically, without overwriting an existing one."""
+        request = self.check()
+
+        self.users.find_one_and_update.assert_awaited_once()
+        query, update = self.users.find_one_and_update.await_args.args
+        self.assertEqual(query, {"email": "one@example.com"})
+        self.assertEqual(list(update), ["$setOnInsert"])
+        self.assertNotIn("email", update["$setOnInsert"])
+        self.assertEqual(update["$setOnInsert"]["_id"], "user-1")
+        self.assertTrue(self.users.find_one_and_update.await_args.kwargs["upsert"])
+        self.assertEqual(request.state.user.id, "user-1")
+        self.assertEqual(request.state.user.email, "one@example.com")
+
+    def test_concurrent_insert_falls_back_to_find(self):
+        """Losing the upsert race reads the user the other request inserted."""
+        self.users.find_one_and_update.side_effect = DuplicateKeyError("E11000")
+
+        request = self.check()
+
+        self.users.find_one.assert_awaited_once_with({"email": "one@example.com"})
+        self.assertEqual(request.state.user.id, "user-1")
+
+    def test_cached_user_skips_mongo(self):
+        """A second request for the same email is served from the cache."""
+        first = self.check()
+        second = self.check()
+
+        self.assertEqual(self.users.find_one_and_update.await_count, 1)
+        self.assertIs(second.state.user, first.state.user)
+
+    def test_expired_entry_is_reloaded(self):
+        """Once the cached user expires, Mongo is queried again."""
+        self.check()
+        self.now = 301
+        self.check()
+
+        self.assertEqual(self.users.find_one_and_update.await_count, 2)
+
+
+def rsa_key(kid):
+    """Return a new RSA private key in PEM and its public JWK."""
+    private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = private.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+    public = jwk.construct(pem, "RS256").public_key().to_dict()
+    public.update({"kid": kid, "use": "sig", "alg": "RS256"})
+    return pem, public
+
+
+REALM_PEM, REALM_JWK = rsa_key("realm-key")
+OTHER_PEM, _ = rsa_key("realm-key")
+
+
+def sign(pem=REALM_PEM, kid="realm-key", algorithm="RS256", **claims):
+    """Return a token for CLAIMS signed with `pem`."""
+    payload = {**CLAIMS, "exp": int(time.time()) + 300, **claims}
+    return jwt.encode(payload, pem, algorithm=algorithm, headers={"kid": kid})
+
+
+class TestIsAuthenticated(unittest.TestCase):
+    """Tests for local JWT verification against the realm keys."""
+
+    def setUp(self):
+        """Serve the realm key from a fake JWKS endpoint."""
+        self.fetches = 0
+
+        def certs():
+            self.fetches += 1
+            return {"keys": [REALM_JWK]}
+
+        keys = JWKSCache(fetch=certs, ttl=3600, min_refresh_interval=30)
+        patcher = mock.patch.object(middleware, "signing_keys", keys)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_valid_token_returns_claims(self):
+        """A token signed by a realm key verifies locally."""
+        claims = middleware.is_authenticated(sign())
+        self.assertEqual(claims["email"], "one@example.com")
+        self.assertEqual(self.fetches, 1)
+
+    def test_unknown_kid_is_rejected(self):
+        """A key ID the realm does not publish fails after one refresh."""
+        middleware.is_authenticated(sign())
+        with self.assertRaises(JWTError):
+            middleware.is_authenticated(sign(kid="forged"))
+
+    def test_bad_signature_is_rejected(self):
+        """A token signed by another key with a known kid is rejected."""
+        with self.assertRaises(JWTError):
+            middleware.is_authenticated(sign(pem=OTHER_PEM))
+
+    def test_algorithm_mismatch_is_rejected(self):
+        """An HS256 token naming the RS256 realm key is rejected."""
+        token = sign(pem="shared-secret", algorithm="HS256")
+        with self.assertRaises(JWTError):
+            middleware.is_authenticated(token)
+
+    def test_expired_token_is_rejected(self):
+        """An expired token raises ExpiredSignatureError."""
+        with self.assertRaises(ExpiredSignatureError):
+            middleware.is_authenticated(sign(exp=int(time.time()) - 10))
+
+
+class TestVerifyToken(unittest.TestCase):
+    """Tests for caching verified claims until the token expires."""
+
+    def setUp(self):
+        """Use a verified-token cache driven by a manual clock."""
+        self.now = 1000.0
+        cache = TTLCache(maxsize=10, ttl=300, timer=lambda: self.now)
+        patches = [
+            mock.patch.object(middleware, "verified_tokens", cache),
+            mock.patch.object(middleware.time, "time", lambda: self.now),
+            mock.patch.object(middleware, "is_authenticated", side_effect=self.decode),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.verified = []
+
+    def decode(self, token):
+        """Pretend to verify `token`, which expires 60s from now."""
+        self.verified.append(token)
+        return {"sub": token, "exp": self.now + 60}
+
+    def test_claims_are_cached_until_exp(self):
+        """A token is verified once, and again once its exp has passed."""
+        middleware.verify_token("token-a")
+        self.now += 59
+        self.assertIsNotNone(middleware.get_cached_claims("token-a"))
+        middleware.verify_token("token-a")
+        self.assertEqual(self.verified, ["token-a"])
+
+        self.now += 2
+        self.assertIsNone(middleware.get_cached_claims("token-a"))
+        middleware.verify_token("token-a")
+        self.assertEqual(self.verified, ["token-a", "token-a"])
+
+    def test_different_tokens_have_different_keys(self):
+        """Claims of one token are never returned for another."""
+        self.assertNotEqual(
+            middleware.token_cache_key("token-a"), middleware.token_cache_key("token-b")
+        )
+        self.assertEqual(middleware.verify_token("token-a")["sub"], "token-a")
+        self.assertEqual(middleware.verify_token("token-b")["sub"], "token-b")
+        self.assertEqual(self.verified, ["token-a", "token-b"])
+
+    def test_raw_token_is_not_a_cache_key(self):
+        """Only the token's digest is kept in memory."""
+        middleware.verify_token("token-a")
+        self.assertIsNone(middleware.verified_tokens.get("token-a"))
+
+
+class TestHasAccess(unittest.TestCase):
+    """Tests for the route dependency reusing the middleware's claims."""
+
+    def credentials(self):
+        """Return bearer credentials for a token."""
+        return HTTPAuthorizationCredentials(scheme="Bearer", credentials="token-a")
+
+    def test_reuses_claims_from_the_middleware(self):
+        """A request that passed the middleware is not verified again."""
+        request = SimpleNamespace(state=SimpleNamespace(token_claims={"sub": "a"}))
+        with mock.patch.object(dependency, "verify_token") as verify:
+            asyncio.run(dependency.has_access(request, self.credentials()))
+        verify.assert_not_called()
+        self.assertEqual(request.state.token_claims, {"sub": "a"})
+
+    def test_verifies_when_claims_are_missing(self):
+        """A request that bypassed the middleware is verified here."""
+        request = SimpleNamespace(state=SimpleNamespace())
+        with mock.patch.object(
+            dependency, "verify_token", return_value={"sub": "a"}
+        ) as verify:
+            asyncio.run(dependency.has_access(request, self.credentials()))
+        verify.assert_called_once_with("token-a")
+        self.assertEqual(request.state.token_claims, {"sub": "a"})
+
+    def test_invalid_token_is_unauthorized(self):
+        """A token that fails verification answers 401."""
+        request = SimpleNamespace(state=SimpleNamespace())
+        with mock.patch.object(
+            dependency, "verify_token", side_effect=JWTError("bad")
+        ), self.assertRaises(HTTPException) as raised:
+            asyncio.run(dependency.has_access(request, self.credentials()))
+        self.assertEqual(raised.exception.status_code, 401)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"""Unit tests for the websocket notification bus."""
+import asyncio
+import json
+import threading
+import unittest
+from unittest import mock
+
+from dapr.proto import api_v1, appcallback_v1
+from utills.notification_bus import (
+    NOTIFICATION_PUBSUB,
+    DaprNotificationBus,
+    LocalNotificationBus,
+)
+
+
+class TestDaprNotificationBus(unittest.TestCase):
+    """Tests for publishing through the Dapr notification component."""
+
+    def test_publishes_on_notification_component(self):
+        """Notifications use the transient component, not the event bus."""
+        publisher = mock.Mock()
+        bus = DaprNotificationBus(publisher, topic_name="notifications")
+
+        asyncio.run(bus.publish({"user_id": "u1", "message": {}}))
+
+        publisher.publish.assert_called_once_with(
+            "notifications", {"user_id": "u1", "message": {}}, NOTIFICATION_PUBSUB
+        )
+
+    def test_resubscribes_after_stream_failure(self):
+        """A broken stream is re-opened and later events are still delivered."""
+        received = []
+        delivered = threading.Event()
+        event = api_v1.SubscribeTopicEventsResponseAlpha1(
+            event_message=appcallback_v1.TopicEventRequest(
+                id="e1", data=json.dumps({"user_id": "u1"}).encode()
+            )
+        )
+
+        def broken(requests):
+            raise RuntimeError("sidecar went away")
+
+        def healthy(requests):
+            yield event
+            delivered.wait(5)
+
+        clients = [
+            mock.Mock(_stub=mock.Mock(SubscribeTopicEventsAlpha1=stream))
+            for stream in (broken, healthy)
+        ]
+        bus = DaprNotificationBus(
+            mock.Mock(),
+            consumer_id="worker-1",
+            reconnect_delay=0.01,
+            client_factory=mock.Mock(side_effect=clients),
+        )
+
+        async def handler(notification):
+            received.append(notification)
+            delivered.set()
+
+        async def run():
+            await bus.start(handler)
+            while not delivered.is_set():
+                await asyncio.sleep(0.01)
+            await bus.stop()
+
+        asyncio.run(asyncio.wait_for(run(), 5))
+
+        self.assertEqual(received, [{"user_id": "u1"}])
+        for client in clients:
+            client.close.assert_called_once()
+
+
+class TestLocalNotificationBus(unittest.TestCase):
+    """Tests for in-process delivery."""
+
+    def test_delivers_to_handler_until_stopped(self):
+        """Notifications reach the handler only while the bus is started."""
+        received = []
+
+        async def handler(notification):
+            received.append(notification)
+            return True
+
+        async def run():
+            bus = LocalNotificationBus()
+            await bus.start(handler)
+            delivered = await bus.publish({"user_id": "u1"})
+            await bus.stop()
+            return delivered, await bus.publish({"user_id": "u2"})
+
+        self.assertEqual(asyncio.run(run()), (True, False))
+        self.assertEqual(received, [{"user_id": "u1"}])
+
+
+if __name__ == "__main__":
+    unittest.main()
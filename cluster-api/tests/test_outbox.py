@@ -0,0 +1,236 @@
+"""Unit tests for the transactional outbox dispatcher."""
+import asyncio
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from utills import outbox
+from utills.outbox import Outbox, next_batch, outbox_event, retry_delay
+
+NOW = datetime(2024, 1, 1, 12, 0, 0)
+
+
+def event(key, seconds, next_attempt=None, attempts=0):
+    """Build an outbox event for `key` created `seconds` after NOW."""
+    doc = outbox_event("cluster-create", {"id": key}, key)
+    doc["created"] = NOW + timedelta(seconds=seconds)
+    doc["next_attempt"] = next_attempt
+    doc["attempts"] = attempts
+    return doc
+
+
+class FakeCursor:
+    """Async cursor over a list of documents."""
+
+    def __init__(self, documents):
+        """Iterate over `documents`."""
+        self.documents = documents
+        self.closed = False
+
+    def sort(self, keys):
+        """Sort the documents by `keys`, all ascending."""
+        self.documents = sorted(
+            self.documents, key=lambda doc: tuple(doc[k] for k, _ in keys)
+        )
+        return self
+
+    def __aiter__(self):
+        """Return an async iterator over the documents."""
+        return self._iterate()
+
+    async def _iterate(self):
+        """Yield the documents in order."""
+        for document in self.documents:
+            yield document
+
+    async def close(self):
+        """Mark the cursor closed."""
+        self.closed = True
+
+
+class FakeCollection:
+    """The part of an outbox collection the dispatcher uses."""
+
+    def __init__(self, documents=()):
+        """Hold `documents` in memory."""
+        self.documents = {doc["_id"]: doc for doc in documents}
+        self.cursor = None
+
+    async def distinct(self, field, query):
+        """Return the keys whose event waits past `query`'s bound."""
+        bound = query["next_attempt"]["$gt"]
+        return sorted(
+            {
+                doc[field]
+                for doc in self.documents.values()
+                if doc["next_attempt"] is not None and doc["next_attempt"] > bound
+            }
+        )
+
+    def find(self, query):
+        """Return a cursor over due events of keys not excluded by `query`."""
+        excluded = set(query["key"]["$nin"])
+        now = query["$or"][1]["next_attempt"]["$lte"]
+        self.cursor = FakeCursor(
+            [
+                doc
+                for doc in self.documents.values()
+                if doc["key"] not in excluded
+                and (doc["next_attempt"] is None or doc["next_attempt"] <= now)
+            ]
+        )
+        return self.cursor
+
+    async def insert_one(self, document):
+        """Store `document`."""
+        self.documents[document["_id"]] = document
+
+    async def delete_one(self, query):
+        """Delete the document with `query['_id']`."""
+        self.documents.pop(query["_id"], None)
+
+    async def delete_many(self, query):
+        """Delete the documents whose id is in `query['_id']['$in']`."""
+        for _id in query["_id"]["$in"]:
+            self.documents.pop(_id, None)
+
+    async def update_one(self, query, update):
+        """Apply a `$set` update to one document."""
+        self.documents[query["_id"]].update(update["$set"])
+
+
+class FakePublisher:
+    """Publisher that rejects every event of the keys in `failing`."""
+
+    def __init__(self, failing=()):
+        """Fail the events whose payload id is in `failing`."""
+        self.failing = set(failing)
+        self.published = []
+
+    def publish_bulk(self, topic_name, payloads):
+        """Record the payloads and return the indexes that failed."""
+        self.published.extend(payload["id"] for payload in payloads)
+        return [
+            index
+            for index, payload in enumerate(payloads)
+            if payload["id"] in self.failing
+        ]
+
+
+class TestNextBatch(unittest.TestCase):
+    """Tests for picking the events of one dispatch round."""
+
+    def test_one_event_per_key_oldest_first(self):
+        """Later events of a key wait for the earlier one."""
+        events = [event("a", 0), event("b", 1), event("a", 2), event("c", 3)]
+        batch = next_batch(events, NOW)
+        self.assertEqual([e["key"] for e in batch], ["a", "b", "c"])
+        self.assertIs(batch[0], events[0])
+
+    def test_backing_off_key_is_held_back(self):
+        """A key whose oldest event is waiting sends nothing, not a later event."""
+        later = NOW + timedelta(seconds=30)
+        events = [event("a", 0, next_attempt=later), event("b", 1), event("a", 2)]
+        self.assertEqual([e["key"] for e in next_batch(events, NOW)], ["b"])
+
+    def test_due_retry_is_sent(self):
+        """An event whose retry time has passed is picked again."""
+        earlier = NOW - timedelta(seconds=1)
+        events = [event("a", 0, next_attempt=earlier, attempts=1)]
+        self.assertEqual(next_batch(events, NOW), events)
+
+    def test_skipped_events_do_not_fill_the_batch(self):
+        """The limit counts picked events, not the duplicates skipped on the way."""
+        events = [event("a", i) for i in range(5)] + [event("b", 5), event("c", 6)]
+        batch = next_batch(events, NOW, limit=2)
+        self.assertEqual([e["key"] for e in batch], ["a", "b"])
+
+    def test_blocked_keys_are_skipped(self):
+        """Keys known to be backing off are skipped even without their head."""
+        events = [event("a", 0), event("b", 1)]
+        self.assertEqual(
+            [e["key"] for e in next_batch(events, NOW, blocked={"a"})], ["b"]
+        )
+
+
+class TestRetryDelay(unittest.TestCase):
+    """Tests for the retry backoff."""
+
+    def test_delay_doubles_per_attempt(self):
+        """Each failure doubles the wait."""
+        self.assertEqual([retry_delay(n, 1, 60) for n in (1, 2, 3)], [2, 4, 8])
+
+    def test_delay_is_capped(self):
+        """The wait never exceeds max_backoff."""
+        self.assertEqual(retry_delay(10, 1, 60), 60)
+
+
+class TestDispatchOnce(unittest.TestCase):
+    """Tests for one dispatch round against a fake collection."""
+
+    def make_outbox(self, documents, publisher, batch_size=10, max_attempts=3):
+        """Return an Outbox over fake collections holding `documents`."""
+        database = {
+            outbox.OUTBOX_COLLECTION: FakeCollection(documents),
+            outbox.DEAD_LETTER_COLLECTION: FakeCollection(),
+            "lease": FakeCollection(),
+        }
+        box = Outbox(
+            client=None,
+            database=database,
+            publisher=publisher,
+            batch_size=batch_size,
+            poll_interval=1,
+            max_backoff=60,
+            max_attempts=max_attempts,
+        )
+        return box, database
+
+    def dispatch(self, box):
+        """Run one dispatch round at NOW."""
+
+        async def run():
+            with mock.patch.object(outbox, "datetime", wraps=datetime) as clock:
+                clock.utcnow.return_value = NOW
+                return await box.dispatch_once()
+
+        return asyncio.run(run())
+
+    def test_backing_off_head_does_not_block_other_keys(self):
+        """Events behind a waiting key are read past, not counted in the batch."""
+        later = NOW + timedelta(seconds=30)
+        documents = [event("a", 0, next_attempt=later, attempts=1)]
+        documents += [event("a", i) for i in range(1, 5)]
+        documents += [event("b", 5), event("c", 6)]
+        publisher = FakePublisher()
+        box, database = self.make_outbox(documents, publisher, batch_size=2)
+
+        self.assertEqual(self.dispatch(box), 2)
+        self.assertEqual(publisher.published, ["b", "c"])
+        self.assertEqual(len(database[outbox.OUTBOX_COLLECTION].documents), 5)
+        self.assertTrue(database[outbox.OUTBOX_COLLECTION].cursor.closed)
+
+    def test_failed_event_backs_off(self):
+        """A rejected event is kept with its next retry time."""
+        first = event("a", 0)
+        box, database = self.make_outbox([first], FakePublisher(failing={"a"}))
+
+        self.assertEqual(self.dispatch(box), 0)
+        stored = database[outbox.OUTBOX_COLLECTION].documents[first["_id"]]
+        self.assertEqual(stored["attempts"], 1)
+        self.assertEqual(stored["next_attempt"], NOW + timedelta(seconds=2))
+
+    def test_exhausted_event_is_dead_lettered(self):
+        """The last failed attempt moves the event out of the outbox."""
+        first = event("a", 0, next_attempt=NOW, attempts=2)
+        box, database = self.make_outbox([first], FakePublisher(failing={"a"}))
+
+        self.dispatch(box)
+        self.assertEqual(database[outbox.OUTBOX_COLLECTION].documents, {})
+        dead = database[outbox.DEAD_LETTER_COLLECTION].documents[first["_id"]]
+        self.assertEqual(dead["attempts"], 3)
+        self.assertEqual(dead["error"], "rejected by the sidecar")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+"""Unit tests for the pooled cluster-service client."""
+import asyncio
+import unittest
+from unittest import mock
+
+import httpx
+from utills import service_client
+from utills.service_client import LatencyMetrics, ServiceClient
+
+
+class TestServiceClient(unittest.TestCase):
+    """Tests for retries, backoff and latency recording in ServiceClient."""
+
+    def setUp(self):
+        """Answer requests from a queue of canned outcomes and skip sleeps."""
+        self.outcomes = []
+        self.requests = []
+
+        def handler(request):
+            self.requests.append(request)
+            outcome = self.outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return httpx.Response(outcome, json={})
+
+        self.client = ServiceClient(
+            base_url="http://cluster-service",
+            retries=2,
+            backoff=0.2,
+            transport=httpx.MockTransport(handler),
+        )
+        self.sleep = mock.AsyncMock()
+        patcher = mock.patch.object(service_client.asyncio, "sleep", self.sleep)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def post(self, idempotent=True):
+        """POST to /cluster-check and return the response."""
+        return asyncio.run(
+            self.client.apost("/cluster-check", json={}, idempotent=idempotent)
+        )
+
+    def test_retries_idempotent_call_on_5xx(self):
+        """502/503/504 answers are retried until one succeeds."""
+        self.outcomes = [503, 502, 200]
+        self.assertEqual(self.post().status_code, 200)
+        self.assertEqual(len(self.requests), 3)
+
+    def test_retries_idempotent_call_on_connect_error(self):
+        """A refused connection is retried."""
+        self.outcomes = [httpx.ConnectError("refused"), 200]
+        self.assertEqual(self.post().status_code, 200)
+        self.assertEqual(len(self.requests), 2)
+
+    def test_gives_up_after_retries(self):
+        """The last failure is raised once the retries are spent."""
+        self.outcomes = [httpx.ConnectError("refused")] * 3
+        with self.assertRaises(httpx.ConnectError):
+            self.post()
+        self.assertEqual(len(self.requests), 3)
+
+    def test_does_not_retry_4xx(self):
+        """Client errors are returned as they are."""
+        self.outcomes = [404]
+        self.assertEqual(self.post().status_code, 404)
+        self.assertEqual(len(self.requests), 1)
+        self.sleep.assert_not_called()
+
+    def test_does_not_retry_non_idempotent_call(self):
+        """Calls not marked idempotent are made once."""
+        self.outcomes = [503]
+        self.assertEqual(self.post(idempotent=False).status_code, 503)
+        self.assertEqual(len(self.requests), 1)
+
+    def test_backoff_is_full_jitter_bounded_by_exponential_delay(self):
+        """Each delay is drawn from [0, backoff * 2**attempt]."""
+        self.outcomes = [503, 503, 200]
+        with mock.patch.object(
+            service_client.random, "uniform", side_effect=lambda low, high: high
+        ) as uniform:
+            self.post()
+        self.assertEqual(uniform.call_args_list, [mock.call(0, 0.2), mock.call(0, 0.4)])
+        self.assertEqual(self.sleep.call_args_list, [mock.call(0.2), mock.call(0.4)])
+        for attempt in range(4):
+            self.assertTrue(0 <= self.client._delay(attempt) <= 0.2 * 2**attempt)
+
+    def test_records_latency_and_errors_per_attempt(self):
+        """Every attempt is counted and 5xx answers count as errors."""
+        self.outcomes = [503, 200]
+        self.post()
+        metrics = self.client.metrics.snapshot()["/cluster-check"]
+        self.assertEqual(metrics["count"], 2)
+        self.assertEqual(metrics["errors"], 1)
+
+
+class TestLatencyMetrics(unittest.TestCase):
+    """Tests for the per-path latency summary."""
+
+    def test_snapshot_reports_percentiles(self):
+        """Percentiles are taken over the kept window, in milliseconds."""
+        metrics = LatencyMetrics(window=100)
+        for ms in range(1, 201):
+            metrics.record("/path", ms / 1000, ok=ms % 50 != 0)
+        snapshot = metrics.snapshot()["/path"]
+        self.assertEqual(snapshot["count"], 200)
+        self.assertEqual(snapshot["errors"], 4)
+        self.assertEqual(snapshot["p50_ms"], 151.0)
+        self.assertEqual(snapshot["p99_ms"], 199.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
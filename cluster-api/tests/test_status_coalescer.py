@@ -0,0 +1,96 @@
+"""Unit tests for the cluster status coalescing window."""
+import asyncio
+import unittest
+
+from utills.status_coalescer import StatusCoalescer
+
+
+def status_message(cluster_id, value):
+    """Build a cluster status push."""
+    return {
+        "event": "cluster_status_updated",
+        "cluster_id": cluster_id,
+        "status": value,
+    }
+
+
+class TestStatusCoalescer(unittest.TestCase):
+    """Tests for collapsing status bursts per (user, cluster)."""
+
+    def setUp(self):
+        """Record every flush."""
+        self.flushes = []
+
+    def flush(self, user_id, messages):
+        """Record one flushed window."""
+        self.flushes.append((user_id, [m["status"] for m in messages]))
+
+    def run_window(self, pushes, window=0.01):
+        """Add `pushes` within one window and wait for it to close."""
+
+        async def run():
+            coalescer = StatusCoalescer(self.flush, window=window)
+            for user_id, cluster_id, value in pushes:
+                coalescer.add(user_id, cluster_id, status_message(cluster_id, value))
+            await asyncio.sleep(window * 5)
+            return coalescer
+
+        return asyncio.run(run())
+
+    def test_same_key_collapses_to_latest(self):
+        """A burst for one cluster reaches the user as its last status."""
+        coalescer = self.run_window(
+            [("u1", "c1", "Creating"), ("u1", "c1", "Pending"), ("u1", "c1", "Running")]
+        )
+        self.assertEqual(self.flushes, [("u1", ["Running"])])
+        self.assertEqual((coalescer.received, coalescer.flushed), (3, 1))
+
+    def test_different_clusters_are_not_merged(self):
+        """Each cluster of a user keeps its own latest status, in first-seen order."""
+        self.run_window(
+            [("u1", "c1", "Creating"), ("u1", "c2", "Stopped"), ("u1", "c1", "Running")]
+        )
+        self.assertEqual(self.flushes, [("u1", ["Running", "Stopped"])])
+
+    def test_different_users_are_not_merged(self):
+        """The same cluster ID for two users flushes separately."""
+        self.run_window([("u1", "c1", "Running"), ("u2", "c1", "Stopped")])
+        self.assertEqual(
+            sorted(self.flushes), [("u1", ["Running"]), ("u2", ["Stopped"])]
+        )
+
+    def test_next_window_starts_fresh(self):
+        """A push after a flush opens a new window."""
+
+        async def run():
+            coalescer = StatusCoalescer(self.flush, window=0.01)
+            coalescer.add("u1", "c1", status_message("c1", "Creating"))
+            await asyncio.sleep(0.05)
+            coalescer.add("u1", "c1", status_message("c1", "Running"))
+            await asyncio.sleep(0.05)
+
+        asyncio.run(run())
+        self.assertEqual(self.flushes, [("u1", ["Creating"]), ("u1", ["Running"])])
+
+    def test_zero_window_flushes_immediately(self):
+        """Without a window every push is delivered at once."""
+        coalescer = StatusCoalescer(self.flush, window=0)
+        coalescer.add("u1", "c1", status_message("c1", "Creating"))
+        coalescer.add("u1", "c1", status_message("c1", "Running"))
+        self.assertEqual(self.flushes, [("u1", ["Creating"]), ("u1", ["Running"])])
+
+    def test_flush_all_closes_open_windows(self):
+        """flush_all delivers pending statuses without waiting for the timer."""
+
+        async def run():
+            coalescer = StatusCoalescer(self.flush, window=60)
+            coalescer.add("u1", "c1", status_message("c1", "Running"))
+            coalescer.flush_all()
+            return coalescer
+
+        asyncio.run(run())
+        self.assertEqual(self.flushes, [("u1", ["Running"])])
+
+
+if __name__ == "__main__":
+    unittest.main()
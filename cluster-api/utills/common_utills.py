@@ -6,7 +6,6 @@ import logging
 import os
 import re
 
-import requests
 from fastapi import HTTPException, status
 
 
@@ -38,12 +37,13 @@ def extract_time_components(time_string):
         return None
 
 
-def get_best_cluster(host_cluster_ids):
+async def get_best_cluster(service_client, host_cluster_ids):
     """
     Select the best cluster from a list of host cluster IDs by calling
     an external service.
 
     Args:
+        service_client (ServiceClient): Shared cluster-service client.
         host_cluster_ids (list): List of host cluster IDs to check.
 
     Returns:
@@ -53,8 +53,9 @@ def get_best_cluster(host_cluster_ids):
         HTTPException: If the service does not return a successful response.
     """
     payload = {"host_cluster_ids": host_cluster_ids}
-    baseUrl = os.getenv("SERVICE_URL")
-    response = requests.post(baseUrl + "/cluster-check", json=payload)
+    response = await service_client.apost(
+        "/cluster-check", json=payload, idempotent=True
+    )
     if response.status_code == 200:  # Check if the request was successful
         print("POST request successful")
         responseBody = response.json()
@@ -0,0 +1,142 @@
+"""
+Registry of the websocket sessions held by this worker.
+
+A user may have several sessions open at once, one per browser tab. The
+registry maps each user to their sessions and keeps reverse indexes by
+session ID and by subscribed cluster ID, so a cluster update touches only
+the sessions that want it. A session that never subscribed to a cluster
+receives every update of its user.
+"""
+
+import uuid
+from datetime import datetime
+
+
+class Session:
+    """One websocket connection and the clusters it subscribed to."""
+
+    def __init__(self, user_id, websocket, writer=None, session_id=None):
+        """Initialize a Session.
+
+        Args:
+            user_id (str): Owner of the connection.
+            websocket (WebSocket): Accepted connection.
+            writer (ConnectionWriter): Outbound queue of the connection.
+            session_id (str): Unique ID; generated if omitted.
+        """
+        self.session_id = session_id or uuid.uuid4().hex
+        self.user_id = user_id
+        self.websocket = websocket
+        self.writer = writer
+        self.clusters = set()
+        self.last_active = datetime.now()
+
+    def wants(self, cluster_id):
+        """Return True if updates of `cluster_id` should reach this session."""
+        return not self.clusters or cluster_id in self.clusters
+
+
+class ConnectionRegistry:
+    """Sessions indexed by user, by session ID and by subscribed cluster."""
+
+    def __init__(self):
+        """Initialize an empty ConnectionRegistry."""
+        self._by_id = {}
+        self._by_user = {}
+        self._by_cluster = {}
+        # Sessions without subscriptions, per user; they get every update
+        self._unfiltered = {}
+
+    def __len__(self):
+        """Return the number of open sessions."""
+        return len(self._by_id)
+
+    def __contains__(self, user_id):
+        """Return True if `user_id` has at least one open session."""
+        return user_id in self._by_user
+
+    def add(self, session):
+        """Register `session`."""
+        self._by_id[session.session_id] = session
+        self._by_user.setdefault(session.user_id, {})[session.session_id] = session
+        self._index(session)
+
+    def remove(self, session_id):
+        """Unregister a session and return it, or None if it is unknown."""
+        session = self._by_id.pop(session_id, None)
+        if session is None:
+            return None
+        self._unindex(session)
+        sessions = self._by_user.get(session.user_id)
+        if sessions is not None:
+            sessions.pop(session_id, None)
+            if not sessions:
+                del self._by_user[session.user_id]
+        return session
+
+    def get(self, session_id):
+        """Return the session with `session_id`, or None."""
+        return self._by_id.get(session_id)
+
+    def all(self):
+        """Return a snapshot of every session."""
+        return list(self._by_id.values())
+
+    def for_user(self, user_id):
+        """Return a snapshot of the sessions of `user_id`."""
+        return list(self._by_user.get(user_id, {}).values())
+
+    def for_cluster(self, user_id, cluster_id):
+        """Return the sessions of `user_id` that want updates of `cluster_id`."""
+        sessions = list(self._unfiltered.get(user_id, {}).values())
+        for session_id in self._by_cluster.get(cluster_id, ()):
+            session = self._by_id[session_id]
+            if session.user_id == user_id:
+                sessions.append(session)
+        return sessions
+
+    def subscribe(self, session_id, cluster_ids):
+        """Add `cluster_ids` to the subscriptions of a session."""
+        session = self._by_id.get(session_id)
+        if session is not None:
+            self._unindex(session)
+            session.clusters.update(cluster_ids)
+            self._index(session)
+
+    def unsubscribe(self, session_id, cluster_ids):
+        """Remove `cluster_ids` from the subscriptions of a session."""
+        session = self._by_id.get(session_id)
+        if session is not None:
+            self._unindex(session)
+            session.clusters.difference_update(cluster_ids)
+            self._index(session)
+
+    def counts(self):
+        """Return the number of users, sessions and subscribed clusters."""
+        return {
+            "users": len(self._by_user),
+            "sessions": len(self._by_id),
+            "subscribed_clusters": len(self._by_cluster),
+        }
+
+    def _index(self, session):
+        """Add `session` to the cluster or unfiltered index."""
+        if not session.clusters:
+            unfiltered = self._unfiltered.setdefault(session.user_id, {})
+            unfiltered[session.session_id] = session
+        for cluster_id in session.clusters:
+            self._by_cluster.setdefault(cluster_id, set()).add(session.session_id)
+
+    def _unindex(self, session):
+        """Remove `session` from the cluster and unfiltered indexes."""
+        unfiltered = self._unfiltered.get(session.user_id)
+        if unfiltered is not None:
+            unfiltered.pop(session.session_id, None)
+            if not unfiltered:
+                del self._unfiltered[session.user_id]
+        for cluster_id in session.clusters:
+            subscribers = self._by_cluster.get(cluster_id)
+            if subscribers is not None:
+                subscribers.discard(session.session_id)
+                if not subscribers:
+                    del self._by_cluster[cluster_id]
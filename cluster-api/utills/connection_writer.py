@@ -0,0 +1,168 @@
+"""
+Outbound queue and writer task of one websocket connection.
+
+Producers hand frames to `ConnectionWriter.enqueue`, which only touches an
+in-memory queue and returns at once; a dedicated task per connection writes
+them to the socket. The queue is bounded and WS_OVERFLOW_POLICY decides what
+gives way when a client reads slower than frames arrive:
+
+- `drop_oldest` discards the oldest queued frame.
+- `coalesce` keeps at most one queued frame per cluster, replacing it with
+  the newest status, and only then discards the oldest frame.
+"""
+
+import asyncio
+import itertools
+import logging
+import os
+import time
+from collections import OrderedDict
+
+WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "100"))
+WS_OVERFLOW_POLICY = os.getenv("WS_OVERFLOW_POLICY", "drop_oldest")
+WS_SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", "5"))
+
+OVERFLOW_POLICIES = ("drop_oldest", "coalesce")
+
+logger = logging.getLogger(__name__)
+
+_sequence = itertools.count()
+
+
+class ConnectionWriter:
+    """Bounded outbound queue drained by one writer task per websocket."""
+
+    def __init__(
+        self,
+        websocket,
+        maxsize=WS_SEND_QUEUE_SIZE,
+        policy=WS_OVERFLOW_POLICY,
+        send_timeout=WS_SEND_TIMEOUT,
+        metrics=None,
+        on_sent=None,
+        on_failed=None,
+    ):
+        """Initialize a ConnectionWriter.
+
+        Args:
+            websocket (WebSocket): Accepted connection to write to.
+            maxsize (int): Maximum number of queued frames.
+            policy (str): Overflow policy, `drop_oldest` or `coalesce`.
+            send_timeout (float): Seconds one send may take before the
+                connection is considered dead.
+            metrics (LatencyMetrics): Optional recorder of send latency.
+            on_sent (Callable[[], None]): Called after every successful send.
+            on_failed (Callable[[Exception], Awaitable]): Called once when a
+                send fails or times out; the writer stops afterwards.
+        """
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown websocket overflow policy {policy}")
+        self.websocket = websocket
+        self.maxsize = maxsize
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self.metrics = metrics
+        self.on_sent = on_sent
+        self.on_failed = on_failed
+        self.dropped = 0
+        self.coalesced = 0
+        self._pending = OrderedDict()
+        self._ready = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._drained.set()
+        self._task = None
+
+    def __len__(self):
+        """Return the number of queued frames."""
+        return len(self._pending)
+
+    def start(self):
+        """Start the writer task."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop the writer task, discarding frames not yet sent."""
+        task, self._task = self._task, None
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._pending.clear()
+        self._drained.set()
+
+    async def drain(self, timeout):
+        """Wait up to `timeout` seconds for the queued frames to be sent."""
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._drained.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def enqueue(self, text, cluster_id=None):
+        """
+        Queue a serialized frame without waiting on the network.
+
+        Under the `coalesce` policy a frame for `cluster_id` replaces the one
+        already queued for that cluster, keeping its place in the queue.
+        """
+        if self.policy == "coalesce" and cluster_id is not None:
+            key = ("cluster", cluster_id)
+            if key in self._pending:
+                self._pending[key] = text
+                self.coalesced += 1
+                return
+        else:
+            key = ("frame", next(_sequence))
+        if len(self._pending) >= self.maxsize:
+            self._pending.popitem(last=False)
+            self.dropped += 1
+        self._pending[key] = text
+        self._drained.clear()
+        self._ready.set()
+
+    async def _run(self):
+        """Send queued frames in order until stopped or a send fails."""
+        while True:
+            await self._ready.wait()
+            while self._pending:
+                _, text = self._pending.popitem(last=False)
+                started = time.perf_counter()
+                try:
+                    await self._send(text)
+                except Exception as e:
+                    self._record(started, False)
+                    self._task = None
+                    self._pending.clear()
+                    self._drained.set()
+                    if self.on_failed is not None:
+                        await self.on_failed(e)
+                    return
+                self._record(started, True)
+                if self.on_sent is not None:
+                    self.on_sent()
+            self._ready.clear()
+            self._drained.set()
+
+    async def _send(self, text):
+        """Send one frame, raising asyncio.TimeoutError after send_timeout."""
+        # asyncio.wait_for can swallow a cancellation that races with the
+        # send completing, which would leave this task running on shutdown
+        send = asyncio.ensure_future(self.websocket.send_text(text))
+        try:
+            done, _ = await asyncio.wait({send}, timeout=self.send_timeout)
+        except asyncio.CancelledError:
+            send.cancel()
+            raise
+        if not done:
+            send.cancel()
+            raise asyncio.TimeoutError()
+        send.result()
+
+    def _record(self, started, ok):
+        """Record the latency of one send."""
+        if self.metrics is not None:
+            self.metrics.record("send", time.perf_counter() - started, ok)
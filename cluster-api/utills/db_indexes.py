@@ -0,0 +1,136 @@
+"""
+Index management for the Mongo collections used on hot paths.
+
+The required indexes are declared in INDEX_PLAN and reconciled at startup
+on a background task, so the API is ready to serve while a missing index
+is being built. Once the indexes exist the query plan of every hot query is
+logged at debug level, which makes collection scans visible early.
+"""
+
+import asyncio
+import logging
+
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+INDEX_PLAN = {
+    "cluster": [
+        IndexModel([("name", ASCENDING)], name="name_unique", unique=True),
+        IndexModel(
+            [("user_id", ASCENDING), ("created", ASCENDING), ("_id", ASCENDING)],
+            name="user_id_created_id",
+        ),
+    ],
+    "user": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+    "hostCluster": [
+        IndexModel([("region", ASCENDING)], name="region"),
+    ],
+    "outbox": [
+        IndexModel([("created", ASCENDING), ("_id", ASCENDING)], name="created_id"),
+        IndexModel(
+            [("next_attempt", ASCENDING), ("key", ASCENDING)],
+            name="next_attempt_key",
+        ),
+    ],
+}
+
+# (collection, filter, sort) of the queries that run on every request or
+# on every page load.
+HOT_QUERIES = [
+    ("cluster", {"name": ""}, None),
+    ("cluster", {"user_id": ""}, {"created": -1, "_id": -1}),
+    ("user", {"email": ""}, None),
+    ("hostCluster", {"region": ""}, None),
+    ("outbox", {}, {"created": 1, "_id": 1}),
+    ("outbox", {"next_attempt": {"$gt": ""}}, None),
+]
+
+
+async def missing_indexes(collection, indexes):
+    """Return the indexes from `indexes` whose key pattern `collection` lacks."""
+    existing = {
+        tuple(tuple(key) for key in info["key"])
+        for info in (await collection.index_information()).values()
+    }
+    return [
+        index
+        for index in indexes
+        if tuple(index.document["key"].items()) not in existing
+    ]
+
+
+async def reconcile_indexes(database, plan=INDEX_PLAN):
+    """
+    Create every index in `plan` that does not exist yet.
+
+    Indexes are compared by key pattern, so an equivalent index created by
+    hand under another name is left alone. A failure on one collection, such
+    as duplicate values blocking a unique index, is logged and does not stop
+    the others. Returns the names of the indexes created.
+    """
+    created = []
+    for collection_name, indexes in plan.items():
+        collection = database[collection_name]
+        try:
+            missing = await missing_indexes(collection, indexes)
+            if missing:
+                created.extend(await collection.create_indexes(missing))
+        except PyMongoError as e:
+            logger.error(
+                "Failed to create indexes on %s :: %s", collection_name, str(e)
+            )
+    if created:
+        logger.info("Created indexes: %s", ", ".join(created))
+    return created
+
+
+def summarize_plan(stage):
+    """Return the stages of a winning plan as 'FETCH > IXSCAN(name_unique)'."""
+    stages = []
+    while stage:
+        label = stage["stage"]
+        if "indexName" in stage:
+            label = f"{label}({stage['indexName']})"
+        stages.append(label)
+        stage = stage.get("inputStage") or (stage.get("inputStages") or [None])[0]
+    return " > ".join(stages)
+
+
+async def log_query_plans(database, queries=HOT_QUERIES):
+    """Log the winning plan of each hot query at debug level."""
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    for collection_name, query, sort in queries:
+        find = {"find": collection_name, "filter": query}
+        if sort:
+            find["sort"] = sort
+        try:
+            explain = await database.command("explain", find, verbosity="queryPlanner")
+        except PyMongoError as e:
+            logger.debug("Explain failed for %s %s :: %s", collection_name, query, e)
+            continue
+        plan = summarize_plan(explain["queryPlanner"]["winningPlan"])
+        logger.debug(
+            "Query plan for %s filter=%s sort=%s :: %s",
+            collection_name,
+            list(query),
+            sort,
+            plan,
+        )
+
+
+def start_index_reconciler(database):
+    """Reconcile indexes and log hot query plans on a background task."""
+
+    async def run():
+        try:
+            await reconcile_indexes(database)
+            await log_query_plans(database)
+        except Exception as e:
+            logger.error("Index reconciliation failed :: %s", str(e))
+
+    return asyncio.get_running_loop().create_task(run())
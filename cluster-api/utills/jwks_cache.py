@@ -0,0 +1,80 @@
+"""
+Cache of the Keycloak realm signing keys.
+
+The JSON Web Key Set is fetched once and kept for a TTL, so verifying a
+token is a local signature check instead of a round-trip to Keycloak. A
+token signed with an unknown `kid` triggers an early refresh, which picks
+up rotated keys; refreshes are rate limited so forged `kid` values cannot
+turn into a flood of requests against Keycloak.
+"""
+
+import logging
+import threading
+import time
+
+
+class JWKSCache:
+    """Thread-safe, TTL-bound cache of signing keys indexed by `kid`."""
+
+    def __init__(self, fetch, ttl, min_refresh_interval=30, timer=time.monotonic):
+        """Initialize a JWKSCache.
+
+        Args:
+            fetch (Callable[[], dict]): Returns the JWKS document, e.g.
+                `KeycloakOpenID.certs`.
+            ttl (float): Seconds a fetched key set stays valid.
+            min_refresh_interval (float): Minimum seconds between two fetches
+                triggered by an unknown `kid`.
+            timer (Callable[[], float]): Monotonic clock, replaceable in tests.
+        """
+        self.fetch = fetch
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self.timer = timer
+        self._keys = {}
+        self._expires_at = 0.0
+        self._fetched_at = None
+        self._lock = threading.Lock()
+
+    def get(self, kid):
+        """Return the JWK for `kid`, or None if Keycloak does not know it."""
+        with self._lock:
+            now = self.timer()
+            if now >= self._expires_at:
+                self._refresh(now)
+            elif kid not in self._keys and self._can_refresh(now):
+                logging.info("Unknown signing key %s, refreshing JWKS", kid)
+                self._refresh(now)
+            return self._keys.get(kid)
+
+    def invalidate(self):
+        """Drop the cached keys so the next lookup fetches them again."""
+        with self._lock:
+            self._keys = {}
+            self._expires_at = 0.0
+            self._fetched_at = None
+
+    def _can_refresh(self, now):
+        """Return True if an unknown-kid refresh is allowed at `now`."""
+        return (
+            self._fetched_at is None
+            or now - self._fetched_at >= self.min_refresh_interval
+        )
+
+    def _refresh(self, now):
+        """Fetch the key set, keeping the previous keys if the fetch fails."""
+        self._fetched_at = now
+        try:
+            jwks = self.fetch()
+        except Exception as e:
+            if not self._keys:
+                raise
+            logging.warning("JWKS refresh failed, keeping cached keys :: %s", e)
+            self._expires_at = now + self.min_refresh_interval
+            return
+        self._keys = {
+            key["kid"]: key
+            for key in jwks.get("keys", [])
+            if "kid" in key and key.get("use", "sig") == "sig"
+        }
+        self._expires_at = now + self.ttl
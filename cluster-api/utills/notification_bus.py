@@ -0,0 +1,199 @@
+"""
+Notification bus for websocket messages.
+
+A websocket is held by one worker process, but the request that produces a
+notification may be served by any worker or replica. Notifications are
+therefore published on a bus that every worker subscribes to, and each
+worker delivers them only to the connections it holds.
+
+Two backends are available, selected with NOTIFICATION_BUS:
+
+- `local` delivers in-process. It is the default for a single worker and
+  the stand-in used in tests.
+- `dapr` publishes through the Dapr sidecar and receives over a streaming
+  subscription. Every worker subscribes with its own consumer ID, so each
+  one gets a copy of every notification. The NOTIFICATION_PUBSUB component
+  keeps those queues non-durable and deletes them when their worker
+  disconnects, so restarts do not leave orphaned queues behind.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import queue
+import socket
+import threading
+
+from dapr.clients import DaprClient
+from dapr.proto import api_v1, appcallback_v1
+from fastapi.concurrency import run_in_threadpool
+from utills.dapr_publisher import sidecar_stub
+
+NOTIFICATION_BUS = os.getenv("NOTIFICATION_BUS", "local")
+NOTIFICATION_PUBSUB = os.getenv("NOTIFICATION_PUBSUB", "notificationbus")
+NOTIFICATION_TOPIC = os.getenv("NOTIFICATION_TOPIC", "cluster-notifications")
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class LocalNotificationBus:
+    """Delivers notifications to the subscriber of this process only."""
+
+    def __init__(self):
+        """Initialize a LocalNotificationBus."""
+        self._handler = None
+
+    async def start(self, handler):
+        """Deliver every published notification to `handler`."""
+        self._handler = handler
+
+    async def stop(self):
+        """Stop delivering notifications."""
+        self._handler = None
+
+    async def publish(self, notification):
+        """Deliver `notification` and return the handler's result."""
+        if self._handler is None:
+            return False
+        return await self._handler(notification)
+
+
+class DaprNotificationBus:
+    """Fans notifications out to every worker through Dapr pub/sub."""
+
+    def __init__(
+        self,
+        publisher,
+        pubsub_name=NOTIFICATION_PUBSUB,
+        topic_name=NOTIFICATION_TOPIC,
+        consumer_id=None,
+        reconnect_delay=1.0,
+        client_factory=DaprClient,
+    ):
+        """Initialize a DaprNotificationBus.
+
+        Args:
+            publisher (DaprPublisher): Shared publisher used to send.
+            pubsub_name (str): Dapr pub/sub component to use; it should
+                create non-durable, auto-deleted queues.
+            topic_name (str): Topic carrying the notifications.
+            consumer_id (str): Consumer ID of this worker's subscription;
+                defaults to one unique per process, whose queue is removed
+                when the process disconnects.
+            reconnect_delay (float): Seconds to wait before re-subscribing
+                after the stream breaks.
+            client_factory (Callable[[], DaprClient]): Creates the client
+                holding the subscription stream.
+        """
+        self.publisher = publisher
+        self.pubsub_name = pubsub_name
+        self.topic_name = topic_name
+        self.consumer_id = consumer_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.reconnect_delay = reconnect_delay
+        self.client_factory = client_factory
+        self._handler = None
+        self._loop = None
+        self._thread = None
+        self._call = None
+        self._stopped = threading.Event()
+
+    async def start(self, handler):
+        """Subscribe and deliver every received notification to `handler`."""
+        self._handler = handler
+        self._loop = asyncio.get_running_loop()
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="notification-bus", daemon=True
+        )
+        self._thread.start()
+
+    async def stop(self):
+        """Close the subscription stream."""
+        self._stopped.set()
+        call = self._call
+        if call is not None:
+            call.cancel()
+        if self._thread is not None:
+            await run_in_threadpool(self._thread.join, 5.0)
+            self._thread = None
+
+    async def publish(self, notification):
+        """Publish `notification` to every worker; return True once accepted."""
+        await run_in_threadpool(
+            self.publisher.publish,
+            self.topic_name,
+            notification,
+            self.pubsub_name,
+        )
+        return True
+
+    def _run(self):
+        """Keep a subscription open until stopped, re-subscribing on errors."""
+        while not self._stopped.is_set():
+            try:
+                self._subscribe()
+            except Exception as e:
+                if self._stopped.is_set():
+                    return
+                logger.warning("Notification subscription broke :: %s", str(e))
+            self._stopped.wait(self.reconnect_delay)
+
+    def _subscribe(self):
+        """Stream events from the sidecar and hand them to the event loop."""
+        acks = queue.Queue()
+
+        def requests():
+            yield api_v1.SubscribeTopicEventsRequestAlpha1(
+                initial_request=api_v1.SubscribeTopicEventsRequestInitialAlpha1(
+                    pubsub_name=self.pubsub_name,
+                    topic=self.topic_name,
+                    metadata={"consumerID": self.consumer_id},
+                )
+            )
+            while True:
+                ack = acks.get()
+                if ack is _STOP:
+                    return
+                yield ack
+
+        client = self.client_factory()
+        try:
+            self._call = sidecar_stub(client).SubscribeTopicEventsAlpha1(requests())
+            logger.info("Subscribed to %s as %s", self.topic_name, self.consumer_id)
+            for response in self._call:
+                if not response.HasField("event_message"):
+                    continue
+                event = response.event_message
+                acks.put(self._deliver(event))
+        finally:
+            acks.put(_STOP)
+            self._call = None
+            client.close()
+
+    def _deliver(self, event):
+        """Schedule delivery of one event and return its acknowledgement."""
+        result = appcallback_v1.TopicEventResponse.SUCCESS
+        try:
+            notification = json.loads(event.data)
+            asyncio.run_coroutine_threadsafe(self._handler(notification), self._loop)
+        except ValueError as e:
+            logger.error("Dropping malformed notification %s :: %s", event.id, e)
+            result = appcallback_v1.TopicEventResponse.DROP
+        return api_v1.SubscribeTopicEventsRequestAlpha1(
+            event_processed=api_v1.SubscribeTopicEventsRequestProcessedAlpha1(
+                id=event.id,
+                status=appcallback_v1.TopicEventResponse(status=result),
+            )
+        )
+
+
+def create_notification_bus(publisher, backend=NOTIFICATION_BUS):
+    """Return the notification bus selected by `backend`."""
+    if backend == "dapr":
+        return DaprNotificationBus(publisher)
+    if backend != "local":
+        raise ValueError(f"Unknown notification bus backend {backend}")
+    return LocalNotificationBus()
@@ -0,0 +1,329 @@
+"""
+Transactional outbox for cluster lifecycle events.
+
+Route handlers record the event in the `outbox` collection in the same
+Mongo transaction as the state change it describes, so a cluster is never
+deleted without its delete event and an event is never sent for a write
+that was rolled back. A background dispatcher drains the outbox in batches
+through the Dapr bulk publish API and removes what was accepted.
+
+Events that share a key (the cluster id) are published in the order they
+were written: a batch carries at most one event per key, and a key whose
+event failed is held back until that event goes through. An event that
+still fails after OUTBOX_MAX_ATTEMPTS is moved to the `outbox_dead_letter`
+collection, releasing the events queued behind it.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+from fastapi.concurrency import run_in_threadpool
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+OUTBOX_COLLECTION = "outbox"
+DEAD_LETTER_COLLECTION = "outbox_dead_letter"
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "1"))
+OUTBOX_LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", "30"))
+OUTBOX_MAX_BACKOFF = float(os.getenv("OUTBOX_MAX_BACKOFF", "60"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10"))
+
+LEASE_ID = "outbox-dispatcher"
+
+logger = logging.getLogger(__name__)
+
+
+def outbox_event(topic_name, payload, key):
+    """Return the outbox document of one event for `topic_name`."""
+    return {
+        "_id": str(uuid.uuid4()),
+        "key": key,
+        "topic": topic_name,
+        "payload": payload,
+        "created": datetime.utcnow(),
+        "attempts": 0,
+        "next_attempt": None,
+    }
+
+
+def _take(event, seen, now):
+    """Return True if `event` is the first due event of a key not yet seen."""
+    key = event["key"]
+    if key in seen:
+        return False
+    seen.add(key)
+    return event.get("next_attempt") is None or event["next_attempt"] <= now
+
+
+def next_batch(events, now, limit=None, blocked=()):
+    """
+    Pick the events to publish from `events`, oldest first.
+
+    At most one event per key is taken, and none for a key in `blocked` or
+    whose oldest event is still waiting for its retry, so per-key order is
+    kept. Skipped events do not count towards `limit`.
+    """
+    seen = set(blocked)
+    batch = []
+    for event in events:
+        if _take(event, seen, now):
+            batch.append(event)
+            if limit is not None and len(batch) >= limit:
+                break
+    return batch
+
+
+def retry_delay(attempts, base, max_backoff):
+    """Return the seconds to wait before retrying after `attempts` failures."""
+    return min(max_backoff, base * (2**attempts))
+
+
+class OutboxTransaction:
+    """State changes and events written together by `Outbox.transaction`."""
+
+    def __init__(self, session):
+        """Initialize an OutboxTransaction bound to a Mongo `session`."""
+        self.session = session
+        self.events = []
+
+    def publish(self, topic_name, payload, key):
+        """Record an event to be published once the transaction commits."""
+        self.events.append(outbox_event(topic_name, payload, key))
+
+
+class Outbox:
+    """Writes lifecycle events to Mongo and publishes them in the background."""
+
+    def __init__(
+        self,
+        client,
+        database,
+        publisher,
+        batch_size=OUTBOX_BATCH_SIZE,
+        poll_interval=OUTBOX_POLL_INTERVAL,
+        lease_seconds=OUTBOX_LEASE_SECONDS,
+        max_backoff=OUTBOX_MAX_BACKOFF,
+        max_attempts=OUTBOX_MAX_ATTEMPTS,
+    ):
+        """Initialize an Outbox.
+
+        Args:
+            client (AsyncIOMotorClient): Client used to open sessions.
+            database (AsyncIOMotorDatabase): Database holding the outbox.
+            publisher (DaprPublisher): Publisher used to send the batches.
+            batch_size (int): Maximum number of events read per round.
+            poll_interval (float): Seconds between two polls when idle.
+            lease_seconds (int): How long one replica keeps the dispatcher
+                lease, so only one replica publishes at a time.
+            max_backoff (float): Upper bound in seconds of the retry delay.
+            max_attempts (int): Publish attempts before an event is moved
+                to the dead-letter collection.
+        """
+        self.client = client
+        self.collection = database[OUTBOX_COLLECTION]
+        self.dead_letter = database[DEAD_LETTER_COLLECTION]
+        self.leases = database["lease"]
+        self.publisher = publisher
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+        self.owner = f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+        self.transactions = False
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    async def start(self):
+        """Detect transaction support and start the dispatcher task."""
+        try:
+            hello = await self.client.admin.command("hello")
+            # Transactions need a replica set member or a mongos router
+            self.transactions = "setName" in hello or hello.get("msg") == "isdbgrid"
+        except PyMongoError as e:
+            logger.warning("Could not detect transaction support :: %s", str(e))
+        if not self.transactions:
+            logger.warning(
+                "MongoDB does not support transactions, outbox events are "
+                "written right after the state change"
+            )
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop the dispatcher task; undelivered events stay in the outbox."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @asynccontextmanager
+    async def transaction(self):
+        """
+        Run the writes of a block and its events in one transaction.
+
+        Pass `tx.session` to every write in the block and record events with
+        `tx.publish`. On a standalone MongoDB, which has no transactions, the
+        writes run without a session and the events are inserted right after
+        the block succeeds.
+        """
+        if not self.transactions:
+            tx = OutboxTransaction(None)
+            yield tx
+            if tx.events:
+                await self.collection.insert_many(tx.events)
+                self._wakeup.set()
+            return
+        async with await self.client.start_session() as session:
+            async with session.start_transaction():
+                tx = OutboxTransaction(session)
+                yield tx
+                if tx.events:
+                    await self.collection.insert_many(tx.events, session=session)
+        if tx.events:
+            self._wakeup.set()
+
+    async def _acquire_lease(self):
+        """Take or renew the dispatcher lease; return True if this replica holds it."""
+        now = datetime.utcnow()
+        try:
+            await self.leases.find_one_and_update(
+                {
+                    "_id": LEASE_ID,
+                    "$or": [{"owner": self.owner}, {"expires": {"$lt": now}}],
+                },
+                {
+                    "$set": {
+                        "owner": self.owner,
+                        "expires": now + timedelta(seconds=self.lease_seconds),
+                    }
+                },
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+            return True
+        except DuplicateKeyError:
+            # Another replica holds an unexpired lease
+            return False
+
+    async def _pending(self, now):
+        """
+        Return the next batch of events to publish.
+
+        Keys whose oldest event is backing off are excluded in the query, and
+        the cursor keeps reading past later events of keys already taken, so
+        neither fills the batch with events that cannot be sent.
+        """
+        blocked = await self.collection.distinct("key", {"next_attempt": {"$gt": now}})
+        cursor = self.collection.find(
+            {
+                "key": {"$nin": blocked},
+                "$or": [{"next_attempt": None}, {"next_attempt": {"$lte": now}}],
+            }
+        ).sort([("created", 1), ("_id", 1)])
+        seen = set(blocked)
+        batch = []
+        try:
+            async for event in cursor:
+                if _take(event, seen, now):
+                    batch.append(event)
+                    if len(batch) >= self.batch_size:
+                        break
+        finally:
+            await cursor.close()
+        return batch
+
+    async def dispatch_once(self):
+        """Publish one round of pending events; return how many were sent."""
+        batch = await self._pending(datetime.utcnow())
+        by_topic = {}
+        for event in batch:
+            by_topic.setdefault(event["topic"], []).append(event)
+
+        sent = []
+        failed = []
+        for topic_name, topic_events in by_topic.items():
+            error = "rejected by the sidecar"
+            try:
+                failed_indexes = await run_in_threadpool(
+                    self.publisher.publish_bulk,
+                    topic_name,
+                    [event["payload"] for event in topic_events],
+                )
+            except Exception as e:
+                logger.error("Failed to publish to %s :: %s", topic_name, str(e))
+                failed_indexes = range(len(topic_events))
+                error = str(e)
+            failed_indexes = set(failed_indexes)
+            for index, event in enumerate(topic_events):
+                if index in failed_indexes:
+                    failed.append((event, error))
+                else:
+                    sent.append(event)
+
+        if sent:
+            await self.collection.delete_many(
+                {"_id": {"$in": [event["_id"] for event in sent]}}
+            )
+        for event, error in failed:
+            await self._record_failure(event, error)
+        if failed:
+            logger.warning("Outbox publish failed for %d events", len(failed))
+        return len(sent)
+
+    async def _record_failure(self, event, error):
+        """Schedule the retry of a failed event, or dead-letter it."""
+        attempts = event["attempts"] + 1
+        now = datetime.utcnow()
+        if attempts >= self.max_attempts:
+            logger.error(
+                "Moving outbox event %s for %s to %s after %d attempts :: %s",
+                event["_id"],
+                event["topic"],
+                DEAD_LETTER_COLLECTION,
+                attempts,
+                error,
+            )
+            await self.dead_letter.insert_one(
+                {**event, "attempts": attempts, "failed": now, "error": error}
+            )
+            await self.collection.delete_one({"_id": event["_id"]})
+            return
+        delay = retry_delay(attempts, self.poll_interval, self.max_backoff)
+        await self.collection.update_one(
+            {"_id": event["_id"]},
+            {
+                "$set": {
+                    "attempts": attempts,
+                    "next_attempt": now + timedelta(seconds=delay),
+                }
+            },
+        )
+
+    async def _run(self):
+        """Drain the outbox while holding the lease, waking on new events."""
+        while True:
+            sent = 0
+            try:
+                # While the sidecar is down every publish would fail and
+                # push the events towards the dead-letter collection
+                if self.publisher.is_healthy and await self._acquire_lease():
+                    sent = await self.dispatch_once()
+            except Exception as e:
+                logger.error("Outbox dispatch failed :: %s", str(e))
+            if sent:
+                # More events may be waiting behind the ones just sent
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
@@ -6,7 +6,7 @@ clusters, and kube versions for development or testing purposes.
 """
 
 
-def seed_db(db):
+async def seed_db(db):
     """
     Seed the database with initial test data.
 
@@ -40,7 +40,7 @@ def seed_db(db):
             "updated": "2022-01-01T00:00:00.000Z",
         },
     ]
-    db["hostCluster"].insert_many(host_clusters)
+    await db["hostCluster"].insert_many(host_clusters)
 
     # Seed user collection
     users = [
@@ -57,7 +57,7 @@ def seed_db(db):
             "userName": "johndoe",
         },
     ]
-    db["user"].insert_many(users)
+    await db["user"].insert_many(users)
 
     # Seed subscription collection
     subscriptions = [
@@ -90,7 +90,7 @@ def seed_db(db):
             "updated": "2022-01-01T00:00:00.000Z",
         },
     ]
-    db["subscription"].insert_many(subscriptions)
+    await db["subscription"].insert_many(subscriptions)
 
     # Seed cluster collection
     clusters = [
@@ -117,7 +117,7 @@ def seed_db(db):
             "updated": "2022-01-01T00:00:00.000Z",
         },
     ]
-    db["cluster"].insert_many(clusters)
+    await db["cluster"].insert_many(clusters)
 
     # Seed kubeversion collection
     kube_versions = [
@@ -134,4 +134,4 @@ def seed_db(db):
             "kube_version": "v1.26.0",
         },
     ]
-    db["kubeversion"].insert_many(kube_versions)
+    await db["kubeversion"].insert_many(kube_versions)
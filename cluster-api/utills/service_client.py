@@ -0,0 +1,159 @@
+"""
+Shared HTTP client for calls from cluster-api to cluster-service.
+
+One keep-alive connection pool is created at startup and reused by every
+request. Calls have connect and read timeouts, idempotent calls are retried
+with jittered exponential backoff, and the latency of every call is recorded
+per path so slow dependencies are visible.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+
+import httpx
+
+SERVICE_URL = os.getenv("SERVICE_URL", "")
+SERVICE_CONNECT_TIMEOUT = float(os.getenv("SERVICE_CONNECT_TIMEOUT", "2"))
+SERVICE_READ_TIMEOUT = float(os.getenv("SERVICE_READ_TIMEOUT", "30"))
+SERVICE_MAX_CONNECTIONS = int(os.getenv("SERVICE_MAX_CONNECTIONS", "100"))
+SERVICE_MAX_KEEPALIVE = int(os.getenv("SERVICE_MAX_KEEPALIVE", "20"))
+SERVICE_RETRIES = int(os.getenv("SERVICE_RETRIES", "2"))
+
+RETRYABLE_STATUS_CODES = {502, 503, 504}
+
+logger = logging.getLogger(__name__)
+
+
+def percentile(sorted_values, pct):
+    """Return the pct-th percentile of an already sorted, non-empty list."""
+    index = min(
+        len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1)))
+    )
+    return sorted_values[index]
+
+
+class LatencyMetrics:
+    """Per-path call counts, error counts and recent latency samples."""
+
+    def __init__(self, window=1000):
+        """Keep the last `window` latency samples of every path."""
+        self.window = window
+        self._samples = {}
+        self._counts = {}
+        self._errors = {}
+        self._lock = threading.Lock()
+
+    def record(self, path, seconds, ok):
+        """Record one call to `path` that took `seconds`."""
+        with self._lock:
+            samples = self._samples.get(path)
+            if samples is None:
+                samples = self._samples[path] = deque(maxlen=self.window)
+            samples.append(seconds)
+            self._counts[path] = self._counts.get(path, 0) + 1
+            if not ok:
+                self._errors[path] = self._errors.get(path, 0) + 1
+
+    def snapshot(self):
+        """Return counts and p50/p90/p99 latency in milliseconds per path."""
+        with self._lock:
+            samples = {path: sorted(values) for path, values in self._samples.items()}
+            counts = dict(self._counts)
+            errors = dict(self._errors)
+        return {
+            path: {
+                "count": counts[path],
+                "errors": errors.get(path, 0),
+                "p50_ms": round(percentile(values, 50) * 1000, 2),
+                "p90_ms": round(percentile(values, 90) * 1000, 2),
+                "p99_ms": round(percentile(values, 99) * 1000, 2),
+            }
+            for path, values in samples.items()
+        }
+
+
+class ServiceClient:
+    """Pooled async HTTP client bound to the cluster-service URL."""
+
+    def __init__(
+        self,
+        base_url=SERVICE_URL,
+        retries=SERVICE_RETRIES,
+        backoff=0.2,
+        transport=None,
+    ):
+        """Initialize a ServiceClient.
+
+        Args:
+            base_url (str): Base URL of cluster-service.
+            retries (int): Extra attempts for idempotent calls.
+            backoff (float): Base delay in seconds of the retry backoff.
+            transport (httpx.AsyncBaseTransport): Optional transport, e.g. a
+                mock in tests.
+        """
+        self.retries = retries
+        self.backoff = backoff
+        self.metrics = LatencyMetrics()
+        options = {
+            "base_url": base_url,
+            "timeout": httpx.Timeout(
+                SERVICE_READ_TIMEOUT, connect=SERVICE_CONNECT_TIMEOUT
+            ),
+            "limits": httpx.Limits(
+                max_connections=SERVICE_MAX_CONNECTIONS,
+                max_keepalive_connections=SERVICE_MAX_KEEPALIVE,
+            ),
+        }
+        self._client = httpx.AsyncClient(transport=transport, **options)
+
+    def _delay(self, attempt):
+        """Return a full-jitter backoff delay for retry number `attempt`."""
+        return random.uniform(0, self.backoff * (2**attempt))
+
+    def _should_retry(self, attempt, idempotent, response=None):
+        """Return True if a failed attempt may be retried."""
+        if not idempotent or attempt >= self.retries:
+            return False
+        return response is None or response.status_code in RETRYABLE_STATUS_CODES
+
+    def _record(self, path, started, response):
+        """Record the latency and outcome of one attempt."""
+        ok = response is not None and response.status_code < 500
+        self.metrics.record(path, time.perf_counter() - started, ok)
+
+    async def apost(self, path, json=None, idempotent=False, timeout=None):
+        """
+        POST `json` to `path` and return the response.
+
+        Set `idempotent` for calls that are safe to repeat; they are retried
+        on connection errors, timeouts and 502/503/504 responses.
+        """
+        kwargs = {"json": json}
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            response = None
+            try:
+                response = await self._client.post(path, **kwargs)
+            except httpx.TransportError as e:
+                self._record(path, started, None)
+                if not self._should_retry(attempt, idempotent):
+                    raise
+                logger.warning("POST %s failed, retrying :: %s", path, str(e))
+            else:
+                self._record(path, started, response)
+                if not self._should_retry(attempt, idempotent, response):
+                    return response
+            await asyncio.sleep(self._delay(attempt))
+            attempt += 1
+
+    async def aclose(self):
+        """Close the connection pool."""
+        await self._client.aclose()
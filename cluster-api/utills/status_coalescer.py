@@ -0,0 +1,61 @@
+"""
+Coalescing window for cluster status pushes.
+
+The cluster-status controller reports every pod update, so a cluster that
+is churning produces bursts of nearly identical status events. Events are
+held per user for WS_COALESCE_WINDOW_MS; within the window only the latest
+status of each cluster is kept, and the window is flushed as one frame.
+"""
+
+import asyncio
+import os
+
+WS_COALESCE_WINDOW_MS = int(os.getenv("WS_COALESCE_WINDOW_MS", "200"))
+
+
+class StatusCoalescer:
+    """Per-(user, cluster) latest-status buffer flushed once per window."""
+
+    def __init__(self, flush, window=WS_COALESCE_WINDOW_MS / 1000):
+        """Initialize a StatusCoalescer.
+
+        Args:
+            flush (Callable[[str, list], None]): Called with the user ID and
+                the latest status message of each cluster, in the order the
+                clusters were first seen in the window.
+            window (float): Seconds events are held; 0 flushes every event
+                immediately.
+        """
+        self.flush = flush
+        self.window = window
+        self.received = 0
+        self.flushed = 0
+        self._pending = {}
+        self._timers = {}
+
+    def add(self, user_id, cluster_id, message):
+        """Buffer `message` as the latest status of `cluster_id` for `user_id`."""
+        self.received += 1
+        if self.window <= 0:
+            self.flushed += 1
+            self.flush(user_id, [message])
+            return
+        self._pending.setdefault(user_id, {})[cluster_id] = message
+        if user_id not in self._timers:
+            self._timers[user_id] = asyncio.get_running_loop().call_later(
+                self.window, self._flush, user_id
+            )
+
+    def flush_all(self):
+        """Flush every open window now."""
+        for user_id in list(self._timers):
+            self._timers[user_id].cancel()
+            self._flush(user_id)
+
+    def _flush(self, user_id):
+        """Hand the buffered statuses of `user_id` to the flush callback."""
+        self._timers.pop(user_id, None)
+        messages = list(self._pending.pop(user_id, {}).values())
+        if messages:
+            self.flushed += len(messages)
+            self.flush(user_id, messages)
@@ -0,0 +1,83 @@
+"""
+Micro-benchmark for vcluster manifest generation.
+
+Compares rendering the YAML text templates and parsing them back with
+`yaml.safe_load` against the dictionary builders used on the create path:
+
+    python benchmarks/bench_manifests.py --iterations 2000
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.models.subscription import Subscription  # noqa: E402
+from src.utils.cluster_utils import (  # noqa: E402
+    build_ingress_manifest,
+    build_vcluster_manifests,
+)
+from tests.yaml_templates import (  # noqa: E402
+    generate_cluster_yaml,
+    generate_resource_quota_yaml,
+    generate_vclusterYaml,
+)
+
+NAME = "demo"
+NAMESPACE = "demo-vcluster"
+HOST = "demo.host-cluster.example.com"
+KUBE_VERSION = "v1.29.0"
+SUBSCRIPTION = Subscription("basic", 10, 5, 5, 5, 5, 10, 1, 1)
+
+
+def template_path():
+    """Build the manifests by rendering and parsing the YAML templates."""
+    return [
+        yaml.safe_load(generate_cluster_yaml(name=NAME, namespace=NAMESPACE)),
+        yaml.safe_load(
+            generate_vclusterYaml(
+                name=NAME, namespace=NAMESPACE, host=HOST, kube_version=KUBE_VERSION
+            )
+        ),
+        yaml.safe_load(
+            generate_resource_quota_yaml(subscription=SUBSCRIPTION, namespace=NAMESPACE)
+        ),
+        build_ingress_manifest(name=NAME, namespace=NAMESPACE, host=HOST),
+    ]
+
+
+def builder_path():
+    """Build the manifests with the precompiled dictionary builders."""
+    return build_vcluster_manifests(
+        name=NAME,
+        namespace=NAMESPACE,
+        host=HOST,
+        kube_version=KUBE_VERSION,
+        subscription=SUBSCRIPTION,
+    )
+
+
+def main():
+    """Run both paths and print the per-create cost and speed-up."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if template_path() != builder_path():
+        sys.exit("template and builder manifests differ")
+
+    results = {}
+    for label, func in (("template", template_path), ("builder", builder_path)):
+        best = min(timeit.repeat(func, number=args.iterations, repeat=args.repeat))
+        results[label] = best / args.iterations
+        print(f"{label:<10} {results[label] * 1e6:10.1f} us/create")
+    print(f"speed-up   {results['template'] / results['builder']:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+r"""
+Load benchmark for cluster-service routes.
+
+Sends concurrent POST requests to a running instance and reports requests
+per second and latency percentiles, for example to compare the Flask
+development server with the gunicorn configuration:
+
+    python main.py                              # terminal 1, or
+    gunicorn -c gunicorn.conf.py main:app       # terminal 1
+    python benchmarks/bench_routes.py --route cluster-check \
+        --host-cluster-id <id> --concurrency 32 --requests 2000
+"""
+
+import argparse
+import json
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def build_payload(args):
+    """Return the path and JSON body for the selected route."""
+    if args.route == "cluster-check":
+        return "/cluster-check", {"host_cluster_ids": args.host_cluster_id}
+    return "/host-cluster/cluster/status", {
+        "name": args.cluster_name,
+        "hostClusterId": args.host_cluster_id[0],
+    }
+
+
+def send(url, body, timeout):
+    """Send one request and return (latency in seconds, HTTP status)."""
+    request = urllib.request.Request(
+        url, data=body, headers={"Content-Type": "application/json"}, method="POST"
+    )
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except Exception:
+        status = 0
+    return time.perf_counter() - started, status
+
+
+def percentile(sorted_values, pct):
+    """Return the pct-th percentile of an already sorted list."""
+    index = min(
+        len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1)))
+    )
+    return sorted_values[index]
+
+
+def main():
+    """Run the benchmark and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://localhost:8082")
+    parser.add_argument(
+        "--route", choices=["cluster-check", "cluster-status"], default="cluster-check"
+    )
+    parser.add_argument("--host-cluster-id", action="append", required=True)
+    parser.add_argument("--cluster-name", default="demo")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--timeout", type=float, default=30)
+    args = parser.parse_args()
+
+    path, payload = build_payload(args)
+    url = args.url.rstrip("/") + path
+    body = json.dumps(payload).encode("utf-8")
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(
+            executor.map(lambda _: send(url, body, args.timeout), range(args.requests))
+        )
+    duration = time.perf_counter() - started
+
+    latencies = sorted(latency for latency, _ in results)
+    errors = sum(1 for _, status in results if not 200 <= status < 300)
+    print(f"route          {path}")
+    print(f"concurrency    {args.concurrency}")
+    print(f"requests       {len(results)} ({errors} non-2xx)")
+    print(f"duration       {duration:.2f}s")
+    print(f"throughput     {len(results) / duration:.1f} req/s")
+    print(f"latency mean   {statistics.mean(latencies) * 1000:.1f} ms")
+    for pct in (50, 90, 99):
+        print(f"latency p{pct:<4}  {percentile(latencies, pct) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,20 @@
 export HOST_NAME=cluster_host_kubernetes.com
+export KUBE_CLIENT_CACHE_SIZE=64
+export KUBE_CLIENT_TTL_SECONDS=900
+export VAULT_SECRET_CACHE_SIZE=256
+export VAULT_SECRET_TTL_SECONDS=300
+export HOST_CLUSTER_CHECK_WORKERS=8
+export HOST_CLUSTER_CHECK_TIMEOUT=5
+export CAPACITY_REFRESH_INTERVAL=30
+export CAPACITY_SNAPSHOT_MAX_AGE=90
+export SERVICE_READY_TIMEOUT=300
+export POD_READY_TIMEOUT=300
+export NAMESPACE_DELETE_TIMEOUT=300
+export JOB_WORKERS=4
+export JOB_HISTORY_SIZE=500
+export STATE_STORE=statestore
+export JOB_HEARTBEAT_INTERVAL=30
+export JOB_STALE_AFTER=120
+export APPLY_WORKERS=8
+export GUNICORN_WORKERS=4
+export GUNICORN_THREADS=8
@@ -0,0 +1,55 @@
+"""
+Gunicorn configuration for running cluster-service in production.
+
+Usage:
+    gunicorn -c gunicorn.conf.py main:app
+
+Every setting can be overridden through the environment variables below.
+"""
+
+import logging
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8082')}"
+
+# Process and thread pool. Handlers spend most of their time waiting on the
+# Kubernetes API and the Dapr sidecar, so threads per worker are cheap.
+workers = int(os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+worker_class = "gthread"
+
+# Import the app (and with it the Kubernetes client models) once in the
+# master so workers share those pages copy-on-write and boot faster.
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+
+# Workers are recycled to bound memory growth, with jitter so they do not all
+# restart at once. A stopping worker drains its running create-cluster jobs
+# in worker_exit; the graceful timeout covers the longest job (service and
+# pod readiness waits), and the pod's terminationGracePeriodSeconds must too.
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "200"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "660"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def post_fork(server, worker):
+    """Start the background threads inside each freshly forked worker."""
+    from main import start_background_workers
+
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+    )
+    start_background_workers()
+
+
+def worker_exit(server, worker):
+    """Let the jobs running in a stopping worker finish before it exits."""
+    from src.utils.job_utils import job_manager
+
+    job_manager.shutdown(wait=True)
@@ -2,6 +2,9 @@ import logging
 
 from flask import Flask
 from src.controller.routes import routes_bp
+from src.usecases.use_cases import create_cluster_usecase
+from src.utils.capacity_utils import start_capacity_refresher
+from src.utils.job_utils import job_manager
 
 
 def create_app():
@@ -11,6 +14,20 @@ def create_app():
     return app
 
 
+def start_background_workers():
+    """
+    Start per-process background threads.
+
+    Threads do not survive a fork, so under gunicorn this runs in each
+    worker after it is forked rather than while the app is preloaded. The
+    capacity refresher scrapes in one worker only, chosen through a lease
+    in the state store.
+    """
+    start_capacity_refresher()
+    job_manager.register("create-cluster", create_cluster_usecase)
+    job_manager.start_heartbeat()
+
+
 app = create_app()
 
 if __name__ == "__main__":
@@ -18,5 +35,6 @@ if __name__ == "__main__":
         level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
     )
     logging.info("Starting the Flask application...")
+    start_background_workers()
     # Run the app
     app.run(port=8082, host="0.0.0.0")
@@ -5,12 +5,13 @@ import logging
 from flask import Blueprint, jsonify, request
 from src.usecases.use_cases import (
     check_host_cluster_usecase,
-    create_cluster_usecase,
     delete_vcluster_usecase,
     generate_kubeconfig_usecase,
     get_cluster_status_usecase,
+    get_job_usecase,
     start_cluster_usecase,
     stop_vcluster_usecase,
+    submit_create_cluster_usecase,
 )
 
 # Define a Blueprint for routes
@@ -49,8 +50,14 @@ def subscribe():
 
 @routes_bp.route("/create-cluster", methods=["POST"])
 def create_cluster():
-    """Handle cluster creation."""
-    return create_cluster_usecase(request.json)
+    """Accept cluster creation and run it as a background job."""
+    return submit_create_cluster_usecase(request.json)
+
+
+@routes_bp.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    """Report the progress of a background job."""
+    return get_job_usecase(job_id)
 
 
 @routes_bp.route("/cluster-check", methods=["POST"])
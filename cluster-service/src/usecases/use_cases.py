@@ -8,44 +8,67 @@ import base64
 import json
 import logging
 import os
-import tempfile
 import time
 from http.client import HTTPException
 
 import yaml
 from flask import jsonify, request
-from kubernetes import client, config
+from kubernetes import client
 from src.models.subscription import parse_subscription_json
+from src.utils.app_constant import (
+    CAPACITY_SNAPSHOT_MAX_AGE,
+    POD_READY_TIMEOUT,
+    SERVICE_READY_TIMEOUT,
+)
+from src.utils.apply_utils import apply_manifests, server_side_apply
+from src.utils.best_cluster_utils import get_best_cluster
+from src.utils.capacity_utils import capacity_snapshot
 from src.utils.cluster_utils import (
     add_labels_to_statefulset,
-    createNamespace,
-    generate_cluster_yaml,
-    generate_resource_quota_yaml,
-    generate_vclusterYaml,
+    build_resource_quota_manifest,
+    build_vcluster_manifests,
+    ensure_namespace,
+    namespace_labels,
 )
 from src.utils.common_utils import get_available_resources_fromSecret, get_pod_status
-from src.utils.secret_utils import get_vault_secret
+from src.utils.job_utils import job_manager, track_step
+from src.utils.kube_client_utils import get_api_client
+from src.utils.secret_utils import get_vault_secret, get_vault_secrets
+from src.utils.waiter_utils import wait_for_pod_phase, wait_for_service
+
+
+def submit_create_cluster_usecase(data):
+    """Queue cluster creation as a background job and return it immediately."""
+    job = job_manager.submit(
+        "create-cluster", create_cluster_usecase, data, job_id=data.get("id")
+    )
+    logging.info("Create cluster job %s is %s", job.id, job.status)
+    return jsonify(job.to_dict()), 202
+
 
+def get_job_usecase(job_id):
+    """Return the progress of a background job."""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Job {job_id} not found"}), 404
+    return jsonify(job.to_dict()), 200
 
-def load_kubernetes_client(base64_kubeconfig):
-    """Load a Kubernetes client from a base64-encoded kubeconfig string."""
-    decoded_kubeconfig = base64.b64decode(base64_kubeconfig)
-    with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-        temp_file.write(decoded_kubeconfig)
-        temp_file.flush()
-        config.load_kube_config(temp_file.name)
-        k8s_client = client
-    temp_file.close()
-    return k8s_client
 
+def create_cluster_usecase(data, job=None):
+    """
+    Create or update a virtual cluster based on the provided payload.
 
-def create_cluster_usecase(data):
-    """Create or update a virtual cluster based on the provided payload."""
+    All manifests are server-side applied, so a first create, a retried
+    create and a version upgrade follow the same path. When run as a
+    background job, each pipeline step is recorded on `job`.
+    """
     logging.info("Published data Create Cluster :: " + json.dumps(data["data"]))
-    secret = get_vault_secret(data["data"]["host_cluster_id"])
+    host_cluster_id = data["data"]["host_cluster_id"]
+    with track_step(job, "resolve-host-cluster"):
+        secret = get_vault_secret(host_cluster_id)
+        api_client = get_api_client(host_cluster_id, secret)
     host_cluster_name = data["data"]["host_cluster_name"]
     kube_version = data["data"]["cluster"]["kube_version"]
-    load_kubernetes_client(secret)
 
     namespace = data["data"]["cluster"]["name"] + "-vcluster"
     name = data["data"]["cluster"]["name"]
@@ -53,84 +76,32 @@ def create_cluster_usecase(data):
     domain = os.getenv("HOST_NAME")
     host = f"{name}.{host_cluster_name}.{domain}"
 
-    vcluster = generate_vclusterYaml(
-        namespace=namespace, name=name, host=host, kube_version=kube_version
-    )
-    custom_resource = generate_cluster_yaml(namespace=namespace, name=name)
     logging.info("Subscription data: " + json.dumps(data["data"]["subscription"]))
-
     subscriptionData = parse_subscription_json(data["data"]["subscription"])
-    quota = generate_resource_quota_yaml(
-        subscription=subscriptionData, namespace=namespace
+    manifests = build_vcluster_manifests(
+        name=name,
+        namespace=namespace,
+        host=host,
+        kube_version=kube_version,
+        subscription=subscriptionData,
     )
 
     try:
-        try:
-            existing_resource = client.CustomObjectsApi().get_namespaced_custom_object(
-                group="infrastructure.cluster.x-k8s.io",
-                version="v1alpha1",
-                namespace=namespace,
-                plural="vclusters",
-                name=name,
-            )
-        except client.rest.ApiException as e:
-            if e.status == 404:
-                existing_resource = None
-                pass
-            else:
-                raise e
-
-        if existing_resource:
-            vcluster_dict = (
-                yaml.safe_load(vcluster) if isinstance(vcluster, str) else vcluster
-            )
-            resource_version = existing_resource["metadata"].get("resourceVersion")
-            vcluster_dict["metadata"]["resourceVersion"] = str(resource_version)
-
-            client.CustomObjectsApi().replace_namespaced_custom_object(
-                group="infrastructure.cluster.x-k8s.io",
-                version="v1alpha1",
-                namespace=namespace,
-                plural="vclusters",
-                name=name,
-                body=vcluster_dict,
-            )
-            wait_for_service_creation(namespace, name)
-            return jsonify(
-                {
-                    "message": "vcluster updated successfully",
-                    "name": name,
-                }
-            )
-        else:
-            createNamespace(namespace)
-            client.CustomObjectsApi().create_namespaced_custom_object(
-                group="cluster.x-k8s.io",
-                version="v1beta1",
-                namespace=namespace,
-                plural="clusters",
-                body=yaml.safe_load(custom_resource),
-            )
-            client.CustomObjectsApi().create_namespaced_custom_object(
-                group="infrastructure.cluster.x-k8s.io",
-                version="v1alpha1",
-                namespace=namespace,
-                plural="vclusters",
-                body=yaml.safe_load(vcluster),
-            )
-            client.CoreV1Api().create_namespaced_resource_quota(
-                namespace=namespace, body=yaml.safe_load(quota)
-            )
-            wait_for_service_creation(namespace, name)
-            create_ingress(name, namespace, host)
-            wait_for_sts_pod_readiness(namespace, name, cluster_id)
-            return {
-                "message": "vcluster created successfully",
-                "name": name,
-            }
+        with track_step(job, "namespace"):
+            ensure_namespace(api_client, namespace, namespace_labels(name, cluster_id))
+        with track_step(job, "apply"):
+            apply_manifests(api_client, manifests)
+        with track_step(job, "wait-for-service"):
+            wait_for_service_creation(api_client, namespace, name)
+        with track_step(job, "wait-for-pod"):
+            wait_for_sts_pod_readiness(api_client, namespace, name, cluster_id)
+        return {
+            "message": "vcluster applied successfully",
+            "name": name,
+        }
     except Exception as e:
         logging.error("error occurs while creating cluster :: %s", str(e))
-        raise HTTPException(status_code=500, detail=str(e))
+        raise
 
 
 def generate_kubeconfig_usecase(body):
@@ -140,9 +111,9 @@ def generate_kubeconfig_usecase(body):
     expirationTime = body["expirationTime"]
     namespace = f"{name}-vcluster"
     secret = get_vault_secret(hostClusterId)
-    load_kubernetes_client(secret)
+    api_client = get_api_client(hostClusterId, secret)
 
-    secret = client.CoreV1Api().read_namespaced_secret(
+    secret = client.CoreV1Api(api_client).read_namespaced_secret(
         name=f"{name}-kubeconfig", namespace=namespace
     )
     kubeconfig = base64.b64decode(secret.data["value"]).decode("utf-8")
@@ -164,9 +135,11 @@ def generate_kubeconfig_usecase(body):
 
     print(cluster_cert)
 
-    k8sClient = load_kubernetes_client(secret.data["value"])
-    vclient = k8sClient.CoreV1Api()
-    rbac_v1 = k8sClient.RbacAuthorizationV1Api()
+    vcluster_api_client = get_api_client(
+        f"{hostClusterId}/{namespace}", secret.data["value"]
+    )
+    vclient = client.CoreV1Api(vcluster_api_client)
+    rbac_v1 = client.RbacAuthorizationV1Api(vcluster_api_client)
 
     sa = None
     try:
@@ -240,11 +213,19 @@ def generate_kubeconfig_usecase(body):
 def check_host_cluster_usecase(body):
     """Check available resources across multiple host clusters and return the best."""
     logging.info("Published data: " + json.dumps(body))
-    secret_response = []
-    for host_cluster_id in body["host_cluster_ids"]:
-        secret = get_vault_secret(host_cluster_id)
-        secret_response.append({"id": host_cluster_id, "encoded_config": secret})
-    best_cluster = get_available_resources_fromSecret(secret_response)
+    host_cluster_ids = body["host_cluster_ids"]
+    resources = capacity_snapshot.get(host_cluster_ids, CAPACITY_SNAPSHOT_MAX_AGE)
+    if resources is not None:
+        best_cluster = get_best_cluster(resources)
+    else:
+        logging.info("Capacity snapshot is stale, scraping host clusters")
+        secrets = get_vault_secrets(host_cluster_ids)
+        secret_response = [
+            {"id": host_cluster_id, "encoded_config": secret}
+            for host_cluster_id, secret in secrets.items()
+            if secret is not None
+        ]
+        best_cluster = get_available_resources_fromSecret(secret_response)
     if best_cluster:
         key = list(best_cluster.keys())[0]
         data = best_cluster[key]
@@ -263,10 +244,10 @@ def start_cluster_usecase(data):
     logging.info("Published data: " + json.dumps(data))
     received_data = data["data"]
     secret = get_vault_secret(received_data["host_cluster_id"])
-    load_kubernetes_client(secret)
+    api_client = get_api_client(received_data["host_cluster_id"], secret)
     name = received_data["cluster_name"]
     namespace = f"{name}-vcluster"
-    api_client_apps = client.AppsV1Api()
+    api_client_apps = client.AppsV1Api(api_client)
 
     try:
         vcluster_statefulset = api_client_apps.read_namespaced_stateful_set(
@@ -292,8 +273,8 @@ def get_cluster_status_usecase(body):
     hostClusterId = body["hostClusterId"]
     namespace = f"{name}-vcluster"
     secret = get_vault_secret(hostClusterId)
-    load_kubernetes_client(secret)
-    status = get_pod_status(namespace, name)
+    api_client = get_api_client(hostClusterId, secret)
+    status = get_pod_status(api_client, namespace, name)
     print("STATUS :: ", status)
     responseData = {"status": status}
     return jsonify(responseData), 200
@@ -303,9 +284,9 @@ def stop_vcluster_usecase(data):
     """Stop a vcluster by scaling its StatefulSet replicas to 0."""
     received_data = data["data"]
     secret = get_vault_secret(received_data["host_cluster_id"])
-    load_kubernetes_client(secret)
+    api_client = get_api_client(received_data["host_cluster_id"], secret)
     name = received_data["cluster_name"]
-    api_client_apps = client.AppsV1Api()
+    api_client_apps = client.AppsV1Api(api_client)
     namespace = f"{name}-vcluster"
     try:
         vcluster_statefulset = api_client_apps.read_namespaced_stateful_set(
@@ -329,11 +310,11 @@ def delete_vcluster_usecase(data):
     """Delete a vcluster by removing its Kubernetes namespace."""
     received_data = data["data"]
     secret = get_vault_secret(received_data["host_cluster_id"])
-    load_kubernetes_client(secret)
+    api_client = get_api_client(received_data["host_cluster_id"], secret)
     name = received_data["cluster_name"]
     namespace = f"{name}-vcluster"
     try:
-        v1 = client.CoreV1Api()
+        v1 = client.CoreV1Api(api_client)
         v1.delete_namespace(namespace)
         res = {"message": "cluster deleted"}
         logging.info("Cluster deleted :: " + json.dumps(res))
@@ -347,24 +328,23 @@ def update_cluster_plan_usecase(data):
     """Update the resource quotas of a vcluster based on a new subscription plan."""
     logging.info("Published data: " + json.dumps(data["data"]))
     secret = get_vault_secret(data["data"]["host_cluster_id"])
-    load_kubernetes_client(secret)
+    api_client = get_api_client(data["data"]["host_cluster_id"], secret)
+    core_v1 = client.CoreV1Api(api_client)
     try:
         namespace = data["data"]["cluster"] + "-vcluster"
         logging.info("Subscription data: " + json.dumps(data["data"]["subscription"]))
         subscriptionData = parse_subscription_json(data["data"]["subscription"])
-        quota = generate_resource_quota_yaml(
+        quota = build_resource_quota_manifest(
             subscription=subscriptionData, namespace=namespace
         )
-        resource_quotas = client.CoreV1Api().list_namespaced_resource_quota(
-            namespace=namespace
-        )
-        client.CoreV1Api().create_namespaced_resource_quota(
-            namespace=namespace, body=yaml.safe_load(quota)
-        )
+        server_side_apply(api_client, quota)
+        resource_quotas = core_v1.list_namespaced_resource_quota(namespace=namespace)
         for rq in resource_quotas.items:
             resource_quota_name = rq.metadata.name
+            if resource_quota_name == quota["metadata"]["name"]:
+                continue
             try:
-                response = client.CoreV1Api().delete_namespaced_resource_quota(
+                response = core_v1.delete_namespaced_resource_quota(
                     name=resource_quota_name, namespace=namespace
                 )
                 print(f"Resource Quota '{resource_quota_name}' deleted successfully.")
@@ -383,90 +363,37 @@ def update_cluster_plan_usecase(data):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-def create_ingress(name: str, namespace: str, host: str):
-    """Create an NGINX ingress for the given vcluster."""
-    print("WE are here for INGRESS")
-    networking_v1_api = client.NetworkingV1Api()
-    body = client.V1Ingress(
-        api_version="networking.k8s.io/v1",
-        kind="Ingress",
-        metadata=client.V1ObjectMeta(
-            name=name,
-            annotations={
-                "nginx.ingress.kubernetes.io/backend-protocol": "HTTPS",
-                "nginx.ingress.kubernetes.io/ssl-passthrough": "true",
-                "nginx.ingress.kubernetes.io/ssl-redirect": "true",
-                "cert-manager.io/cluster-issuer": "letsencrypt-prod",
-            },
-        ),
-        spec=client.V1IngressSpec(
-            ingress_class_name="nginx",
-            tls=[client.V1IngressTLS(hosts=[host], secret_name="tls-secret")],
-            rules=[
-                client.V1IngressRule(
-                    host=host,
-                    http=client.V1HTTPIngressRuleValue(
-                        paths=[
-                            client.V1HTTPIngressPath(
-                                path="/",
-                                path_type="ImplementationSpecific",
-                                backend=client.V1IngressBackend(
-                                    service=client.V1IngressServiceBackend(
-                                        port=client.V1ServiceBackendPort(
-                                            number=443,
-                                        ),
-                                        name=name,
-                                    )
-                                ),
-                            )
-                        ]
-                    ),
-                )
-            ],
-        ),
-    )
-    api_response = networking_v1_api.create_namespaced_ingress(
-        namespace=namespace, body=body
-    )
-    print("Ingress created. Status='%s'" % str(api_response.status))
-
-
-def wait_for_service_creation(namespace, name):
+def wait_for_service_creation(api_client, namespace, name):
     """Wait until the Kubernetes Service for a vcluster exists."""
-    print("WE are here for WAiting")
-    api_client = client.CoreV1Api()
-    while True:
-        try:
-            api_client.read_namespaced_service(name=name, namespace=namespace)
-            print(f"Service '{name}' found in namespace '{namespace}'")
-            return
-        except client.exceptions.ApiException as e:
-            if e.status != 404:
-                raise
-            print(f"Service '{name}' not found, retrying...")
-            time.sleep(5)
-
-
-def wait_for_sts_pod_readiness(namespace, name, clusterId):
-    """Wait until all pods in a StatefulSet are running, then add status labels."""
-    try:
-        core_v1 = client.CoreV1Api()
-        timeout = 300
-        start_time = time.time()
-        while True:
-            pods = core_v1.list_namespaced_pod(
-                namespace, field_selector=f"metadata.name={name}"
-            ).items
-            all_ready = all(p.status.phase == "Running" for p in pods)
-            if all_ready:
-                labels = {
-                    "status-controller-vcluster": "cluster-manager",
-                    "status-controller": clusterId,
-                }
-                add_labels_to_statefulset(namespace, name, labels)
-                return True
-            if time.time() - start_time > timeout:
-                return False
-            time.sleep(5)
-    except Exception as e:
-        return f"An error occurred: {e}"
+    result = wait_for_service(api_client, namespace, name, SERVICE_READY_TIMEOUT)
+    if not result:
+        raise TimeoutError(
+            f"Service '{name}' not found in namespace '{namespace}' "
+            f"after {result.elapsed:.0f}s"
+        )
+    return result
+
+
+def wait_for_sts_pod_readiness(api_client, namespace, name, clusterId):
+    """
+    Wait until the vcluster StatefulSet pod is running, then add status labels.
+
+    Raises TimeoutError if the pod is not running within POD_READY_TIMEOUT,
+    and RuntimeError if the labels cannot be added, so the job running the
+    create is marked failed.
+    """
+    result = wait_for_pod_phase(api_client, namespace, f"{name}-0", POD_READY_TIMEOUT)
+    if not result:
+        raise TimeoutError(
+            f"Pod '{name}-0' in namespace '{namespace}' not running "
+            f"after {result.elapsed:.0f}s"
+        )
+    labels = {
+        "status-controller-vcluster": "cluster-manager",
+        "status-controller": clusterId,
+    }
+    updated = add_labels_to_statefulset(api_client, namespace, name, labels)
+    if isinstance(updated, str):
+        # add_labels_to_statefulset reports failures as an error string
+        raise RuntimeError(f"Failed to label StatefulSet '{name}': {updated}")
+    return result
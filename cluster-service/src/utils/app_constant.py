@@ -1,4 +1,38 @@
-"""Application-wide constants for resource usage thresholds."""
+"""Application-wide constants for resource usage thresholds and caching."""
+import os
 
 CPU_THRESHOLD = 80
 RAM_THRESHOLD = 90
+
+# Kubernetes ApiClient registry sizing
+KUBE_CLIENT_CACHE_SIZE = int(os.getenv("KUBE_CLIENT_CACHE_SIZE", "64"))
+KUBE_CLIENT_TTL_SECONDS = float(os.getenv("KUBE_CLIENT_TTL_SECONDS", "900"))
+
+# Vault secret cache
+VAULT_SECRET_CACHE_SIZE = int(os.getenv("VAULT_SECRET_CACHE_SIZE", "256"))
+VAULT_SECRET_TTL_SECONDS = float(os.getenv("VAULT_SECRET_TTL_SECONDS", "300"))
+
+# Host cluster metrics collection
+HOST_CLUSTER_CHECK_WORKERS = int(os.getenv("HOST_CLUSTER_CHECK_WORKERS", "8"))
+HOST_CLUSTER_CHECK_TIMEOUT = float(os.getenv("HOST_CLUSTER_CHECK_TIMEOUT", "5"))
+
+# Host cluster capacity snapshot
+CAPACITY_REFRESH_INTERVAL = float(os.getenv("CAPACITY_REFRESH_INTERVAL", "30"))
+CAPACITY_SNAPSHOT_MAX_AGE = float(os.getenv("CAPACITY_SNAPSHOT_MAX_AGE", "90"))
+
+# Readiness wait deadlines, in seconds
+SERVICE_READY_TIMEOUT = float(os.getenv("SERVICE_READY_TIMEOUT", "300"))
+POD_READY_TIMEOUT = float(os.getenv("POD_READY_TIMEOUT", "300"))
+NAMESPACE_DELETE_TIMEOUT = float(os.getenv("NAMESPACE_DELETE_TIMEOUT", "300"))
+
+# Dapr state store shared by every worker; unset keeps state in process memory
+STATE_STORE = os.getenv("STATE_STORE", "")
+
+# Background job engine
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_HISTORY_SIZE = int(os.getenv("JOB_HISTORY_SIZE", "500"))
+JOB_HEARTBEAT_INTERVAL = float(os.getenv("JOB_HEARTBEAT_INTERVAL", "30"))
+JOB_STALE_AFTER = float(os.getenv("JOB_STALE_AFTER", "120"))
+
+# Concurrent server-side apply of vcluster manifests
+APPLY_WORKERS = int(os.getenv("APPLY_WORKERS", "8"))
@@ -0,0 +1,78 @@
+"""
+Server-side apply for vcluster manifests.
+
+Manifests are plain dictionaries submitted with a single PATCH request
+each using the `application/apply-patch+yaml` content type, so create and
+update share one code path and the API server merges the changes.
+"""
+
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from src.utils.app_constant import APPLY_WORKERS
+
+FIELD_MANAGER = "cluster-manager"
+APPLY_PATCH_CONTENT_TYPE = "application/apply-patch+yaml"
+
+RESOURCE_PLURALS = {
+    "ResourceQuota": "resourcequotas",
+    "Ingress": "ingresses",
+    "Cluster": "clusters",
+    "VCluster": "vclusters",
+}
+
+
+def manifest_path(manifest):
+    """Return the API server path of the object described by `manifest`."""
+    api_version = manifest["apiVersion"]
+    plural = RESOURCE_PLURALS[manifest["kind"]]
+    metadata = manifest["metadata"]
+    prefix = "/api/v1" if api_version == "v1" else f"/apis/{api_version}"
+    if metadata.get("namespace"):
+        prefix = f"{prefix}/namespaces/{metadata['namespace']}"
+    return f"{prefix}/{plural}/{metadata['name']}"
+
+
+def server_side_apply(api_client, manifest, request_timeout=None):
+    """Create or update the object in `manifest` with one server-side apply call."""
+    return api_client.call_api(
+        manifest_path(manifest),
+        "PATCH",
+        query_params=[("fieldManager", FIELD_MANAGER), ("force", "true")],
+        header_params={
+            "Accept": "application/json",
+            "Content-Type": APPLY_PATCH_CONTENT_TYPE,
+        },
+        body=manifest,
+        response_type="object",
+        auth_settings=["BearerToken"],
+        _return_http_data_only=True,
+        _request_timeout=request_timeout,
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _get_apply_executor():
+    """Return the shared worker pool used for concurrent applies."""
+    return ThreadPoolExecutor(
+        max_workers=APPLY_WORKERS, thread_name_prefix="manifest-apply"
+    )
+
+
+def apply_manifests(api_client, manifests, request_timeout=None):
+    """
+    Server-side apply independent manifests concurrently.
+
+    Waits for every apply to finish and re-raises the first failure, if any.
+    Returns the applied objects in the order of `manifests`.
+    """
+    executor = _get_apply_executor()
+    futures = [
+        executor.submit(server_side_apply, api_client, manifest, request_timeout)
+        for manifest in manifests
+    ]
+    errors = [future.exception() for future in futures]
+    for error in errors:
+        if error is not None:
+            raise error
+    return [future.result() for future in futures]
@@ -0,0 +1,87 @@
+"""Thread-safe in-process cache with LRU and TTL eviction."""
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Bounded mapping whose entries expire after a fixed time-to-live.
+
+    When the cache is full the least recently used entry is evicted. All
+    operations are guarded by a lock so instances can be shared across
+    request threads.
+    """
+
+    def __init__(self, maxsize, ttl, timer=time.monotonic, on_evict=None):
+        """
+        Create a cache holding at most `maxsize` entries for `ttl` seconds.
+
+        `on_evict(key, value)` is called, outside the lock, for every value
+        the cache drops on its own: expired, least recently used, replaced
+        by `set` or removed by `clear`. Values returned by `pop` are left to
+        the caller.
+        """
+        if maxsize <= 0:
+            raise ValueError("maxsize must be greater than zero")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._timer = timer
+        self._on_evict = on_evict
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the cached value for `key`, or `default` if absent or expired."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires_at = item
+            if expires_at <= self._timer():
+                del self._data[key]
+            else:
+                self._data.move_to_end(key)
+                return value
+        self._evict([(key, value)])
+        return default
+
+    def set(self, key, value, ttl=None):
+        """Store `value` under `key`, evicting the oldest entries if full."""
+        expires_at = self._timer() + (self.ttl if ttl is None else ttl)
+        evicted = []
+        with self._lock:
+            old = self._data.get(key)
+            if old is not None and old[0] is not value:
+                evicted.append((key, old[0]))
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                old_key, (old_value, _) = self._data.popitem(last=False)
+                evicted.append((old_key, old_value))
+        self._evict(evicted)
+
+    def pop(self, key, default=None):
+        """Remove `key` from the cache and return its value."""
+        with self._lock:
+            item = self._data.pop(key, None)
+        return default if item is None else item[0]
+
+    def clear(self):
+        """Remove every entry from the cache."""
+        with self._lock:
+            evicted = [(key, item[0]) for key, item in self._data.items()]
+            self._data.clear()
+        self._evict(evicted)
+
+    def _evict(self, items):
+        """Pass dropped entries to the eviction callback, if any."""
+        if self._on_evict is None:
+            return
+        for key, value in items:
+            self._on_evict(key, value)
+
+    def __len__(self):
+        """Return the number of entries, including ones not yet purged."""
+        with self._lock:
+            return len(self._data)
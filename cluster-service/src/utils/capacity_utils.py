@@ -0,0 +1,196 @@
+"""
+Background snapshot of host cluster capacity.
+
+A refresher thread periodically computes CPU and memory usage for every
+host cluster registered in Vault, so placement requests can be answered
+from memory instead of scraping every host cluster on the request path.
+
+Every worker runs the thread, but only the holder of a lease in the shared
+state store scrapes; it publishes the snapshot there and the other workers
+copy it into their own memory.
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+
+from src.utils.app_constant import CAPACITY_REFRESH_INTERVAL, STATE_STORE
+from src.utils.common_utils import collect_cluster_resources
+from src.utils.secret_utils import list_vault_secrets
+from src.utils.state_utils import DaprStateStore, StateConflict
+
+CAPACITY_LEASE_KEY = "capacity-refresher-lease"
+CAPACITY_SNAPSHOT_KEY = "capacity-snapshot"
+
+
+class CapacitySnapshot:
+    """Timestamped, thread-safe view of the last capacity refresh."""
+
+    def __init__(self, timer=time.time):
+        """Create an empty snapshot."""
+        self._timer = timer
+        self._lock = threading.Lock()
+        self._resources = {}
+        self._known_ids = frozenset()
+        self._refreshed_at = None
+
+    def update(self, resources, host_cluster_ids, refreshed_at=None):
+        """Replace the snapshot with usage collected from `host_cluster_ids`."""
+        with self._lock:
+            self._resources = dict(resources)
+            self._known_ids = frozenset(host_cluster_ids)
+            self._refreshed_at = self._timer() if refreshed_at is None else refreshed_at
+
+    def to_dict(self):
+        """Return a JSON-serializable copy of the snapshot."""
+        with self._lock:
+            return {
+                "resources": self._resources,
+                "host_cluster_ids": sorted(self._known_ids),
+                "refreshed_at": self._refreshed_at,
+            }
+
+    def age(self):
+        """Return seconds since the last refresh, or None if never refreshed."""
+        with self._lock:
+            if self._refreshed_at is None:
+                return None
+            return self._timer() - self._refreshed_at
+
+    def get(self, host_cluster_ids, max_age):
+        """
+        Return usage for `host_cluster_ids` from the snapshot.
+
+        Returns None when the snapshot is older than `max_age` seconds or
+        was taken before one of the requested host clusters was registered,
+        in which case the caller should fall back to a live scrape. Hosts
+        that were unreachable during the refresh are omitted.
+        """
+        with self._lock:
+            if self._refreshed_at is None:
+                return None
+            if self._timer() - self._refreshed_at > max_age:
+                return None
+            if not self._known_ids.issuperset(host_cluster_ids):
+                return None
+            return {
+                host_cluster_id: self._resources[host_cluster_id]
+                for host_cluster_id in host_cluster_ids
+                if host_cluster_id in self._resources
+            }
+
+
+capacity_snapshot = CapacitySnapshot()
+
+
+def refresh_capacity_snapshot(snapshot=capacity_snapshot):
+    """Scrape every registered host cluster once and update the snapshot."""
+    started = time.monotonic()
+    secrets = list_vault_secrets()
+    kubeconfigSecrets = [
+        {"id": host_cluster_id, "encoded_config": secret}
+        for host_cluster_id, secret in secrets.items()
+        if secret
+    ]
+    resources = collect_cluster_resources(kubeconfigSecrets)
+    snapshot.update(resources, secrets.keys())
+    logging.info(
+        "Capacity snapshot refreshed for %d/%d host cluster(s) in %.2fs",
+        len(resources),
+        len(secrets),
+        time.monotonic() - started,
+    )
+
+
+def _acquire_lease(state, owner, ttl):
+    """Take or renew the refresher lease; return True if `owner` holds it."""
+    lease, etag = state.read(CAPACITY_LEASE_KEY)
+    if lease is not None and lease.get("owner") != owner:
+        return False
+    try:
+        state.write(
+            CAPACITY_LEASE_KEY, {"owner": owner}, etag=etag, create=True, ttl=ttl
+        )
+    except StateConflict:
+        return False
+    return True
+
+
+def sync_capacity_snapshot(state, owner, lease_ttl, snapshot=capacity_snapshot):
+    """
+    Refresh the snapshot once across all workers sharing `state`.
+
+    The lease holder scrapes and publishes the snapshot; every other worker
+    copies the published one. The lease expires after `lease_ttl` seconds,
+    so another worker takes over when the holder dies.
+    """
+    if _acquire_lease(state, owner, lease_ttl):
+        refresh_capacity_snapshot(snapshot)
+        state.write(CAPACITY_SNAPSHOT_KEY, snapshot.to_dict())
+        return
+    published, _ = state.read(CAPACITY_SNAPSHOT_KEY)
+    if published and published.get("refreshed_at") is not None:
+        snapshot.update(
+            published["resources"],
+            published["host_cluster_ids"],
+            refreshed_at=published["refreshed_at"],
+        )
+
+
+class _CapacityRefresher:
+    """Background thread refreshing the capacity snapshot."""
+
+    def __init__(self):
+        """Create a refresher that is not running."""
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def start(self, interval, state):
+        """Start the thread if it is not already running."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run,
+                args=(interval, state),
+                name="capacity-refresher",
+                daemon=True,
+            )
+            self._thread.start()
+
+    def stop(self):
+        """Signal the thread to stop."""
+        self._stop.set()
+
+    def _run(self, interval, state):
+        """Refresh the snapshot every `interval` seconds until stopped."""
+        owner = f"{socket.gethostname()}-{os.getpid()}"
+        while not self._stop.is_set():
+            try:
+                if state is None:
+                    refresh_capacity_snapshot()
+                else:
+                    sync_capacity_snapshot(state, owner, lease_ttl=interval * 3)
+            except Exception as e:
+                logging.error("error occurs while refreshing capacity :: %s", str(e))
+            self._stop.wait(interval)
+
+
+_refresher = _CapacityRefresher()
+
+
+def start_capacity_refresher(interval=CAPACITY_REFRESH_INTERVAL):
+    """Start the background refresher thread if it is not already running."""
+    if interval <= 0:
+        logging.info("Capacity snapshot refresher disabled")
+        return
+    _refresher.start(interval, DaprStateStore() if STATE_STORE else None)
+
+
+def stop_capacity_refresher():
+    """Signal the background refresher thread to stop."""
+    _refresher.stop()
@@ -1,167 +1,258 @@
 """Utility functions for managing Kubernetes clusters and vclusters."""
-import time
-
 from kubernetes import client
 from src.models.subscription import Subscription
+from src.utils.app_constant import NAMESPACE_DELETE_TIMEOUT
+from src.utils.waiter_utils import wait_for_namespace_deleted
+
 
+CAPI_API_VERSION = "cluster.x-k8s.io/v1beta1"
+VCLUSTER_API_VERSION = "infrastructure.cluster.x-k8s.io/v1alpha1"
 
-def generate_vclusterYaml(name, namespace, host, kube_version):
-    """Generate the YAML configuration for a vcluster."""
-    yaml_template = """
-apiVersion: infrastructure.cluster.x-k8s.io/v1alpha1
-kind: VCluster
-metadata:
-  name: {name}
-  namespace: {namespace}
-spec:
-  controlPlaneEndpoint:
-    host: {host}
-    port: 443
-  helmRelease:
-    chart:
-      name: vcluster
-      repo: https://charts.loft.sh
-      version: 0.20.0
-    values: |
-      controlPlane:
-        distro:
-          k8s:
-            enabled: false
-            version: ''
-            apiServer:
-              enabled: true
-              image:
-                registry: registry.k8s.io
-                repository: kube-apiserver
-                tag: {kube_version}
-            controllerManager:
-              enabled: true
-              image:
-                registry: registry.k8s.io
-                repository: kube-controller-manager
-                tag: {kube_version}
-        proxy:
-          extraSANs:
-          - {host}
+# Static parts of the dictionary manifests, built once per process. Builders
+# copy these before returning so callers can never mutate the shared state.
+_VCLUSTER_CHART = {
+    "name": "vcluster",
+    "repo": "https://charts.loft.sh",
+    "version": "0.20.0",
+}
+_VCLUSTER_VALUES_TEMPLATE = """controlPlane:
+  distro:
+    k8s:
+      enabled: false
+      version: ''
+      apiServer:
+        enabled: true
+        image:
+          registry: registry.k8s.io
+          repository: kube-apiserver
+          tag: {kube_version}
+      controllerManager:
+        enabled: true
+        image:
+          registry: registry.k8s.io
+          repository: kube-controller-manager
+          tag: {kube_version}
+  proxy:
+    extraSANs:
+    - {host}
 """
-    return yaml_template.format(
-        name=name, namespace=namespace, host=host, kube_version=kube_version
-    )
+_INGRESS_ANNOTATIONS = {
+    "nginx.ingress.kubernetes.io/backend-protocol": "HTTPS",
+    "nginx.ingress.kubernetes.io/ssl-passthrough": "true",
+    "nginx.ingress.kubernetes.io/ssl-redirect": "true",
+    "cert-manager.io/cluster-issuer": "letsencrypt-prod",
+}
 
 
-def generate_cluster_yaml(name: str, namespace: str):
-    """Generate the YAML configuration for a Cluster."""
-    yaml_template = """
-apiVersion: cluster.x-k8s.io/v1beta1
-kind: Cluster
-metadata:
-  name: {name}
-  namespace: {namespace}
-spec:
-  controlPlaneRef:
-    apiVersion: infrastructure.cluster.x-k8s.io/v1alpha1
-    kind: VCluster
-    name: {name}
-  infrastructureRef:
-    apiVersion: infrastructure.cluster.x-k8s.io/v1alpha1
-    kind: VCluster
-    name: {name}
-"""
-    return yaml_template.format(
-        name=name,
-        namespace=namespace,
-    )
+def build_vcluster_manifest(name, namespace, host, kube_version):
+    """Build the VCluster manifest as a dictionary, without YAML parsing."""
+    return {
+        "apiVersion": VCLUSTER_API_VERSION,
+        "kind": "VCluster",
+        "metadata": {"name": name, "namespace": namespace},
+        "spec": {
+            "controlPlaneEndpoint": {"host": host, "port": 443},
+            "helmRelease": {
+                "chart": dict(_VCLUSTER_CHART),
+                "values": _VCLUSTER_VALUES_TEMPLATE.format(
+                    host=host, kube_version=kube_version
+                ),
+            },
+        },
+    }
 
 
-def generate_resource_quota_yaml(subscription: Subscription, namespace: str):
-    """Generate the YAML configuration for a ResourceQuota based on subscription."""
-    yaml_template = """
-apiVersion: v1
-kind: ResourceQuota
-metadata:
-  name: {name}
-  namespace: {namespace}
-spec:
-  hard:
-    pods: {pod}
-    services: {service}
-    configmaps: {config_map}
-    persistentvolumeclaims: {persistent_volume_claims}
-    replicationcontrollers: {replication_controllers}
-    secrets: {secrets}
-    services.loadbalancers: {load_balancers}
-    services.nodeports: {node_ports}
-"""
-    return yaml_template.format(
-        name=subscription.name,
-        namespace=namespace,
-        pod=subscription.pods,
-        service=subscription.service,
-        config_map=subscription.config_map,
-        persistent_volume_claims=subscription.persistence_vol_claims,
-        replication_controllers=subscription.replication_ctl,
-        secrets=subscription.secrets,
-        load_balancers=subscription.loadbalancer,
-        node_ports=subscription.node_port,
-    )
+def build_cluster_manifest(name: str, namespace: str):
+    """Build the Cluster manifest as a dictionary, without YAML parsing."""
+    return {
+        "apiVersion": CAPI_API_VERSION,
+        "kind": "Cluster",
+        "metadata": {"name": name, "namespace": namespace},
+        "spec": {
+            "controlPlaneRef": {
+                "apiVersion": VCLUSTER_API_VERSION,
+                "kind": "VCluster",
+                "name": name,
+            },
+            "infrastructureRef": {
+                "apiVersion": VCLUSTER_API_VERSION,
+                "kind": "VCluster",
+                "name": name,
+            },
+        },
+    }
 
 
-def createNamespace(namespace_name):
-    """Create a Kubernetes namespace. Deletes it first if it already exists."""
-    api_client = client.CoreV1Api()
-    try:
-        # Check if the namespace already exists
-        try:
-            api_client.read_namespace(name=namespace_name)
-            print(f"Namespace '{namespace_name}' already exists. Deleting it...")
-            api_client.delete_namespace(
-                name=namespace_name, body=client.V1DeleteOptions()
-            )
-            print(f"Namespace '{namespace_name}' deleted successfully.")
+def build_resource_quota_manifest(subscription: Subscription, namespace: str):
+    """Build the ResourceQuota manifest for a subscription as a dictionary."""
+    return {
+        "apiVersion": "v1",
+        "kind": "ResourceQuota",
+        "metadata": {"name": subscription.name, "namespace": namespace},
+        "spec": {
+            "hard": {
+                "pods": subscription.pods,
+                "services": subscription.service,
+                "configmaps": subscription.config_map,
+                "persistentvolumeclaims": subscription.persistence_vol_claims,
+                "replicationcontrollers": subscription.replication_ctl,
+                "secrets": subscription.secrets,
+                "services.loadbalancers": subscription.loadbalancer,
+                "services.nodeports": subscription.node_port,
+            }
+        },
+    }
 
-            # Wait for the namespace to be fully deleted
-            wait_for_namespace_deletion(namespace_name)
 
+def build_ingress_manifest(name: str, namespace: str, host: str):
+    """Generate the NGINX Ingress manifest that exposes a vcluster API server."""
+    return {
+        "apiVersion": "networking.k8s.io/v1",
+        "kind": "Ingress",
+        "metadata": {
+            "name": name,
+            "namespace": namespace,
+            "annotations": dict(_INGRESS_ANNOTATIONS),
+        },
+        "spec": {
+            "ingressClassName": "nginx",
+            "tls": [{"hosts": [host], "secretName": "tls-secret"}],
+            "rules": [
+                {
+                    "host": host,
+                    "http": {
+                        "paths": [
+                            {
+                                "path": "/",
+                                "pathType": "ImplementationSpecific",
+                                "backend": {
+                                    "service": {
+                                        "name": name,
+                                        "port": {"number": 443},
+                                    }
+                                },
+                            }
+                        ]
+                    },
+                }
+            ],
+        },
+    }
+
+
+def build_vcluster_manifests(
+    name: str,
+    namespace: str,
+    host: str,
+    kube_version: str,
+    subscription: Subscription,
+):
+    """
+    Return every namespaced manifest a vcluster needs, as dictionaries.
+
+    The Cluster, VCluster, ResourceQuota and Ingress objects do not depend on
+    each other and can be applied concurrently once the namespace exists.
+    """
+    return [
+        build_cluster_manifest(name=name, namespace=namespace),
+        build_vcluster_manifest(
+            name=name, namespace=namespace, host=host, kube_version=kube_version
+        ),
+        build_resource_quota_manifest(subscription=subscription, namespace=namespace),
+        build_ingress_manifest(name=name, namespace=namespace, host=host),
+    ]
+
+
+def namespace_labels(name, cluster_id):
+    """Return the labels that identify a vcluster namespace as ours."""
+    return {
+        "app.kubernetes.io/managed-by": "cluster-manager",
+        "cluster-manager/cluster-name": name,
+        "cluster-manager/cluster-id": cluster_id,
+    }
+
+
+def ensure_namespace(api_client, namespace_name, labels):
+    """
+    Make sure a namespace carrying `labels` exists.
+
+    An existing namespace is reused, so a retried or redelivered create does
+    not tear down a healthy vcluster; namespaces created before labelling
+    was introduced are adopted by patching the labels onto them. Only a
+    namespace labelled with a different cluster ID is deleted and recreated,
+    and one that is being terminated is waited out first.
+    """
+    core_v1 = client.CoreV1Api(api_client)
+    cluster_id_label = "cluster-manager/cluster-id"
+    try:
+        try:
+            existing = core_v1.read_namespace(name=namespace_name)
         except client.rest.ApiException as e:
-            if e.status == 404:
+            if e.status != 404:
+                raise e
+            existing = None
+
+        if existing is not None:
+            current_labels = existing.metadata.labels or {}
+            terminating = existing.status is not None and (
+                existing.status.phase == "Terminating"
+            )
+            owner = current_labels.get(cluster_id_label)
+            conflicting = owner is not None and owner != labels.get(cluster_id_label)
+            if not terminating and not conflicting:
+                if all(
+                    current_labels.get(key) == value for key, value in labels.items()
+                ):
+                    print(f"Namespace '{namespace_name}' already exists. Reusing it.")
+                    return existing
+                print(f"Namespace '{namespace_name}' has no labels. Adopting it.")
+                return core_v1.patch_namespace(
+                    name=namespace_name, body={"metadata": {"labels": labels}}
+                )
+            if not terminating:
                 print(
-                    f"Namespace '{namespace_name}' does not exist. Proceeding to create it."
+                    f"Namespace '{namespace_name}' belongs to cluster {owner}. "
+                    "Deleting it..."
                 )
-            else:
+                core_v1.delete_namespace(
+                    name=namespace_name, body=client.V1DeleteOptions()
+                )
+            wait_for_namespace_deletion(api_client, namespace_name)
+
+        try:
+            created = core_v1.create_namespace(
+                client.V1Namespace(
+                    metadata=client.V1ObjectMeta(name=namespace_name, labels=labels)
+                )
+            )
+        except client.rest.ApiException as e:
+            if e.status != 409:
                 raise e
-        api_client.create_namespace(
-            client.V1Namespace(metadata=client.V1ObjectMeta(name=namespace_name))
-        )
+            # Created concurrently by a redelivered event.
+            return core_v1.read_namespace(name=namespace_name)
         print(f"Namespace '{namespace_name}' created successfully")
+        return created
     except client.rest.ApiException as e:
         print(f"Error handling namespace '{namespace_name}': {str(e)}")
         raise e
 
 
-def wait_for_namespace_deletion(namespace_name):
+def wait_for_namespace_deletion(api_client, namespace_name):
     """Wait until the namespace is fully deleted."""
-    api_client = client.CoreV1Api()
-
-    while True:
-        try:
-            # Attempt to read the namespace to see if it still exists
-            api_client.read_namespace(name=namespace_name)
-            print(f"Namespace '{namespace_name}' is still being deleted. Waiting...")
-            time.sleep(5)
-
-        except client.rest.ApiException as e:
-            if e.status == 404:
-                print(f"Namespace '{namespace_name}' has been deleted successfully.")
-                break
-            else:
-                print(f"Error checking namespace '{namespace_name}': {str(e)}")
-                raise e
+    result = wait_for_namespace_deleted(
+        api_client, namespace_name, NAMESPACE_DELETE_TIMEOUT
+    )
+    if not result:
+        raise TimeoutError(
+            f"Namespace '{namespace_name}' still exists after {result.elapsed:.0f}s"
+        )
+    print(f"Namespace '{namespace_name}' has been deleted successfully.")
 
 
-def add_labels_to_statefulset(namespace, sts_name, labels):
+def add_labels_to_statefulset(api_client, namespace, sts_name, labels):
     """Add labels to an existing Kubernetes StatefulSet."""
     try:
-        apps_v1 = client.AppsV1Api()
+        apps_v1 = client.AppsV1Api(api_client)
 
         statefulset = apps_v1.read_namespaced_stateful_set(sts_name, namespace)
 
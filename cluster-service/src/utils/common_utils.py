@@ -4,53 +4,117 @@ Utility functions for Kubernetes resource checks.
 Includes kubeconfig parsing and calculating cluster resource usage.
 """
 
-import base64
+import functools
 import logging
-import tempfile
-
-from kubernetes import client, config
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from kubernetes import client
+from src.utils.app_constant import (
+    HOST_CLUSTER_CHECK_TIMEOUT,
+    HOST_CLUSTER_CHECK_WORKERS,
+)
 from src.utils.best_cluster_utils import get_best_cluster
+from src.utils.kube_client_utils import get_api_client
 
 
-def get_available_resources_fromSecret(kubeconfigSecrets):
+def _remaining(deadline):
+    """Return the seconds left before `deadline`, raising once it has passed."""
+    if deadline is None:
+        return None
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError("host cluster did not answer in time")
+    return remaining
+
+
+def get_cluster_resource_usage(api_client, timeout=None):
     """
-    Extract CPU and memory usage percentages from kubeconfig secrets.
+    Return CPU and memory usage percentages for a single host cluster.
 
-    Decodes kubeconfigs, collects node metrics, and returns the best cluster
-    based on resource availability.
+    `timeout` bounds all requests made to the cluster's API server together:
+    each one gets the time the previous ones left over.
     """
-    try:
-        clusterResource = {}
-        for Kube_secret in kubeconfigSecrets:
-            # Decode the base64-encoded kubeconfig
-            decoded_kubeconfig = base64.b64decode(Kube_secret["encoded_config"])
-
-            # Write the decoded kubeconfig to a temporary file
-            with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-                temp_file.write(decoded_kubeconfig)
-                temp_file.flush()
-
-                # Load the kubeconfig and create the client
-                config.load_kube_config(temp_file.name)
-            # Clean up the temporary file
-            temp_file.close()
-            api = client.CustomObjectsApi()
-            api_client = client.CoreV1Api()
-            k8s_nodes_matrix = api.list_cluster_custom_object(
-                "metrics.k8s.io", "v1beta1", "nodes"
-            )
-            nodes = api_client.list_node().items
+    deadline = None if timeout is None else time.monotonic() + timeout
+    api = client.CustomObjectsApi(api_client)
+    core_v1 = client.CoreV1Api(api_client)
+    k8s_nodes_matrix = api.list_cluster_custom_object(
+        "metrics.k8s.io", "v1beta1", "nodes", _request_timeout=_remaining(deadline)
+    )
+    nodes = core_v1.list_node(_request_timeout=_remaining(deadline)).items
+
+    # Use a dictionary to store metrics
+    client_nodes_metrics = {}
+    percentage = cluster_load(nodes, k8s_nodes_matrix, client_nodes_metrics)
+    return {"CPU": percentage["PercCPU"], "MEMORY": percentage["PercMEM"]}
+
+
+@functools.lru_cache(maxsize=None)
+def _get_metrics_executor():
+    """Return the shared worker pool used to query host clusters."""
+    return ThreadPoolExecutor(
+        max_workers=HOST_CLUSTER_CHECK_WORKERS,
+        thread_name_prefix="host-cluster-metrics",
+    )
+
 
-            # Use a dictionary to store metrics
-            client_nodes_metrics = {}
+def _collect_from_secret(Kube_secret):
+    """Resolve the client for one kubeconfig secret and collect its usage."""
+    api_client = get_api_client(Kube_secret["id"], Kube_secret["encoded_config"])
+    return get_cluster_resource_usage(api_client, timeout=HOST_CLUSTER_CHECK_TIMEOUT)
 
-            # Correctly call cluster_load to get percentages
-            percentage = cluster_load(nodes, k8s_nodes_matrix, client_nodes_metrics)
 
-            clusterResource[Kube_secret["id"]] = {}
-            clusterResource[Kube_secret["id"]]["CPU"] = percentage["PercCPU"]
-            clusterResource[Kube_secret["id"]]["MEMORY"] = percentage["PercMEM"]
+def collect_cluster_resources(kubeconfigSecrets):
+    """
+    Query every host cluster concurrently and return usage keyed by id.
+
+    Clusters are queried on a bounded worker pool. Each cluster's requests
+    share one HOST_CLUSTER_CHECK_TIMEOUT budget, so a running query ends on
+    its own once that budget is spent. Hosts that fail or do not answer in
+    time are logged and left out of the result rather than failing the
+    whole collection.
+    """
+    if not kubeconfigSecrets:
+        return {}
+    executor = _get_metrics_executor()
+    futures = {
+        executor.submit(_collect_from_secret, Kube_secret): Kube_secret["id"]
+        for Kube_secret in kubeconfigSecrets
+    }
+    # Queued clusters only start once a worker frees up, so the overall
+    # deadline grows with the number of rounds the pool has to run.
+    rounds = math.ceil(len(futures) / HOST_CLUSTER_CHECK_WORKERS)
+    done, not_done = wait(futures, timeout=HOST_CLUSTER_CHECK_TIMEOUT * rounds)
+
+    clusterResource = {}
+    for future in not_done:
+        # Only drops queries still queued; running ones stop at their own
+        # request deadline.
+        future.cancel()
+        logging.warning("Host cluster %s timed out, skipping", futures[future])
+    for future in done:
+        host_cluster_id = futures[future]
+        try:
+            clusterResource[host_cluster_id] = future.result()
+        except Exception as e:
+            logging.warning(
+                "Failed to collect metrics from host cluster %s :: %s",
+                host_cluster_id,
+                str(e),
+            )
+    return clusterResource
+
 
+def get_available_resources_fromSecret(kubeconfigSecrets):
+    """
+    Extract CPU and memory usage percentages from kubeconfig secrets.
+
+    Collects node metrics from all host clusters in parallel and returns
+    the best cluster based on resource availability.
+    """
+    try:
+        clusterResource = collect_cluster_resources(kubeconfigSecrets)
         best = get_best_cluster(clusterResource)
         print("Best Cluster :: ", best)
         return best
@@ -155,17 +219,17 @@ def ToMilliValue(value):
         return int(value)
 
 
-def check_namespace_existence(namespace):
+def check_namespace_existence(api_client, namespace):
     """Return True if a namespace exists, otherwise False."""
     try:
-        v1 = client.CoreV1Api()
+        v1 = client.CoreV1Api(api_client)
         v1.read_namespace(name=namespace)
         return True  # Namespace exists
     except Exception as e:
         return False
 
 
-def get_pod_status(namespace: str, name: str):
+def get_pod_status(api_client, namespace: str, name: str):
     """
     Return the current status (phase) of a pod.
 
@@ -173,9 +237,9 @@ def get_pod_status(namespace: str, name: str):
     error, returns 'Creating'.
     """
     try:
-        if not check_namespace_existence(namespace):
+        if not check_namespace_existence(api_client, namespace):
             return "Failed"
-        v1 = client.CoreV1Api()
+        v1 = client.CoreV1Api(api_client)
         pod_name = name + "-0"
         pod = v1.read_namespaced_pod(name=pod_name, namespace=namespace)
         pod_status = pod.status.phase
@@ -0,0 +1,457 @@
+"""
+Job engine for long-running use cases.
+
+Jobs run on a bounded worker pool and record per-step timestamps so their
+progress can be reported while the originating request has long returned.
+
+Every job is also written to a job store shared by all workers, before it is
+acknowledged and again on every change. Any worker can therefore report a
+job, redelivered events are deduplicated across workers, and a job whose
+worker died (its heartbeat went stale) is resumed by another worker.
+"""
+
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from src.utils.app_constant import (
+    JOB_HEARTBEAT_INTERVAL,
+    JOB_HISTORY_SIZE,
+    JOB_STALE_AFTER,
+    JOB_WORKERS,
+    STATE_STORE,
+)
+from src.utils.state_utils import DaprStateStore, StateConflict
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+
+def _now():
+    """Return the current UTC time as an ISO 8601 string."""
+    return datetime.now(timezone.utc).isoformat()
+
+
+class Job:
+    """A tracked unit of background work."""
+
+    def __init__(self, job_id, kind):
+        """Initialize a queued Job.
+
+        Args:
+            job_id (str): Unique identifier of the job.
+            kind (str): Name of the pipeline the job runs.
+        """
+        self.id = job_id
+        self.kind = kind
+        self.status = JOB_QUEUED
+        self.created_at = _now()
+        self.started_at = None
+        self.finished_at = None
+        self.current_step = None
+        self.steps = []
+        self.result = None
+        self.error = None
+        self.on_change = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_dict(cls, record):
+        """Rebuild a Job from a record written by `to_dict`."""
+        job = cls(record["id"], record["kind"])
+        for field in (
+            "status",
+            "created_at",
+            "started_at",
+            "finished_at",
+            "current_step",
+            "result",
+            "error",
+        ):
+            setattr(job, field, record.get(field))
+        job.steps = [dict(step) for step in record.get("steps", [])]
+        return job
+
+    @contextmanager
+    def step(self, name):
+        """Record the start and end time of a named pipeline step."""
+        entry = {"name": name, "started_at": _now(), "finished_at": None}
+        with self._lock:
+            self.current_step = name
+            self.steps.append(entry)
+        self._changed()
+        try:
+            yield
+            entry["status"] = JOB_SUCCEEDED
+        except Exception:
+            entry["status"] = JOB_FAILED
+            raise
+        finally:
+            entry["finished_at"] = _now()
+            self._changed()
+
+    def _changed(self):
+        """Notify the owner of the job that its progress changed."""
+        if self.on_change is not None:
+            self.on_change(self)
+
+    def is_finished(self):
+        """Return True if the job has succeeded or failed."""
+        return self.status in (JOB_SUCCEEDED, JOB_FAILED)
+
+    def to_dict(self):
+        """Return a JSON-serializable view of the job."""
+        with self._lock:
+            return {
+                "id": self.id,
+                "kind": self.kind,
+                "status": self.status,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "current_step": self.current_step,
+                "steps": [dict(step) for step in self.steps],
+                "result": self.result,
+                "error": self.error,
+            }
+
+
+@contextmanager
+def track_step(job, name):
+    """Record a step on `job`, or do nothing when running outside a job."""
+    if job is None:
+        yield
+    else:
+        with job.step(name):
+            yield
+
+
+class MemoryJobStore:
+    """Job store held in process memory, for tests and single-process runs."""
+
+    def __init__(self):
+        """Create an empty store."""
+        self._records = {}
+        self._active = set()
+        self._lock = threading.Lock()
+
+    def load(self, job_id):
+        """Return the record of `job_id` and its etag, or (None, None)."""
+        with self._lock:
+            record, version = self._records.get(job_id, (None, None))
+            return (json.loads(record) if record else None), version
+
+    def save(self, record, etag=None, create=False):
+        """
+        Write `record`.
+
+        With `create` the write only succeeds if the stored etag is still
+        `etag` (None meaning the record does not exist yet); otherwise
+        StateConflict is raised.
+        """
+        with self._lock:
+            _, version = self._records.get(record["id"], (None, None))
+            if create and version != etag:
+                raise StateConflict(record["id"])
+            self._records[record["id"]] = (json.dumps(record), (version or 0) + 1)
+
+    def add_active(self, job_id):
+        """Add `job_id` to the index of unfinished jobs."""
+        with self._lock:
+            self._active.add(job_id)
+
+    def remove_active(self, job_id):
+        """Remove `job_id` from the index of unfinished jobs."""
+        with self._lock:
+            self._active.discard(job_id)
+
+    def active_ids(self):
+        """Return the ids of unfinished jobs."""
+        with self._lock:
+            return set(self._active)
+
+
+class DaprJobStore:
+    """Job store backed by a Dapr state store shared by every worker."""
+
+    ACTIVE_KEY = "jobs-active"
+
+    def __init__(self, state=None):
+        """Create a store on `state`, a DaprStateStore."""
+        self.state = state if state is not None else DaprStateStore()
+
+    def load(self, job_id):
+        """Return the record of `job_id` and its etag, or (None, None)."""
+        return self.state.read(f"job-{job_id}")
+
+    def save(self, record, etag=None, create=False):
+        """Write `record`; see MemoryJobStore.save."""
+        self.state.write(f"job-{record['id']}", record, etag=etag, create=create)
+
+    def _update_active(self, update):
+        """Apply `update` to the active index, retrying on concurrent writes."""
+        for _ in range(10):
+            ids, etag = self.state.read(self.ACTIVE_KEY)
+            ids = set(ids or [])
+            update(ids)
+            try:
+                self.state.write(self.ACTIVE_KEY, sorted(ids), etag=etag, create=True)
+                return
+            except StateConflict:
+                continue
+        raise StateConflict(self.ACTIVE_KEY)
+
+    def add_active(self, job_id):
+        """Add `job_id` to the index of unfinished jobs."""
+        self._update_active(lambda ids: ids.add(job_id))
+
+    def remove_active(self, job_id):
+        """Remove `job_id` from the index of unfinished jobs."""
+        self._update_active(lambda ids: ids.discard(job_id))
+
+    def active_ids(self):
+        """Return the ids of unfinished jobs."""
+        ids, _ = self.state.read(self.ACTIVE_KEY)
+        return set(ids or [])
+
+
+class JobManager:
+    """Runs jobs on a bounded thread pool and keeps a bounded job history."""
+
+    def __init__(
+        self,
+        max_workers=JOB_WORKERS,
+        history_size=JOB_HISTORY_SIZE,
+        store=None,
+        heartbeat_interval=JOB_HEARTBEAT_INTERVAL,
+        stale_after=JOB_STALE_AFTER,
+        timer=time.time,
+    ):
+        """Create a manager with `max_workers` threads and `history_size` jobs.
+
+        Args:
+            max_workers (int): Size of the worker pool.
+            history_size (int): Number of jobs kept in memory.
+            store (DaprJobStore): Shared job store; defaults to one held in
+                process memory.
+            heartbeat_interval (float): Seconds between heartbeats of the
+                jobs running here.
+            stale_after (float): Seconds without a heartbeat after which an
+                unfinished job is considered abandoned and may be resumed.
+            timer (Callable[[], float]): Clock for heartbeats.
+        """
+        self.max_workers = max_workers
+        self.history_size = history_size
+        self.store = store if store is not None else MemoryJobStore()
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self.timer = timer
+        self._jobs = OrderedDict()
+        self._args = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pipelines = {}
+        self._heartbeat_thread = None
+        self._heartbeat_stop = threading.Event()
+
+    def _get_executor(self):
+        """Create the worker pool on first use."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="job-worker"
+            )
+        return self._executor
+
+    def register(self, kind, func):
+        """Register the pipeline run by jobs of `kind`, so they can be resumed."""
+        self._pipelines[kind] = func
+
+    def submit(self, kind, func, *args, job_id=None):
+        """
+        Queue `func(*args, job=job)` and return its Job.
+
+        The job is written to the store before this returns, so an
+        acknowledged job survives the worker. `args` must be JSON
+        serializable for the job to be resumable elsewhere.
+
+        Submitting a `job_id` that is already queued, running or has
+        succeeded, on any worker, returns the existing job instead of
+        running it again, so redelivered events do not start duplicate
+        pipelines. Failed and abandoned jobs are run again.
+        """
+        job_id = job_id or str(uuid.uuid4())
+        with self._lock:
+            existing = self._jobs.get(job_id)
+            if existing is not None and existing.status != JOB_FAILED:
+                return existing
+        self._pipelines.setdefault(kind, func)
+        job = Job(job_id, kind)
+        existing = self._claim(job, args)
+        if existing is not None:
+            return existing
+        self._start(job, func, args)
+        return job
+
+    def get(self, job_id):
+        """Return the job with the given id from any worker, or None."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        record, _ = self.store.load(job_id)
+        return Job.from_dict(record) if record else None
+
+    def start_heartbeat(self):
+        """Start the thread that heartbeats local jobs and resumes stale ones."""
+        if self.heartbeat_interval <= 0:
+            return
+        with self._lock:
+            if self._heartbeat_thread is not None and self._heartbeat_thread.is_alive():
+                return
+            self._heartbeat_stop.clear()
+            self._heartbeat_thread = threading.Thread(
+                target=self._heartbeat_loop, name="job-heartbeat", daemon=True
+            )
+            self._heartbeat_thread.start()
+
+    def shutdown(self, wait=True):
+        """Stop taking jobs and, with `wait`, let the running ones finish."""
+        self._heartbeat_stop.set()
+        with self._lock:
+            executor = self._executor
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def resume_stale(self):
+        """Resume unfinished jobs whose worker stopped heartbeating them."""
+        resumed = []
+        for job_id in self.store.active_ids():
+            record, etag = self.store.load(job_id)
+            if record is None or record["status"] in (JOB_SUCCEEDED, JOB_FAILED):
+                self.store.remove_active(job_id)
+                continue
+            if not self._is_stale(record):
+                continue
+            func = self._pipelines.get(record["kind"])
+            if func is None:
+                continue
+            with self._lock:
+                if job_id in self._jobs:
+                    continue
+            job = Job(job_id, record["kind"])
+            try:
+                self._write(job, record.get("args", []), etag=etag, create=True)
+            except StateConflict:
+                continue
+            logging.warning("Resuming abandoned job %s (%s)", job_id, job.kind)
+            self._start(job, func, tuple(record.get("args", [])))
+            resumed.append(job)
+        return resumed
+
+    def _claim(self, job, args):
+        """
+        Write a new job record, or return the live job already stored.
+
+        The write is first-write-wins, so when two workers race on the same
+        id only one of them runs it.
+        """
+        record, etag = self.store.load(job.id)
+        if (
+            record is not None
+            and record["status"] != JOB_FAILED
+            and not self._is_stale(record)
+        ):
+            return Job.from_dict(record)
+        try:
+            self._write(job, args, etag=etag, create=True)
+        except StateConflict:
+            record, _ = self.store.load(job.id)
+            return Job.from_dict(record)
+        self.store.add_active(job.id)
+        return None
+
+    def _is_stale(self, record):
+        """Return True if an unfinished record lost its heartbeat."""
+        if record["status"] in (JOB_SUCCEEDED, JOB_FAILED):
+            return False
+        return self.timer() - record.get("updated_at", 0) > self.stale_after
+
+    def _write(self, job, args, etag=None, create=False):
+        """Write the current state of `job` to the store."""
+        record = job.to_dict()
+        record["args"] = list(args)
+        record["updated_at"] = self.timer()
+        self.store.save(record, etag=etag, create=create)
+
+    def _persist(self, job):
+        """Write progress of a local job; failures only delay reporting."""
+        try:
+            self._write(job, self._args.get(job.id, ()))
+        except Exception as e:
+            logging.warning("Could not persist job %s :: %s", job.id, str(e))
+
+    def _start(self, job, func, args):
+        """Track `job` locally and queue it on the worker pool."""
+        job.on_change = self._persist
+        with self._lock:
+            self._jobs[job.id] = job
+            self._jobs.move_to_end(job.id)
+            self._args[job.id] = args
+            self._evict_finished()
+            executor = self._get_executor()
+        executor.submit(self._run, job, func, args)
+
+    def _run(self, job, func, args):
+        """Execute a job and record its outcome."""
+        job.status = JOB_RUNNING
+        job.started_at = _now()
+        self._persist(job)
+        try:
+            job.result = func(*args, job=job)
+            job.status = JOB_SUCCEEDED
+        except Exception as e:
+            logging.error("Job %s (%s) failed :: %s", job.id, job.kind, str(e))
+            job.error = str(e)
+            job.status = JOB_FAILED
+        finally:
+            job.finished_at = _now()
+            job.current_step = None
+            self._persist(job)
+            try:
+                self.store.remove_active(job.id)
+            except Exception as e:
+                logging.warning("Could not unindex job %s :: %s", job.id, str(e))
+
+    def _heartbeat_loop(self):
+        """Heartbeat local jobs and resume stale ones until shut down."""
+        while not self._heartbeat_stop.wait(self.heartbeat_interval):
+            with self._lock:
+                running = [job for job in self._jobs.values() if not job.is_finished()]
+            for job in running:
+                self._persist(job)
+            try:
+                self.resume_stale()
+            except Exception as e:
+                logging.error("error occurs while resuming jobs :: %s", str(e))
+
+    def _evict_finished(self):
+        """Drop the oldest finished jobs once the history is over capacity."""
+        excess = len(self._jobs) - self.history_size
+        if excess <= 0:
+            return
+        for job_id in [
+            job_id for job_id, job in self._jobs.items() if job.is_finished()
+        ][:excess]:
+            del self._jobs[job_id]
+            self._args.pop(job_id, None)
+
+
+job_manager = JobManager(store=DaprJobStore() if STATE_STORE else None)
@@ -0,0 +1,88 @@
+"""
+Process-wide registry of Kubernetes API clients.
+
+Each host cluster gets its own `ApiClient` built in memory from its
+kubeconfig, so concurrent requests against different host clusters never
+share or mutate the global `kubernetes.config` state.
+"""
+
+import base64
+import hashlib
+import logging
+import threading
+
+import yaml
+from kubernetes import config
+from src.utils.app_constant import KUBE_CLIENT_CACHE_SIZE, KUBE_CLIENT_TTL_SECONDS
+from src.utils.cache_utils import TTLCache
+
+
+def _close_api_client(host_cluster_id, entry):
+    """Release the connection and thread pools of a dropped ApiClient."""
+    try:
+        entry[1].close()
+    except Exception as e:
+        logging.warning(
+            "Failed to close Kubernetes client for host cluster %s :: %s",
+            host_cluster_id,
+            str(e),
+        )
+
+
+_api_clients = TTLCache(
+    maxsize=KUBE_CLIENT_CACHE_SIZE,
+    ttl=KUBE_CLIENT_TTL_SECONDS,
+    on_evict=_close_api_client,
+)
+# Serializes rebuilds so a client handed to one request is never replaced,
+# and closed, by a concurrent build of the same kubeconfig.
+_build_lock = threading.Lock()
+
+
+def kubeconfig_digest(base64_kubeconfig):
+    """Return a stable hash of a base64-encoded kubeconfig."""
+    if isinstance(base64_kubeconfig, str):
+        base64_kubeconfig = base64_kubeconfig.encode("utf-8")
+    return hashlib.sha256(base64_kubeconfig).hexdigest()
+
+
+def build_api_client(base64_kubeconfig):
+    """Build a new ApiClient from a base64-encoded kubeconfig without temp files."""
+    decoded_kubeconfig = base64.b64decode(base64_kubeconfig)
+    kubeconfig = yaml.safe_load(decoded_kubeconfig)
+    return config.new_client_from_config_dict(kubeconfig, persist_config=False)
+
+
+def get_api_client(host_cluster_id, base64_kubeconfig):
+    """
+    Return a cached ApiClient for the given host cluster.
+
+    The client is rebuilt when the kubeconfig hash changes, when the entry
+    expires, or after it has been evicted as least recently used; the
+    client it replaces is closed.
+    """
+    digest = kubeconfig_digest(base64_kubeconfig)
+    cached = _api_clients.get(host_cluster_id)
+    if cached is not None and cached[0] == digest:
+        return cached[1]
+
+    with _build_lock:
+        cached = _api_clients.get(host_cluster_id)
+        if cached is not None and cached[0] == digest:
+            return cached[1]
+        logging.info(
+            "Building Kubernetes client for host cluster :: %s", host_cluster_id
+        )
+        api_client = build_api_client(base64_kubeconfig)
+        _api_clients.set(host_cluster_id, (digest, api_client))
+    return api_client
+
+
+def invalidate_api_client(host_cluster_id=None):
+    """Drop and close the cached client for one host cluster, or all of them."""
+    if host_cluster_id is None:
+        _api_clients.clear()
+        return
+    entry = _api_clients.pop(host_cluster_id)
+    if entry is not None:
+        _close_api_client(host_cluster_id, entry)
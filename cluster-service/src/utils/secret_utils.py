@@ -1,26 +1,158 @@
 """Utility functions for retrieving secrets from Dapr's Vault integration."""
 
 import logging
+import threading
+from concurrent.futures import Future
 from http.client import HTTPException
 
 from dapr.clients import DaprClient
+from src.utils.app_constant import VAULT_SECRET_CACHE_SIZE, VAULT_SECRET_TTL_SECONDS
+from src.utils.cache_utils import TTLCache
+
+_secret_cache = TTLCache(maxsize=VAULT_SECRET_CACHE_SIZE, ttl=VAULT_SECRET_TTL_SECONDS)
+
+
+class _DaprClientHolder:
+    """Process-wide Dapr client, connected on first use."""
+
+    def __init__(self):
+        """Create an empty holder."""
+        self._client = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Return the shared client, connecting if there is none."""
+        with self._lock:
+            if self._client is None:
+                self._client = DaprClient()
+            return self._client
+
+    def reset(self, client):
+        """Close `client` so the next call reconnects to the sidecar."""
+        with self._lock:
+            if self._client is client:
+                self._client = None
+        try:
+            client.close()
+        except Exception:
+            pass
+
+
+class _SingleFlight:
+    """Lets concurrent callers share the result of one running call."""
+
+    def __init__(self):
+        """Create a holder with no call in flight."""
+        self._pending = None
+        self._lock = threading.Lock()
+
+    def join(self):
+        """Return (future, leader); the leader must resolve the future."""
+        with self._lock:
+            if self._pending is not None:
+                return self._pending, False
+            self._pending = Future()
+            return self._pending, True
+
+    def done(self):
+        """Let the next caller start a new call."""
+        with self._lock:
+            self._pending = None
+
+
+_dapr_client = _DaprClientHolder()
+_secret_map_fetch = _SingleFlight()
+
+
+def _fetch_secret_map():
+    """
+    Download the whole `dapr` secret map from the Vault store.
+
+    Concurrent callers share a single sidecar round-trip: the first caller
+    performs the fetch and every caller that arrives while it is running
+    waits for the same result. Fetched secrets are written to the cache.
+    """
+    pending, leader = _secret_map_fetch.join()
+    if not leader:
+        return pending.result()
+
+    try:
+        dprClient = _dapr_client.get()
+        try:
+            secret_map = dict(
+                dprClient.get_secret(store_name="vault", key="dapr").secret
+            )
+        except Exception:
+            _dapr_client.reset(dprClient)
+            raise
+        for secret_id, secret in secret_map.items():
+            _secret_cache.set(secret_id, secret)
+        pending.set_result(secret_map)
+        return secret_map
+    except Exception as e:
+        pending.set_exception(e)
+        raise
+    finally:
+        _secret_map_fetch.done()
 
 
 def get_vault_secret(secret_Id):
     """
     Retrieve a specific secret value from the Vault secret store via Dapr.
 
-    Logs the request, fetches the secret from the Dapr secret store named
-    "vault", and returns the value associated with the given secret_id.
+    Serves the value from the in-process cache when present; otherwise
+    fetches the secret map from the Dapr secret store named "vault".
     Raises an HTTPException if the retrieval fails.
     """
     logging.info("SCRET_ID :: %s", secret_Id)
+    secret = _secret_cache.get(secret_Id)
+    if secret is not None:
+        return secret
     try:
-        with DaprClient() as dprClient:
-            secret = dprClient.get_secret(store_name="vault", key="dapr")
-            secret = secret.secret.get(secret_Id)
-            logging.info("Secret From VAult :: %s", secret)
-            return secret
+        return _fetch_secret_map().get(secret_Id)
     except Exception as e:
         logging.error("Error on fetching secret :: %s", str(e))
         raise HTTPException(status_code=500, detail=str(e))
+
+
+def get_vault_secrets(secret_ids):
+    """
+    Retrieve several secrets with at most one sidecar round-trip.
+
+    Returns a dictionary of secret id to value. Ids that are not present in
+    the store map to None.
+    """
+    secrets = {secret_id: _secret_cache.get(secret_id) for secret_id in secret_ids}
+    missing = [secret_id for secret_id, secret in secrets.items() if secret is None]
+    if not missing:
+        return secrets
+    logging.info("Fetching %d uncached secret(s) from vault", len(missing))
+    try:
+        secret_map = _fetch_secret_map()
+    except Exception as e:
+        logging.error("Error on fetching secrets :: %s", str(e))
+        raise HTTPException(status_code=500, detail=str(e))
+    for secret_id in missing:
+        secrets[secret_id] = secret_map.get(secret_id)
+    return secrets
+
+
+def list_vault_secrets():
+    """
+    Fetch every secret in the store and return a dictionary of id to value.
+
+    Always goes to the sidecar, refreshing the cache as a side effect.
+    """
+    try:
+        return _fetch_secret_map()
+    except Exception as e:
+        logging.error("Error on listing secrets :: %s", str(e))
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def invalidate_vault_secret(secret_Id=None):
+    """Drop one secret from the cache, or every cached secret if no id is given."""
+    if secret_Id is None:
+        _secret_cache.clear()
+    else:
+        _secret_cache.pop(secret_Id)
@@ -0,0 +1,78 @@
+"""Utility functions for state shared between workers through a Dapr state store."""
+
+import json
+import threading
+
+import grpc
+from dapr.clients import DaprClient
+from dapr.clients.grpc._state import Concurrency, StateOptions
+from src.utils.app_constant import STATE_STORE
+
+
+class StateConflict(Exception):
+    """Another writer changed the key since it was read."""
+
+
+class DaprStateStore:
+    """JSON values in a Dapr state store, with first-write-wins updates."""
+
+    def __init__(self, store_name=STATE_STORE, client_factory=DaprClient):
+        """Create a store writing to the Dapr state store `store_name`."""
+        self.store_name = store_name
+        self.client_factory = client_factory
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    def _call(self, method, *args, **kwargs):
+        """Call the sidecar, reconnecting on the next call after an error."""
+        with self._client_lock:
+            if self._client is None:
+                self._client = self.client_factory()
+            client = self._client
+        try:
+            return getattr(client, method)(self.store_name, *args, **kwargs)
+        except Exception:
+            with self._client_lock:
+                if self._client is client:
+                    self._client = None
+            try:
+                client.close()
+            except Exception:
+                pass
+            raise
+
+    def read(self, key):
+        """Return the decoded value of `key` and its etag, or (None, None)."""
+        response = self._call("get_state", key)
+        value = json.loads(response.data) if response.data else None
+        return value, response.etag or None
+
+    def write(self, key, value, etag=None, create=False, ttl=None):
+        """
+        Write `value` under `key`.
+
+        With `create` the write only succeeds if the stored etag is still
+        `etag` (None meaning the key does not exist yet); otherwise
+        StateConflict is raised. `ttl` expires the key after that many
+        seconds.
+        """
+        options = None
+        if create:
+            options = StateOptions(concurrency=Concurrency.first_write)
+        state_metadata = {"ttlInSeconds": str(int(ttl))} if ttl else {}
+        try:
+            self._call(
+                "save_state",
+                key,
+                json.dumps(value),
+                etag=etag,
+                options=options,
+                state_metadata=state_metadata,
+            )
+        except grpc.RpcError as e:
+            if create and e.code() in (
+                grpc.StatusCode.ABORTED,
+                grpc.StatusCode.FAILED_PRECONDITION,
+            ):
+                raise StateConflict(key) from e
+            raise
@@ -0,0 +1,143 @@
+"""
+Watch-based waiters for Kubernetes objects.
+
+Instead of polling with a fixed sleep, each waiter lists the object once,
+then follows a watch stream resumed from the list's resourceVersion and
+returns as soon as the object reaches the target state or the deadline
+passes.
+"""
+
+import logging
+import time
+
+from kubernetes import client, watch
+
+HTTP_STATUS_GONE = 410
+
+
+class WaitResult:
+    """Outcome of a wait: whether the target state was reached and how long it took."""
+
+    def __init__(self, ready, elapsed, obj=None):
+        """Initialize a WaitResult.
+
+        Args:
+            ready (bool): True if the target state was reached before the deadline.
+            elapsed (float): Seconds spent waiting.
+            obj (Any): The last observed object, if any.
+        """
+        self.ready = ready
+        self.elapsed = elapsed
+        self.obj = obj
+
+    def __bool__(self):
+        """Return True if the target state was reached."""
+        return self.ready
+
+
+def wait_for(
+    list_func, predicate, description, timeout, until_deleted=False, **list_kwargs
+):
+    """
+    Wait until an object returned by `list_func` satisfies `predicate`.
+
+    `list_func` is a Kubernetes list call such as
+    `CoreV1Api.list_namespaced_service` and `list_kwargs` narrows it to the
+    object of interest, typically with a `metadata.name` field selector.
+    With `until_deleted` the wait completes once no matching object is left.
+    When the watch's resourceVersion has expired (HTTP 410) the object is
+    listed again and the watch resumes from the fresh version.
+    """
+    started = time.monotonic()
+    deadline = started + timeout
+    resource_version = None
+    last_obj = None
+
+    def result(ready):
+        elapsed = time.monotonic() - started
+        logging.info(
+            "Wait for %s %s after %.2fs",
+            description,
+            "succeeded" if ready else "timed out",
+            elapsed,
+        )
+        return WaitResult(ready, elapsed, last_obj)
+
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return result(False)
+
+        if resource_version is None:
+            listing = list_func(_request_timeout=remaining, **list_kwargs)
+            if until_deleted and not listing.items:
+                return result(True)
+            for item in listing.items:
+                last_obj = item
+                if not until_deleted and predicate(item):
+                    return result(True)
+            resource_version = listing.metadata.resource_version
+
+        watcher = watch.Watch()
+        try:
+            for event in watcher.stream(
+                list_func,
+                resource_version=resource_version,
+                timeout_seconds=max(1, int(remaining)),
+                _request_timeout=remaining + 5,
+                **list_kwargs,
+            ):
+                obj = event["object"]
+                last_obj = obj
+                resource_version = obj.metadata.resource_version
+                if until_deleted:
+                    if event["type"] == "DELETED":
+                        watcher.stop()
+                        return result(True)
+                elif event["type"] in ("ADDED", "MODIFIED") and predicate(obj):
+                    watcher.stop()
+                    return result(True)
+                if time.monotonic() >= deadline:
+                    watcher.stop()
+                    break
+        except client.rest.ApiException as e:
+            if e.status != HTTP_STATUS_GONE:
+                raise
+            logging.info("Watch for %s expired, relisting", description)
+            resource_version = None
+
+
+def wait_for_service(api_client, namespace, name, timeout):
+    """Wait until the Service `name` exists in `namespace`."""
+    return wait_for(
+        client.CoreV1Api(api_client).list_namespaced_service,
+        lambda service: True,
+        f"service {namespace}/{name}",
+        timeout,
+        namespace=namespace,
+        field_selector=f"metadata.name={name}",
+    )
+
+
+def wait_for_pod_phase(api_client, namespace, name, timeout, phase="Running"):
+    """Wait until the Pod `name` in `namespace` reports the given phase."""
+    return wait_for(
+        client.CoreV1Api(api_client).list_namespaced_pod,
+        lambda pod: pod.status is not None and pod.status.phase == phase,
+        f"pod {namespace}/{name} to be {phase}",
+        timeout,
+        namespace=namespace,
+        field_selector=f"metadata.name={name}",
+    )
+
+
+def wait_for_namespace_deleted(api_client, namespace, timeout):
+    """Wait until the Namespace `namespace` no longer exists."""
+    return wait_for(
+        client.CoreV1Api(api_client).list_namespace,
+        None,
+        f"namespace {namespace} deletion",
+        timeout,
+        until_deleted=True,
+        field_selector=f"metadata.name={namespace}",
+    )
@@ -0,0 +1,83 @@
+"""Unit tests for the server-side apply helpers."""
+import unittest
+from unittest import mock
+
+from utils import apply_utils
+
+
+def make_manifest(api_version, kind, name, namespace=None):
+    """Build a minimal manifest dictionary."""
+    metadata = {"name": name}
+    if namespace:
+        metadata["namespace"] = namespace
+    return {"apiVersion": api_version, "kind": kind, "metadata": metadata}
+
+
+class TestManifestPath(unittest.TestCase):
+    """Tests for apply_utils.manifest_path()."""
+
+    def test_core_namespaced_resource(self):
+        """Core resources live under /api/v1."""
+        manifest = make_manifest("v1", "ResourceQuota", "basic", "demo")
+        self.assertEqual(
+            apply_utils.manifest_path(manifest),
+            "/api/v1/namespaces/demo/resourcequotas/basic",
+        )
+
+    def test_group_namespaced_resource(self):
+        """Grouped resources live under /apis/<group>/<version>."""
+        manifest = make_manifest("networking.k8s.io/v1", "Ingress", "demo", "demo")
+        self.assertEqual(
+            apply_utils.manifest_path(manifest),
+            "/apis/networking.k8s.io/v1/namespaces/demo/ingresses/demo",
+        )
+
+    def test_unknown_kind_is_rejected(self):
+        """Kinds the create path does not apply have no known plural."""
+        manifest = make_manifest("v1", "Namespace", "demo")
+        with self.assertRaises(KeyError):
+            apply_utils.manifest_path(manifest)
+
+
+class TestApplyManifests(unittest.TestCase):
+    """Tests for apply_utils.server_side_apply() and apply_manifests()."""
+
+    def test_server_side_apply_sends_apply_patch(self):
+        """The object is PATCHed with the apply content type and field manager."""
+        api_client = mock.Mock()
+        manifest = make_manifest("v1", "ResourceQuota", "basic", "demo")
+        apply_utils.server_side_apply(api_client, manifest)
+
+        args, kwargs = api_client.call_api.call_args
+        self.assertEqual(args, (apply_utils.manifest_path(manifest), "PATCH"))
+        self.assertEqual(
+            kwargs["header_params"]["Content-Type"], "application/apply-patch+yaml"
+        )
+        self.assertIn(("fieldManager", "cluster-manager"), kwargs["query_params"])
+        self.assertIs(kwargs["body"], manifest)
+
+    def test_apply_manifests_keeps_order(self):
+        """Results are returned in the order of the manifests."""
+        api_client = mock.Mock()
+        api_client.call_api.side_effect = lambda path, *args, **kwargs: path
+        manifests = [
+            make_manifest("v1", "ResourceQuota", "basic", "demo"),
+            make_manifest("networking.k8s.io/v1", "Ingress", "demo", "demo"),
+        ]
+        self.assertEqual(
+            apply_utils.apply_manifests(api_client, manifests),
+            [apply_utils.manifest_path(manifest) for manifest in manifests],
+        )
+
+    def test_apply_manifests_raises_first_error(self):
+        """A failed apply is re-raised after every apply has finished."""
+        api_client = mock.Mock()
+        api_client.call_api.side_effect = RuntimeError("forbidden")
+        with self.assertRaises(RuntimeError):
+            apply_utils.apply_manifests(
+                api_client, [make_manifest("v1", "ResourceQuota", "basic", "demo")]
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+"""Unit tests for the TTLCache used by the client and secret registries."""
+import unittest
+
+from utils.cache_utils import TTLCache
+
+
+class FakeTimer:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        """Start the clock at zero."""
+        self.now = 0.0
+
+    def __call__(self):
+        """Return the current fake time."""
+        return self.now
+
+
+class TestTTLCache(unittest.TestCase):
+    """Tests for expiry and LRU eviction in TTLCache."""
+
+    def setUp(self):
+        """Create a small cache driven by a fake clock."""
+        self.timer = FakeTimer()
+        self.cache = TTLCache(maxsize=2, ttl=10, timer=self.timer)
+
+    def test_get_returns_value_before_expiry(self):
+        """Entries are served until their TTL elapses."""
+        self.cache.set("a", 1)
+        self.timer.now = 9.9
+        self.assertEqual(self.cache.get("a"), 1)
+
+    def test_get_drops_expired_entries(self):
+        """Expired entries are removed and reported as missing."""
+        self.cache.set("a", 1)
+        self.timer.now = 10
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_per_entry_ttl_overrides_default(self):
+        """An explicit ttl on set() takes precedence over the cache default."""
+        self.cache.set("a", 1, ttl=1)
+        self.timer.now = 2
+        self.assertIsNone(self.cache.get("a"))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        """Reading an entry protects it from the next eviction."""
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.cache.get("a")
+        self.cache.set("c", 3)
+        self.assertEqual(self.cache.get("a"), 1)
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.get("c"), 3)
+
+    def test_pop_and_clear(self):
+        """Explicit invalidation removes entries immediately."""
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.assertEqual(self.cache.pop("a"), 1)
+        self.assertIsNone(self.cache.get("a"))
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
+
+    def test_dropped_entries_are_passed_to_on_evict(self):
+        """Expired, evicted, replaced and cleared values reach on_evict."""
+        evicted = []
+        cache = TTLCache(
+            maxsize=2,
+            ttl=10,
+            timer=self.timer,
+            on_evict=lambda key, value: evicted.append((key, value)),
+        )
+        cache.set("a", 1)
+        cache.set("a", 2)
+        cache.set("b", 3)
+        cache.set("c", 4)
+        self.timer.now = 10
+        cache.get("b")
+        cache.set("d", 5)
+        cache.pop("d")
+        cache.set("e", 6)
+        cache.clear()
+        self.assertEqual(evicted, [("a", 1), ("a", 2), ("b", 3), ("c", 4), ("e", 6)])
+
+
+if __name__ == "__main__":
+    unittest.main()
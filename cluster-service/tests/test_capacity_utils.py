@@ -0,0 +1,158 @@
+"""Unit tests for the host cluster capacity snapshot."""
+import unittest
+from unittest import mock
+
+from utils import capacity_utils
+from utils.capacity_utils import CapacitySnapshot
+
+USAGE = {
+    "host-1": {"CPU": 40.0, "MEMORY": 50.0},
+    "host-2": {"CPU": 20.0, "MEMORY": 30.0},
+}
+
+
+class FakeTimer:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        """Start the clock at zero."""
+        self.now = 0.0
+
+    def __call__(self):
+        """Return the current fake time."""
+        return self.now
+
+
+class TestCapacitySnapshot(unittest.TestCase):
+    """Tests for CapacitySnapshot freshness and lookups."""
+
+    def setUp(self):
+        """Create a snapshot driven by a fake clock."""
+        self.timer = FakeTimer()
+        self.snapshot = CapacitySnapshot(timer=self.timer)
+
+    def test_empty_snapshot_requires_live_scrape(self):
+        """A snapshot that was never refreshed is not used."""
+        self.assertIsNone(self.snapshot.get(["host-1"], max_age=60))
+        self.assertIsNone(self.snapshot.age())
+
+    def test_fresh_snapshot_serves_requested_hosts(self):
+        """Only the requested host clusters are returned."""
+        self.snapshot.update(USAGE, ["host-1", "host-2"])
+        self.timer.now = 30
+        self.assertEqual(
+            self.snapshot.get(["host-2"], max_age=60), {"host-2": USAGE["host-2"]}
+        )
+        self.assertEqual(self.snapshot.age(), 30)
+
+    def test_stale_snapshot_is_rejected(self):
+        """A snapshot older than max_age falls back to a live scrape."""
+        self.snapshot.update(USAGE, ["host-1", "host-2"])
+        self.timer.now = 61
+        self.assertIsNone(self.snapshot.get(["host-1"], max_age=60))
+
+    def test_unknown_host_is_rejected(self):
+        """A host registered after the refresh forces a live scrape."""
+        self.snapshot.update(USAGE, ["host-1", "host-2"])
+        self.assertIsNone(self.snapshot.get(["host-1", "host-3"], max_age=60))
+
+    def test_unreachable_host_is_omitted(self):
+        """Hosts that failed during the refresh are left out."""
+        self.snapshot.update({"host-1": USAGE["host-1"]}, ["host-1", "host-2"])
+        self.assertEqual(
+            self.snapshot.get(["host-1", "host-2"], max_age=60),
+            {"host-1": USAGE["host-1"]},
+        )
+
+    def test_refresh_scrapes_every_registered_host(self):
+        """refresh_capacity_snapshot collects usage for all Vault entries."""
+        secrets = {"host-1": "a3ViZQ==", "host-2": "a3ViZQ=="}
+        with mock.patch.object(
+            capacity_utils, "list_vault_secrets", return_value=secrets
+        ), mock.patch.object(
+            capacity_utils, "collect_cluster_resources", return_value=USAGE
+        ) as collect:
+            capacity_utils.refresh_capacity_snapshot(self.snapshot)
+
+        collect.assert_called_once_with(
+            [
+                {"id": "host-1", "encoded_config": "a3ViZQ=="},
+                {"id": "host-2", "encoded_config": "a3ViZQ=="},
+            ]
+        )
+        self.assertEqual(self.snapshot.get(["host-1", "host-2"], max_age=60), USAGE)
+
+
+class FakeState:
+    """In-memory stand-in for DaprStateStore."""
+
+    def __init__(self):
+        """Start with no keys."""
+        self.values = {}
+
+    def read(self, key):
+        """Return the value of `key` and its version."""
+        return self.values.get(key, (None, None))
+
+    def write(self, key, value, etag=None, create=False, ttl=None):
+        """Store `value`, rejecting a stale etag when `create` is set."""
+        _, version = self.values.get(key, (None, None))
+        if create and version != etag:
+            raise capacity_utils.StateConflict(key)
+        self.values[key] = (value, (version or 0) + 1)
+
+
+class TestSyncCapacitySnapshot(unittest.TestCase):
+    """Tests for sharing one capacity refresh between workers."""
+
+    def setUp(self):
+        """Create a shared state and one snapshot per worker."""
+        self.state = FakeState()
+        self.timer = FakeTimer()
+        self.leader = CapacitySnapshot(timer=self.timer)
+        self.follower = CapacitySnapshot(timer=self.timer)
+        secrets = {"host-1": "a3ViZQ==", "host-2": "a3ViZQ=="}
+        patches = [
+            mock.patch.object(
+                capacity_utils, "list_vault_secrets", return_value=secrets
+            ),
+            mock.patch.object(
+                capacity_utils, "collect_cluster_resources", return_value=USAGE
+            ),
+        ]
+        self.collect = [p.start() for p in patches][1]
+        for p in patches:
+            self.addCleanup(p.stop)
+
+    def sync(self, owner, snapshot):
+        """Run one refresher tick of `owner`."""
+        capacity_utils.sync_capacity_snapshot(
+            self.state, owner, lease_ttl=90, snapshot=snapshot
+        )
+
+    def test_only_lease_holder_scrapes(self):
+        """The second worker copies the published snapshot instead of scraping."""
+        self.sync("worker-1", self.leader)
+        self.timer.now = 10
+        self.sync("worker-2", self.follower)
+        self.sync("worker-1", self.leader)
+
+        self.assertEqual(self.collect.call_count, 2)
+        self.assertEqual(self.follower.get(["host-1", "host-2"], max_age=60), USAGE)
+        self.assertEqual(self.follower.age(), 10)
+
+    def test_follower_takes_over_expired_lease(self):
+        """Once the lease expires another worker becomes the refresher."""
+        self.sync("worker-1", self.leader)
+        del self.state.values[capacity_utils.CAPACITY_LEASE_KEY]
+        self.sync("worker-2", self.follower)
+
+        self.assertEqual(self.collect.call_count, 2)
+        self.assertEqual(
+            self.state.read(capacity_utils.CAPACITY_LEASE_KEY)[0],
+            {"owner": "worker-2"},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+"""Unit tests for the vcluster manifest builders and namespace handling."""
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import yaml
+from kubernetes import client
+from models.subscription import Subscription
+from tests import yaml_templates
+from utils import cluster_utils
+
+
+class TestManifestBuilders(unittest.TestCase):
+    """The dictionary builders must match the parsed YAML templates."""
+
+    def setUp(self):
+        """Create a sample subscription."""
+        self.subscription = Subscription("basic", 10, 5, 5, 5, 5, 10, 1, 1)
+
+    def test_vcluster_manifest_matches_template(self):
+        """The VCluster manifest, including the helm values block, is identical."""
+        kwargs = dict(
+            name="demo",
+            namespace="demo-vcluster",
+            host="demo.host.example.com",
+            kube_version="v1.29.0",
+        )
+        self.assertEqual(
+            cluster_utils.build_vcluster_manifest(**kwargs),
+            yaml.safe_load(yaml_templates.generate_vclusterYaml(**kwargs)),
+        )
+
+    def test_cluster_manifest_matches_template(self):
+        """The Cluster manifest is identical."""
+        kwargs = dict(name="demo", namespace="demo-vcluster")
+        self.assertEqual(
+            cluster_utils.build_cluster_manifest(**kwargs),
+            yaml.safe_load(yaml_templates.generate_cluster_yaml(**kwargs)),
+        )
+
+    def test_resource_quota_manifest_matches_template(self):
+        """The ResourceQuota manifest is identical."""
+        kwargs = dict(subscription=self.subscription, namespace="demo-vcluster")
+        self.assertEqual(
+            cluster_utils.build_resource_quota_manifest(**kwargs),
+            yaml.safe_load(yaml_templates.generate_resource_quota_yaml(**kwargs)),
+        )
+
+    def test_builders_do_not_share_state(self):
+        """Mutating one manifest does not leak into the next."""
+        first = cluster_utils.build_vcluster_manifest("a", "a-vcluster", "a.h", "v1")
+        first["spec"]["helmRelease"]["chart"]["version"] = "changed"
+        second = cluster_utils.build_vcluster_manifest("b", "b-vcluster", "b.h", "v1")
+        self.assertEqual(second["spec"]["helmRelease"]["chart"]["version"], "0.20.0")
+
+
+def make_namespace(labels=None, phase="Active"):
+    """Build a minimal namespace-like object."""
+    return SimpleNamespace(
+        metadata=SimpleNamespace(labels=labels),
+        status=SimpleNamespace(phase=phase),
+    )
+
+
+class TestEnsureNamespace(unittest.TestCase):
+    """ensure_namespace reuses or adopts namespaces and only replaces conflicts."""
+
+    def setUp(self):
+        """Patch the CoreV1Api and the deletion waiter."""
+        self.labels = cluster_utils.namespace_labels("demo", "id-1")
+        self.core_v1 = mock.MagicMock()
+        patcher = mock.patch.object(client, "CoreV1Api", return_value=self.core_v1)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        waiter = mock.patch.object(cluster_utils, "wait_for_namespace_deletion")
+        self.wait_for_deletion = waiter.start()
+        self.addCleanup(waiter.stop)
+
+    def ensure(self):
+        """Call ensure_namespace for the demo namespace."""
+        return cluster_utils.ensure_namespace(None, "demo-vcluster", self.labels)
+
+    def test_reuses_namespace_with_matching_labels(self):
+        """A namespace already labelled for this cluster is returned untouched."""
+        existing = make_namespace(dict(self.labels))
+        self.core_v1.read_namespace.return_value = existing
+
+        self.assertIs(self.ensure(), existing)
+        self.core_v1.delete_namespace.assert_not_called()
+        self.core_v1.patch_namespace.assert_not_called()
+        self.core_v1.create_namespace.assert_not_called()
+
+    def test_adopts_unlabelled_namespace(self):
+        """A namespace created before labelling gets the labels patched on."""
+        self.core_v1.read_namespace.return_value = make_namespace(None)
+
+        self.assertIs(self.ensure(), self.core_v1.patch_namespace.return_value)
+        self.core_v1.patch_namespace.assert_called_once_with(
+            name="demo-vcluster", body={"metadata": {"labels": self.labels}}
+        )
+        self.core_v1.delete_namespace.assert_not_called()
+        self.core_v1.create_namespace.assert_not_called()
+
+    def test_replaces_namespace_of_another_cluster(self):
+        """A namespace labelled with a different cluster ID is recreated."""
+        other = cluster_utils.namespace_labels("demo", "id-2")
+        self.core_v1.read_namespace.return_value = make_namespace(other)
+
+        self.assertIs(self.ensure(), self.core_v1.create_namespace.return_value)
+        self.core_v1.delete_namespace.assert_called_once()
+        self.wait_for_deletion.assert_called_once_with(None, "demo-vcluster")
+
+    def test_waits_out_terminating_namespace(self):
+        """A terminating namespace is not deleted again, only waited for."""
+        self.core_v1.read_namespace.return_value = make_namespace(
+            dict(self.labels), phase="Terminating"
+        )
+
+        self.assertIs(self.ensure(), self.core_v1.create_namespace.return_value)
+        self.core_v1.delete_namespace.assert_not_called()
+        self.wait_for_deletion.assert_called_once_with(None, "demo-vcluster")
+
+    def test_creates_missing_namespace(self):
+        """A missing namespace is created with the labels."""
+        self.core_v1.read_namespace.side_effect = client.rest.ApiException(status=404)
+
+        self.assertIs(self.ensure(), self.core_v1.create_namespace.return_value)
+        body = self.core_v1.create_namespace.call_args[0][0]
+        self.assertEqual(body.metadata.labels, self.labels)
+
+    def test_create_conflict_returns_existing_namespace(self):
+        """A 409 from a concurrent create returns the namespace that won."""
+        winner = make_namespace(dict(self.labels))
+        self.core_v1.read_namespace.side_effect = [
+            client.rest.ApiException(status=404),
+            winner,
+        ]
+        self.core_v1.create_namespace.side_effect = client.rest.ApiException(status=409)
+
+        self.assertIs(self.ensure(), winner)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+"""Unit tests for the concurrent host cluster metrics collector."""
+import threading
+import unittest
+from unittest import mock
+
+from utils import common_utils
+
+USAGE = {
+    "fast-1": {"CPU": 40.0, "MEMORY": 50.0},
+    "fast-2": {"CPU": 20.0, "MEMORY": 30.0},
+}
+
+
+class TestCollectClusterResources(unittest.TestCase):
+    """Tests for collect_cluster_resources()."""
+
+    def setUp(self):
+        """Replace per-cluster collection with an in-memory fake."""
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+        def fake_collect(Kube_secret):
+            host_cluster_id = Kube_secret["id"]
+            if host_cluster_id == "slow":
+                self.release.wait(timeout=5)
+            if host_cluster_id == "broken":
+                raise ConnectionError("connection refused")
+            return USAGE.get(host_cluster_id, {"CPU": 0.0, "MEMORY": 0.0})
+
+        patchers = [
+            mock.patch.object(common_utils, "_collect_from_secret", fake_collect),
+            mock.patch.object(common_utils, "HOST_CLUSTER_CHECK_TIMEOUT", 0.2),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_collects_all_clusters(self):
+        """Every reachable host cluster is reported."""
+        secrets = [{"id": "fast-1"}, {"id": "fast-2"}]
+        self.assertEqual(common_utils.collect_cluster_resources(secrets), USAGE)
+
+    def test_slow_and_failing_clusters_are_dropped(self):
+        """Hosts that time out or raise are left out of the result."""
+        secrets = [
+            {"id": "fast-1"},
+            {"id": "slow"},
+            {"id": "broken"},
+            {"id": "fast-2"},
+        ]
+        self.assertEqual(common_utils.collect_cluster_resources(secrets), USAGE)
+
+    def test_best_cluster_ignores_unreachable_hosts(self):
+        """Selection still succeeds when one host is unreachable."""
+        secrets = [{"id": "fast-1"}, {"id": "broken"}, {"id": "fast-2"}]
+        best = common_utils.get_available_resources_fromSecret(secrets)
+        self.assertEqual(best, {"fast-2": {"best_cpu": 20.0, "best_memory": 30.0}})
+
+
+class TestGetClusterResourceUsage(unittest.TestCase):
+    """Tests for the request deadline of get_cluster_resource_usage()."""
+
+    def setUp(self):
+        """Replace the Kubernetes APIs and the clock with fakes."""
+        self.custom = mock.Mock()
+        self.core = mock.Mock()
+        self.clock = mock.Mock()
+        patchers = [
+            mock.patch.object(
+                common_utils.client, "CustomObjectsApi", return_value=self.custom
+            ),
+            mock.patch.object(common_utils.client, "CoreV1Api", return_value=self.core),
+            mock.patch.object(common_utils.time, "monotonic", self.clock),
+            mock.patch.object(
+                common_utils,
+                "cluster_load",
+                return_value={"PercCPU": 10.0, "PercMEM": 20.0},
+            ),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_requests_share_one_timeout(self):
+        """Each request only gets the time left by the previous one."""
+        self.clock.side_effect = [0.0, 0.5, 1.5]
+
+        usage = common_utils.get_cluster_resource_usage(mock.Mock(), timeout=2)
+
+        self.assertEqual(usage, {"CPU": 10.0, "MEMORY": 20.0})
+        self.assertEqual(
+            self.custom.list_cluster_custom_object.call_args.kwargs,
+            {"_request_timeout": 1.5},
+        )
+        self.core.list_node.assert_called_once_with(_request_timeout=0.5)
+
+    def test_spent_budget_stops_before_next_request(self):
+        """No further request is made once the timeout has passed."""
+        self.clock.side_effect = [0.0, 0.5, 2.5]
+
+        with self.assertRaises(TimeoutError):
+            common_utils.get_cluster_resource_usage(mock.Mock(), timeout=2)
+
+        self.core.list_node.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
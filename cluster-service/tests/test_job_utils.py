@@ -0,0 +1,208 @@
+"""Unit tests for the background job engine."""
+import threading
+import unittest
+
+from utils import job_utils
+from utils.job_utils import (
+    JOB_FAILED,
+    JOB_QUEUED,
+    JOB_RUNNING,
+    JOB_SUCCEEDED,
+    JobManager,
+    MemoryJobStore,
+    track_step,
+)
+
+
+class TestJobManager(unittest.TestCase):
+    """Tests for JobManager submission, tracking and history."""
+
+    def setUp(self):
+        """Create a small manager for each test."""
+        self.manager = JobManager(max_workers=2, history_size=2)
+
+    def wait_for(self, job):
+        """Block until `job` has finished."""
+        for _ in range(200):
+            if job.is_finished():
+                return
+            threading.Event().wait(0.01)
+        self.fail(f"job {job.id} did not finish")
+
+    def test_successful_job_records_steps_and_result(self):
+        """Steps are timestamped and the return value is kept."""
+
+        def pipeline(payload, job=None):
+            with track_step(job, "first"):
+                pass
+            with track_step(job, "second"):
+                pass
+            return {"name": payload}
+
+        job = self.manager.submit("create-cluster", pipeline, "demo")
+        self.wait_for(job)
+
+        report = job.to_dict()
+        self.assertEqual(report["status"], JOB_SUCCEEDED)
+        self.assertEqual(report["result"], {"name": "demo"})
+        self.assertEqual(
+            [step["name"] for step in report["steps"]], ["first", "second"]
+        )
+        self.assertTrue(all(step["finished_at"] for step in report["steps"]))
+        self.assertIs(self.manager.get(job.id), job)
+
+    def test_failed_job_records_error_and_step(self):
+        """An exception marks the job and the failing step as failed."""
+
+        def pipeline(job=None):
+            with track_step(job, "explode"):
+                raise RuntimeError("boom")
+
+        job = self.manager.submit("create-cluster", pipeline)
+        self.wait_for(job)
+
+        self.assertEqual(job.status, JOB_FAILED)
+        self.assertEqual(job.error, "boom")
+        self.assertEqual(job.steps[0]["status"], JOB_FAILED)
+
+    def test_duplicate_job_id_returns_existing_job(self):
+        """Resubmitting an active job id does not start a second run."""
+        release = threading.Event()
+        self.addCleanup(release.set)
+        runs = []
+
+        def pipeline(job=None):
+            runs.append(job.id)
+            release.wait(timeout=5)
+
+        first = self.manager.submit("create-cluster", pipeline, job_id="event-1")
+        second = self.manager.submit("create-cluster", pipeline, job_id="event-1")
+        self.assertIs(first, second)
+        release.set()
+        self.wait_for(first)
+        self.assertEqual(runs, ["event-1"])
+
+    def test_failed_job_id_can_be_retried(self):
+        """A failed job is replaced when the same id is submitted again."""
+
+        def failing(job=None):
+            raise RuntimeError("boom")
+
+        first = self.manager.submit("create-cluster", failing, job_id="event-2")
+        self.wait_for(first)
+        second = self.manager.submit(
+            "create-cluster", lambda job=None: "ok", job_id="event-2"
+        )
+        self.assertIsNot(first, second)
+        self.wait_for(second)
+        self.assertEqual(second.status, JOB_SUCCEEDED)
+
+    def test_history_keeps_running_jobs(self):
+        """Only finished jobs are evicted when the history is full."""
+        release = threading.Event()
+        self.addCleanup(release.set)
+        running = self.manager.submit(
+            "create-cluster", lambda job=None: release.wait(5)
+        )
+        for _ in range(3):
+            self.wait_for(self.manager.submit("create-cluster", lambda job=None: None))
+
+        self.assertIsNotNone(self.manager.get(running.id))
+        self.assertEqual(running.status, JOB_RUNNING)
+
+    def test_track_step_without_job(self):
+        """track_step is a no-op outside a job."""
+        with track_step(None, "noop"):
+            pass
+
+
+class TestSharedJobStore(unittest.TestCase):
+    """Tests for jobs shared between workers through the job store."""
+
+    def setUp(self):
+        """Create two managers, standing in for two workers, on one store."""
+        self.store = MemoryJobStore()
+        self.now = 1000.0
+        self.first = JobManager(
+            max_workers=2, store=self.store, stale_after=60, timer=self.clock
+        )
+        self.second = JobManager(
+            max_workers=2, store=self.store, stale_after=60, timer=self.clock
+        )
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+    def clock(self):
+        """Return the fake current time."""
+        return self.now
+
+    def blocking(self, payload, job=None):
+        """A pipeline that runs until the test releases it."""
+        with track_step(job, "wait"):
+            self.release.wait(timeout=5)
+        return payload
+
+    def wait_for(self, manager, job_id):
+        """Block until the job has finished in the store."""
+        for _ in range(200):
+            job = manager.get(job_id)
+            if job is not None and job.is_finished():
+                return job
+            threading.Event().wait(0.01)
+        self.fail(f"job {job_id} did not finish")
+
+    def test_job_is_stored_before_submit_returns(self):
+        """Another worker reports a job as soon as it is accepted."""
+        self.first.submit("create-cluster", self.blocking, "demo", job_id="event-1")
+
+        job = self.second.get("event-1")
+        self.assertIsNotNone(job)
+        self.assertIn(job.status, (JOB_QUEUED, JOB_RUNNING))
+        self.assertEqual(self.store.active_ids(), {"event-1"})
+
+        self.release.set()
+        job = self.wait_for(self.second, "event-1")
+        self.assertEqual(job.status, JOB_SUCCEEDED)
+        self.assertEqual(job.result, "demo")
+        self.assertEqual([step["name"] for step in job.steps], ["wait"])
+        self.assertEqual(self.store.active_ids(), set())
+
+    def test_redelivery_to_another_worker_is_deduplicated(self):
+        """A live job submitted again on another worker is not run twice."""
+        runs = []
+
+        def pipeline(job=None):
+            runs.append(job.id)
+            self.release.wait(timeout=5)
+
+        self.first.submit("create-cluster", pipeline, job_id="event-2")
+        duplicate = self.second.submit("create-cluster", pipeline, job_id="event-2")
+
+        self.assertEqual(duplicate.id, "event-2")
+        self.release.set()
+        self.wait_for(self.first, "event-2")
+        self.assertEqual(runs, ["event-2"])
+
+    def test_stale_job_is_resumed_by_another_worker(self):
+        """A job whose worker stopped heartbeating is run again elsewhere."""
+        self.first.submit("create-cluster", self.blocking, "demo", job_id="event-3")
+        self.second.register("create-cluster", lambda payload, job=None: payload)
+
+        self.assertEqual(self.second.resume_stale(), [])
+        self.now += 61
+        resumed = self.second.resume_stale()
+
+        self.assertEqual([job.id for job in resumed], ["event-3"])
+        job = self.wait_for(self.second, "event-3")
+        self.assertEqual(job.result, "demo")
+
+    def test_create_conflict_is_rejected(self):
+        """Only the first creation of a record wins."""
+        record = {"id": "event-4", "status": JOB_QUEUED}
+        self.store.save(record, create=True)
+        with self.assertRaises(job_utils.StateConflict):
+            self.store.save(record, create=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+"""Unit tests for the per-host-cluster Kubernetes client registry."""
+import unittest
+from unittest import mock
+
+from utils import kube_client_utils
+from utils.cache_utils import TTLCache
+
+
+class TestGetApiClient(unittest.TestCase):
+    """Tests for get_api_client() and invalidate_api_client()."""
+
+    def setUp(self):
+        """Use an empty registry and count the clients built."""
+        registry = TTLCache(
+            maxsize=2, ttl=60, on_evict=kube_client_utils._close_api_client
+        )
+        build = mock.Mock(side_effect=lambda kubeconfig: mock.Mock(name=kubeconfig))
+        patchers = [
+            mock.patch.object(kube_client_utils, "_api_clients", registry),
+            mock.patch.object(kube_client_utils, "build_api_client", build),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.build = build
+
+    def test_reuses_client_for_same_kubeconfig(self):
+        """The same kubeconfig digest returns the cached client."""
+        first = kube_client_utils.get_api_client("hc-1", "a3ViZWNvbmZpZw==")
+        second = kube_client_utils.get_api_client("hc-1", "a3ViZWNvbmZpZw==")
+        self.assertIs(first, second)
+        self.build.assert_called_once()
+        first.close.assert_not_called()
+
+    def test_rebuilds_and_closes_client_when_kubeconfig_changes(self):
+        """A rotated kubeconfig gets a new client and the old one is closed."""
+        old = kube_client_utils.get_api_client("hc-1", "b2xk")
+        new = kube_client_utils.get_api_client("hc-1", "bmV3")
+        self.assertIsNot(old, new)
+        self.assertEqual(self.build.call_count, 2)
+        old.close.assert_called_once()
+        new.close.assert_not_called()
+
+    def test_closes_least_recently_used_client(self):
+        """A client evicted to make room is closed."""
+        first = kube_client_utils.get_api_client("hc-1", "b25l")
+        kube_client_utils.get_api_client("hc-2", "dHdv")
+        kube_client_utils.get_api_client("hc-3", "dGhyZWU=")
+        first.close.assert_called_once()
+
+    def test_invalidate_closes_clients(self):
+        """Invalidated clients are closed and rebuilt on next use."""
+        first = kube_client_utils.get_api_client("hc-1", "b25l")
+        second = kube_client_utils.get_api_client("hc-2", "dHdv")
+        kube_client_utils.invalidate_api_client("hc-1")
+        first.close.assert_called_once()
+        kube_client_utils.invalidate_api_client()
+        second.close.assert_called_once()
+        kube_client_utils.get_api_client("hc-1", "b25l")
+        self.assertEqual(self.build.call_count, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
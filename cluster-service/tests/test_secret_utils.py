@@ -0,0 +1,101 @@
+"""Unit tests for the cached Vault secret lookups."""
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from utils import secret_utils
+
+SECRET_MAP = {"host-1": "a3ViZWNvbmZpZy0x", "host-2": "a3ViZWNvbmZpZy0y"}
+
+
+class TestVaultSecretCache(unittest.TestCase):
+    """Tests for caching, bulk fetch and single-flight in secret_utils."""
+
+    def setUp(self):
+        """Start every test with an empty cache and a fake Dapr client."""
+        secret_utils.invalidate_vault_secret()
+        patchers = [
+            mock.patch.object(
+                secret_utils, "_dapr_client", secret_utils._DaprClientHolder()
+            ),
+            mock.patch.object(secret_utils, "DaprClient"),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.dapr_client = secret_utils.DaprClient
+        self.get_secret = self.dapr_client.return_value.get_secret
+        self.get_secret.return_value = SimpleNamespace(secret=SECRET_MAP)
+
+    def test_secret_is_served_from_cache(self):
+        """A second lookup does not reach the sidecar."""
+        self.assertEqual(secret_utils.get_vault_secret("host-1"), SECRET_MAP["host-1"])
+        self.assertEqual(secret_utils.get_vault_secret("host-2"), SECRET_MAP["host-2"])
+        self.assertEqual(self.get_secret.call_count, 1)
+
+    def test_bulk_fetch_uses_one_round_trip(self):
+        """get_vault_secrets resolves every id from a single fetch."""
+        secrets = secret_utils.get_vault_secrets(["host-1", "host-2", "missing"])
+        self.assertEqual(
+            secrets,
+            {
+                "host-1": SECRET_MAP["host-1"],
+                "host-2": SECRET_MAP["host-2"],
+                "missing": None,
+            },
+        )
+        self.assertEqual(self.get_secret.call_count, 1)
+
+    def test_invalidation_forces_refetch(self):
+        """Invalidating an id makes the next lookup hit the sidecar again."""
+        secret_utils.get_vault_secret("host-1")
+        secret_utils.invalidate_vault_secret("host-1")
+        secret_utils.get_vault_secret("host-1")
+        self.assertEqual(self.get_secret.call_count, 2)
+
+    def test_dapr_client_is_reused_and_replaced_after_failure(self):
+        """Fetches share one client; a failed fetch forces a reconnect."""
+        secret_utils.list_vault_secrets()
+        secret_utils.list_vault_secrets()
+        self.assertEqual(self.dapr_client.call_count, 1)
+
+        self.get_secret.side_effect = RuntimeError("sidecar restarted")
+        with self.assertRaises(Exception):
+            secret_utils.list_vault_secrets()
+        self.dapr_client.return_value.close.assert_called_once()
+
+        self.get_secret.side_effect = None
+        secret_utils.list_vault_secrets()
+        self.assertEqual(self.dapr_client.call_count, 2)
+
+    def test_concurrent_misses_share_one_fetch(self):
+        """Threads missing the cache at the same time wait on one fetch."""
+        release = threading.Event()
+
+        def slow_get_secret(**kwargs):
+            release.wait(timeout=5)
+            return SimpleNamespace(secret=SECRET_MAP)
+
+        self.get_secret.side_effect = slow_get_secret
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(secret_utils.get_vault_secret("host-1"))
+            )
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+        release.set()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        self.assertEqual(results, [SECRET_MAP["host-1"]] * 5)
+        self.assertEqual(self.get_secret.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
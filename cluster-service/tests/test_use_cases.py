@@ -0,0 +1,51 @@
+"""Unit tests for the create-cluster readiness checks."""
+import unittest
+from unittest import mock
+
+from usecases import use_cases
+from utils.waiter_utils import WaitResult
+
+
+class TestWaitForStsPodReadiness(unittest.TestCase):
+    """wait_for_sts_pod_readiness raises instead of returning failures."""
+
+    def test_timeout_raises(self):
+        """A pod that never runs raises TimeoutError."""
+        with mock.patch.object(
+            use_cases, "wait_for_pod_phase", return_value=WaitResult(False, 300)
+        ), mock.patch.object(use_cases, "add_labels_to_statefulset") as add_labels:
+            with self.assertRaises(TimeoutError):
+                use_cases.wait_for_sts_pod_readiness(None, "ns", "demo", "id-1")
+        add_labels.assert_not_called()
+
+    def test_label_failure_raises(self):
+        """An error string from add_labels_to_statefulset raises RuntimeError."""
+        with mock.patch.object(
+            use_cases, "wait_for_pod_phase", return_value=WaitResult(True, 1)
+        ), mock.patch.object(
+            use_cases, "add_labels_to_statefulset", return_value="An error occurred"
+        ):
+            with self.assertRaises(RuntimeError):
+                use_cases.wait_for_sts_pod_readiness(None, "ns", "demo", "id-1")
+
+    def test_running_pod_is_labelled(self):
+        """A running pod gets the status-controller labels."""
+        with mock.patch.object(
+            use_cases, "wait_for_pod_phase", return_value=WaitResult(True, 1)
+        ), mock.patch.object(use_cases, "add_labels_to_statefulset") as add_labels:
+            self.assertTrue(
+                use_cases.wait_for_sts_pod_readiness(None, "ns", "demo", "id-1")
+            )
+        add_labels.assert_called_once_with(
+            None,
+            "ns",
+            "demo",
+            {
+                "status-controller-vcluster": "cluster-manager",
+                "status-controller": "id-1",
+            },
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+"""Unit tests for the watch-based Kubernetes waiters."""
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from kubernetes import client
+from utils import waiter_utils
+
+
+def make_pod(phase, resource_version):
+    """Build a minimal pod-like object."""
+    return SimpleNamespace(
+        metadata=SimpleNamespace(resource_version=resource_version),
+        status=SimpleNamespace(phase=phase),
+    )
+
+
+def make_listing(items, resource_version):
+    """Build a minimal list response."""
+    return SimpleNamespace(
+        items=items, metadata=SimpleNamespace(resource_version=resource_version)
+    )
+
+
+class FakeWatch:
+    """Watch stand-in that replays scripted streams, one per stream() call."""
+
+    streams = []
+    calls = []
+
+    def stream(self, func, **kwargs):
+        """Yield the next scripted batch of events, raising if it is an error."""
+        FakeWatch.calls.append(kwargs)
+        events = FakeWatch.streams.pop(0)
+        if isinstance(events, Exception):
+            raise events
+        yield from events
+
+    def stop(self):
+        """Stop the stream."""
+
+
+def is_running(pod):
+    """Return True if the pod is running."""
+    return pod.status.phase == "Running"
+
+
+class TestWaitFor(unittest.TestCase):
+    """Tests for waiter_utils.wait_for()."""
+
+    def setUp(self):
+        """Replace the Kubernetes watch with FakeWatch."""
+        FakeWatch.streams = []
+        FakeWatch.calls = []
+        patcher = mock.patch.object(waiter_utils.watch, "Watch", FakeWatch)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_returns_immediately_when_already_ready(self):
+        """No watch is opened when the listing already satisfies the predicate."""
+        list_func = mock.Mock(
+            return_value=make_listing([make_pod("Running", "5")], "5")
+        )
+        result = waiter_utils.wait_for(list_func, is_running, "pod", timeout=10)
+        self.assertTrue(result)
+        self.assertEqual(FakeWatch.calls, [])
+
+    def test_watch_resumes_from_list_resource_version(self):
+        """The watch starts at the listing's resourceVersion and stops on success."""
+        list_func = mock.Mock(
+            return_value=make_listing([make_pod("Pending", "5")], "5")
+        )
+        FakeWatch.streams = [
+            [
+                {"type": "MODIFIED", "object": make_pod("Pending", "6")},
+                {"type": "MODIFIED", "object": make_pod("Running", "7")},
+            ]
+        ]
+        result = waiter_utils.wait_for(list_func, is_running, "pod", timeout=10)
+        self.assertTrue(result)
+        self.assertEqual(result.obj.metadata.resource_version, "7")
+        self.assertEqual(FakeWatch.calls[0]["resource_version"], "5")
+        self.assertGreaterEqual(result.elapsed, 0)
+
+    def test_relists_after_expired_resource_version(self):
+        """A 410 from the watch triggers a fresh list before watching again."""
+        list_func = mock.Mock(
+            side_effect=[
+                make_listing([make_pod("Pending", "5")], "5"),
+                make_listing([make_pod("Pending", "9")], "9"),
+            ]
+        )
+        FakeWatch.streams = [
+            client.rest.ApiException(status=410),
+            [{"type": "MODIFIED", "object": make_pod("Running", "10")}],
+        ]
+        result = waiter_utils.wait_for(list_func, is_running, "pod", timeout=10)
+        self.assertTrue(result)
+        self.assertEqual(list_func.call_count, 2)
+        self.assertEqual(FakeWatch.calls[1]["resource_version"], "9")
+
+    def test_until_deleted_completes_on_delete_event(self):
+        """Deletion waits finish on the DELETED event."""
+        list_func = mock.Mock(return_value=make_listing([make_pod(None, "5")], "5"))
+        FakeWatch.streams = [[{"type": "DELETED", "object": make_pod(None, "6")}]]
+        result = waiter_utils.wait_for(
+            list_func, None, "namespace", timeout=10, until_deleted=True
+        )
+        self.assertTrue(result)
+
+    def test_times_out(self):
+        """The waiter gives up once the deadline has passed."""
+        list_func = mock.Mock(
+            return_value=make_listing([make_pod("Pending", "5")], "5")
+        )
+        result = waiter_utils.wait_for(list_func, is_running, "pod", timeout=0)
+        self.assertFalse(result)
+        list_func.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+"""
+YAML text templates the vcluster manifests used to be rendered from.
+
+The dictionary builders in `cluster_utils` replaced them on the create
+path; they are kept here as the reference the builders are compared
+against in the tests and in `benchmarks/bench_manifests.py`.
+"""
+
+
+def generate_vclusterYaml(name, namespace, host, kube_version):
+    """Generate the YAML configuration for a vcluster."""
+    yaml_template = """
+apiVersion: infrastructure.cluster.x-k8s.io/v1alpha1
+kind: VCluster
+metadata:
+  name: {name}
+  namespace: {namespace}
+spec:
+  controlPlaneEndpoint:
+    host: {host}
+    port: 443
+  helmRelease:
+    chart:
+      name: vcluster
+      repo: https://charts.loft.sh
+      version: 0.20.0
+    values: |
+      controlPlane:
+        distro:
+          k8s:
+            enabled: false
+            version: ''
+            apiServer:
+              enabled: true
+              image:
+                registry: registry.k8s.io
+                repository: kube-apiserver
+                tag: {kube_version}
+            controllerManager:
+              enabled: true
+              image:
+                registry: registry.k8s.io
+                repository: kube-controller-manager
+                tag: {kube_version}
+        proxy:
+          extraSANs:
+          - {host}
+"""
+    return yaml_template.format(
+        name=name, namespace=namespace, host=host, kube_version=kube_version
+    )
+
+
+def generate_cluster_yaml(name: str, namespace: str):
+    """Generate the YAML configuration for a Cluster."""
+    yaml_template = """
+apiVersion: cluster.x-k8s.io/v1beta1
+kind: Cluster
+metadata:
+  name: {name}
+  namespace: {namespace}
+spec:
+  controlPlaneRef:
+    apiVersion: infrastructure.cluster.x-k8s.io/v1alpha1
+    kind: VCluster
+    name: {name}
+  infrastructureRef:
+    apiVersion: infrastructure.cluster.x-k8s.io/v1alpha1
+    kind: VCluster
+    name: {name}
+"""
+    return yaml_template.format(
+        name=name,
+        namespace=namespace,
+    )
+
+
+def generate_resource_quota_yaml(subscription, namespace: str):
+    """Generate the YAML configuration for a ResourceQuota based on subscription."""
+    yaml_template = """
+apiVersion: v1
+kind: ResourceQuota
+metadata:
+  name: {name}
+  namespace: {namespace}
+spec:
+  hard:
+    pods: {pod}
+    services: {service}
+    configmaps: {config_map}
+    persistentvolumeclaims: {persistent_volume_claims}
+    replicationcontrollers: {replication_controllers}
+    secrets: {secrets}
+    services.loadbalancers: {load_balancers}
+    services.nodeports: {node_ports}
+"""
+    return yaml_template.format(
+        name=subscription.name,
+        namespace=namespace,
+        pod=subscription.pods,
+        service=subscription.service,
+        config_map=subscription.config_map,
+        persistent_volume_claims=subscription.persistence_vol_claims,
+        replication_controllers=subscription.replication_ctl,
+        secrets=subscription.secrets,
+        load_balancers=subscription.loadbalancer,
+        node_ports=subscription.node_port,
+    )
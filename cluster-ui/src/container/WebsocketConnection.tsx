@@ -47,11 +47,21 @@ export const useWebsocketConnection = () => {
       if (response) {
         try {
           const _data = JSON.parse(response);
-          if (_data.event === "cluster_status_updated") {
+          // Statuses coalesced in one server window arrive as a batch
+          const updates: any[] =
+            _data.event === "cluster_status_updated"
+              ? [_data]
+              : _data.event === "cluster_status_batch"
+                ? _data.updates || []
+                : [];
+          if (updates.length > 0) {
+            const latest = new Map(
+              updates.map((update) => [update.cluster_id, update.status])
+            );
             setClusterStatus((prevStatus: any[]) => {
               return prevStatus.map((statusObj) => {
-                if (statusObj.clusterId === _data.cluster_id) {
-                  return { ...statusObj, status: _data.status };
+                if (latest.has(statusObj.clusterId)) {
+                  return { ...statusObj, status: latest.get(statusObj.clusterId) };
                 }
                 return statusObj;
               });